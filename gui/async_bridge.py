@@ -0,0 +1,81 @@
+"""
+Async Bridge - Delivers results of background coroutines to callbacks on the Tk main loop
+"""
+
+import logging
+import queue
+from typing import Callable, Optional
+
+class TkAsyncBridge:
+    """Runs coroutines on an AsyncAPIClient loop and calls back on the Tk thread when they finish"""
+    
+    def __init__(self, widget, api_client, poll_interval_ms: int = 15):
+        """
+        Args:
+            widget: Any Tk widget, used for after() scheduling
+            api_client: AsyncAPIClient (or anything with submit(coro) -> concurrent future)
+            poll_interval_ms: How often finished requests are checked while some are pending
+        """
+        self.logger = logging.getLogger(__name__)
+        self.widget = widget
+        self.api_client = api_client
+        self.poll_interval_ms = poll_interval_ms
+        self._done = queue.Queue()
+        self._pending = 0
+        self._poll_scheduled = False
+    
+    @property
+    def pending(self) -> int:
+        """Number of requests still running"""
+        return self._pending
+    
+    def run(self, coro, on_result: Callable, on_error: Optional[Callable] = None):
+        """Start a coroutine in the background; must be called from the Tk thread
+        
+        Args:
+            coro: Coroutine, e.g. api_client.send_message(...)
+            on_result: Called on the Tk thread with the coroutine result
+            on_error: Called on the Tk thread with the exception (logged if not given)
+        """
+        return self.watch(self.api_client.submit(coro), on_result, on_error)
+    
+    def watch(self, future, on_result: Callable, on_error: Optional[Callable] = None):
+        """Call back on the Tk thread when a concurrent future (e.g. from a thread pool) is done
+        
+        Args:
+            future: concurrent.futures.Future
+            on_result: Called on the Tk thread with the future's result
+            on_error: Called on the Tk thread with its exception (logged if not given)
+        """
+        self._pending += 1
+        # Runs on the thread that completes the future - only hand it over
+        future.add_done_callback(lambda done: self._done.put((done, on_result, on_error)))
+        self._schedule_poll()
+        return future
+    
+    def _schedule_poll(self):
+        if not self._poll_scheduled:
+            self._poll_scheduled = True
+            self.widget.after(self.poll_interval_ms, self._poll)
+    
+    def _poll(self):
+        self._poll_scheduled = False
+        while True:
+            try:
+                future, on_result, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            try:
+                error = future.exception()
+                if error is None:
+                    on_result(future.result())
+                elif on_error:
+                    on_error(error)
+                else:
+                    self.logger.error(f"Background request failed: {error}")
+            except Exception as e:
+                self.logger.error(f"Error in async callback: {e}")
+                
+        if self._pending > 0:
+            self._schedule_poll()
@@ -6,23 +6,36 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import threading
+import concurrent.futures
+import time
 import logging
 import os
 from pathlib import Path
 
 from .screenshot_dialog import ScreenshotDialog
 from .subscription_dialog import SubscriptionDialog
+from .async_bridge import TkAsyncBridge
+from .stream_appender import TkStreamAppender
+from .message_window import MessageWindow
+from utils.markdown_renderer import MarkdownRenderer
+from services.async_api_client import AsyncAPIClient
 from services.screenshot_settings import ScreenshotSettingsService
+from services.change_detector import FrameChangeDetector
 from services.coordinates_manager import CoordinatesManager
 from services.automation_service import AutomationService
+from services.action_detector import IncrementalActionDetector, extract_action
 
 class ModernChatWidget(ctk.CTkFrame):
     """Modern chat widget using CustomTkinter"""
     
-    def __init__(self, parent, api_client, screenshot_service, chat_manager, theme_manager):
+    def __init__(self, parent, api_client, screenshot_service, chat_manager, theme_manager, async_api_client=None):
         super().__init__(parent)
         
         self.api_client = api_client
+        
+        # API requests run on one background event loop instead of a thread per request
+        self.async_api_client = async_api_client or AsyncAPIClient(api_client.config, auth_client=api_client)
+        self.api_bridge = TkAsyncBridge(self, self.async_api_client)
         self.screenshot_service = screenshot_service
         self.chat_manager = chat_manager
         self.theme_manager = theme_manager
@@ -31,6 +44,9 @@ class ModernChatWidget(ctk.CTkFrame):
         # Initialize screenshot settings
         self.screenshot_settings = ScreenshotSettingsService()
         
+        # Skips analysis of auto screenshots while the screen does not change
+        self.change_detector = FrameChangeDetector()
+        
         # Initialize automation services
         self.coordinates_manager = CoordinatesManager()
         self.automation_service = AutomationService(self.coordinates_manager)
@@ -44,6 +60,32 @@ class ModernChatWidget(ctk.CTkFrame):
         self.auto_screenshots_interval = self.screenshot_settings.get_settings().get("auto_screenshots_interval", 5)  # seconds
         self.auto_screenshots_timer = None
         self.analysis_in_progress = False
+        self._main_window_hidden = False
+        
+        # Chat answers are streamed and inserted in batches
+        self.stream_chat = api_client.config.getboolean("api", "stream_chat", True)
+        self.stream_flush_ms = api_client.config.getint("gui", "stream_flush_ms", 40)
+        self._active_streams = set()
+        
+        # Only the last page of a chat is shown on switching, older pages are loaded on scrolling up
+        self.message_page_size = api_client.config.getint("gui", "message_page_size", 50)
+        # The view keeps a bounded number of messages; evicted ones are loaded again on scrolling back
+        self.message_window = MessageWindow(
+            api_client.config.getint("gui", "max_rendered_messages", 200), self.message_page_size
+        )
+        self._history_loading = False
+        
+        # Progress of screenshot analysis goes to a status line, not into the chat history
+        self.status_notice_ms = api_client.config.getint("gui", "status_notice_ms", 4000)
+        self._status_timer = None
+        
+        # Button clicks found in streamed answers run here, one at a time, off the Tk and API threads
+        self._action_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="automation")
+        
+        # Assistant messages are rendered as markdown; parsing runs here, the Tk thread only inserts the result
+        self._markdown_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="markdown")
+        self._markdown_pending = set()  # Keys of shown messages whose rendered body is still being parsed
+        self._view_generation = 0  # Bumped when the view is cleared, parse results for the old view are dropped
         
         # Create widgets
         self.create_widgets()
@@ -89,8 +131,17 @@ class ModernChatWidget(ctk.CTkFrame):
         )
         self.messages_text.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         
+        # Older messages are loaded when the view reaches the top, evicted newer ones at the bottom
+        self.messages_text.configure(yscrollcommand=self._on_messages_scroll)
+        
         # Configure text tags for modern styling
         self.setup_text_tags()
+        
+        # Markdown tags are configured by the renderer, once per theme
+        self.markdown_renderer = MarkdownRenderer(
+            self.messages_text, self.api_client.config.getint("gui", "markdown_cache_size", 1000)
+        )
+        self.markdown_renderer.set_theme_manager(self.theme_manager)
     
     def setup_text_tags(self):
         """Setup text tags for modern message styling"""
@@ -439,7 +490,6 @@ class ModernChatWidget(ctk.CTkFrame):
         )
         settings_btn.pack(side="left", padx=5, pady=10)
         
-        
         # New chat button
         new_chat_btn = ctk.CTkButton(
             buttons_frame,
@@ -450,12 +500,69 @@ class ModernChatWidget(ctk.CTkFrame):
             width=120
         )
         new_chat_btn.pack(side="right", padx=(5, 10), pady=10)
+        
+        # Transient status line (set_status) between the buttons
+        self.status_label = ctk.CTkLabel(
+            buttons_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            anchor="w"
+        )
+        self.status_label.pack(side="left", fill="x", expand=True, padx=10, pady=10)
+    
+    def set_status(self, text, clear_after_ms=None):
+        """Show a transient status line; it replaces the previous one and is never saved to the chat
+        
+        Args:
+            text: Status text
+            clear_after_ms: Clear it after this many milliseconds (by default it stays until replaced or cleared)
+        """
+        if self._status_timer:
+            self.after_cancel(self._status_timer)
+            self._status_timer = None
+        self.status_label.configure(text=text)
+        if clear_after_ms:
+            self._status_timer = self.after(clear_after_ms, self.clear_status)
+    
+    def clear_status(self):
+        """Remove the status line"""
+        self.set_status("")
     
     def add_message(self, message, sender="assistant"):
         """Add message to chat with modern styling"""
+        self._show_latest()
+        start = self.messages_text.index("end-1c")
+        sender_tag = self._insert_message_header(sender)
+        key = self.message_window.append(stored=bool(getattr(self, 'current_chat_id', None)))
+        self.messages_text.mark_set(self._message_mark(key), start)
+        
+        # Insert message with appropriate styling
+        if self._renders_markdown(sender):
+            # Only the place is reserved now, so later messages go below it; the body follows once parsed
+            self.messages_text.insert(tk.END, "\n\n", sender_tag)
+            self._mark_body(key, "end-3c")
+            self._render_markdown_later(key, message, sender_tag)
+        else:
+            self.messages_text.insert(tk.END, f"{message}\n\n", sender_tag)
+        self._evict_oldest()
+        
+        # Auto-scroll to bottom
+        self.messages_text.see(tk.END)
+        
+        # Save message to chat manager
+        self._save_message(message, sender)
+    
+    def _insert_message_header(self, sender, index=tk.END, sent_at=None):
+        """Insert timestamp and sender prefix; returns the text tag for the message body
+        
+        sent_at: ISO time of a stored message (now by default)
+        """
         # Add timestamp
         from datetime import datetime
-        timestamp = datetime.now().strftime("%H:%M")
+        try:
+            timestamp = datetime.fromisoformat(sent_at).strftime("%H:%M")
+        except (TypeError, ValueError):
+            timestamp = datetime.now().strftime("%H:%M")
         
         # Add sender prefix and message
         if sender == "user":
@@ -472,30 +579,231 @@ class ModernChatWidget(ctk.CTkFrame):
             sender_tag = "assistant"
         
         # Insert timestamp
-        self.messages_text.insert(tk.END, f"[{timestamp}] ", "timestamp")
+        self.messages_text.insert(index, f"[{timestamp}] ", "timestamp")
         
         # Insert sender prefix
-        self.messages_text.insert(tk.END, f"{prefix}: ", "sender")
+        self.messages_text.insert(index, f"{prefix}: ", "sender")
+        return sender_tag
+    
+    def _render_message(self, message, key, index=tk.END, spans=None):
+        """Show a stored message without saving it again; key is its entry in the message window
         
-        # Insert message with appropriate styling
-        self.messages_text.insert(tk.END, f"{message}\n\n", sender_tag)
+        spans: Parsed markdown of the message body (plain text if not given)
+        """
+        start = self.messages_text.index("end-1c" if index == tk.END else index)
+        sender_tag = self._insert_message_header(message.get("sender", "assistant"), index, message.get("timestamp"))
+        if spans:
+            # Every span line ends with a newline already, one more separates the messages
+            self.markdown_renderer.insert_spans(spans + (("\n", None),), index, (sender_tag,))
+        else:
+            self.messages_text.insert(index, f"{message.get('content', '')}\n\n", sender_tag)
+        self.messages_text.mark_set(self._message_mark(key), start)
+    
+    def _renders_markdown(self, sender):
+        """Whether messages of a sender are shown as markdown (assistant answers)"""
+        return sender not in ("user", "error")
+    
+    def _markdown_texts(self, messages):
+        """Texts of stored messages to parse, None for those shown as plain text"""
+        return [
+            message.get("content") if self._renders_markdown(message.get("sender", "assistant")) else None
+            for message in messages
+        ]
+    
+    def _parse_in_background(self, texts, on_parsed):
+        """Parse message texts on the markdown thread; on_parsed(spans per text) is called on the Tk thread
         
-        # Auto-scroll to bottom
-        self.messages_text.see(tk.END)
+        Not called if the view was cleared meanwhile. None texts get None spans,
+        and so do all texts if parsing fails (they are shown as plain text).
+        """
+        generation = self._view_generation
         
-        # Save message to chat manager
-        if hasattr(self, 'current_chat_id') and self.current_chat_id:
+        def deliver(parsed):
+            if generation == self._view_generation:
+                on_parsed(parsed)
+                
+        def failed(error):
+            self.logger.error(f"Error parsing markdown: {error}")
+            deliver([None] * len(texts))
+            
+        future = self._markdown_executor.submit(
+            lambda: [self.markdown_renderer.parse(text) if text else None for text in texts]
+        )
+        self.api_bridge.watch(future, deliver, failed)
+    
+    def _body_marks(self, key):
+        """Start and end marks of the body of a message waiting for its markdown"""
+        return f"body_{key}_start", f"body_{key}_end"
+    
+    def _mark_body(self, key, start, end=None):
+        """Mark the body of a shown message (empty at start by default) to be replaced by its rendered markdown
+        
+        The body must be followed by the message's two trailing newlines.
+        """
+        start_mark, end_mark = self._body_marks(key)
+        self.messages_text.mark_set(start_mark, start)
+        self.messages_text.mark_gravity(start_mark, tk.LEFT)
+        self.messages_text.mark_set(end_mark, end or start)
+        self._markdown_pending.add(key)
+    
+    def _render_markdown_later(self, key, text, sender_tag):
+        """Parse a message in the background and put it in place of its marked body"""
+        self._parse_in_background([text], lambda parsed: self._apply_markdown(key, text, parsed[0], sender_tag))
+    
+    def _apply_markdown(self, key, text, spans, sender_tag):
+        """Replace the marked body of a message with its parsed markdown (plain text if spans is None)"""
+        if key not in self._markdown_pending:
+            return  # Evicted or removed meanwhile
+        self._markdown_pending.discard(key)
+        start_mark, end_mark = self._body_marks(key)
+        try:
+            at_bottom = self.messages_text.yview()[1] >= 0.999
+            # Spans end with a newline of their own, so one of the trailing newlines goes too
+            self.messages_text.delete(start_mark, f"{end_mark}+1c")
+            if spans:
+                self.markdown_renderer.insert_spans(spans, end_mark, (sender_tag,))
+            else:
+                self.messages_text.insert(end_mark, f"{text}\n", sender_tag)
+            if at_bottom:
+                self.messages_text.see(tk.END)
+        except tk.TclError as e:
+            self.logger.error(f"Error rendering message: {e}")
+        finally:
+            self.messages_text.mark_unset(start_mark, end_mark)
+    
+    def _message_mark(self, key):
+        """Text mark at the start of a rendered message
+        
+        Marks keep the default right gravity: text inserted at the top of the
+        view pushes them along with their messages.
+        """
+        return f"msg_{key}"
+    
+    def _unset_message_marks(self, keys):
+        if keys:
+            self.messages_text.mark_unset(*(self._message_mark(key) for key in keys))
+            pending = self._markdown_pending.intersection(keys)
+            if pending:
+                self._markdown_pending.difference_update(pending)
+                self.messages_text.mark_unset(*(mark for key in pending for mark in self._body_marks(key)))
+    
+    def _evict_oldest(self):
+        """Remove messages over the window capacity from the top of the view"""
+        keys = self.message_window.evict_top()
+        if keys:
+            first = self.message_window.first_key
+            self.messages_text.delete("1.0", self._message_mark(first) if first is not None else "end-1c")
+            self._unset_message_marks(keys)
+    
+    def _evict_newest(self):
+        """Remove messages over the window capacity from the bottom of the view"""
+        keys = self.message_window.evict_bottom()
+        if keys:
+            self.messages_text.delete(self._message_mark(keys[0]), "end-1c")
+            self._unset_message_marks(keys)
+    
+    def _show_latest(self):
+        """Bring back the latest messages before a live one is added below them"""
+        if self.message_window.has_newer:
+            self.load_messages()
+    
+    def _clear_messages(self, total=0):
+        """Empty the view for a chat with `total` stored messages"""
+        self._detach_streams()
+        self.messages_text.delete("1.0", tk.END)
+        self._unset_message_marks(self.message_window.keys)
+        self.message_window.reset(total)
+        # Pages and messages still being parsed belong to the old view
+        self._view_generation += 1
+        self._history_loading = False
+        
+    def _save_message(self, message, sender, chat_id=None):
+        """Save message to chat manager (current chat by default)"""
+        from datetime import datetime
+        chat_id = chat_id or getattr(self, 'current_chat_id', None)
+        if chat_id:
             try:
                 message_data = {
                     "content": message,
                     "sender": sender,
                     "timestamp": datetime.now().isoformat()
                 }
-                self.chat_manager.add_message(self.current_chat_id, message_data)
-                self.logger.info(f"Message saved to chat {self.current_chat_id}")
+                self.chat_manager.add_message(chat_id, message_data)
+                self.logger.info(f"Message saved to chat {chat_id}")
             except Exception as e:
                 self.logger.error(f"Error saving message: {e}")
     
+    def start_streaming_message(self, sender="assistant"):
+        """Show a message whose text arrives in pieces; returns the appender to push them to"""
+        self._show_latest()
+        start = self.messages_text.index("end-1c")
+        sender_tag = self._insert_message_header(sender)
+        # Pinned until finished, so the window never evicts a message still being written
+        key = self.message_window.append(stored=False, pinned=True)
+        self.messages_text.mark_set(self._message_mark(key), start)
+        stream = TkStreamAppender(self.messages_text, sender_tag, self.stream_flush_ms)
+        stream.message_key = key
+        stream.header_index = self._message_mark(key)
+        stream.chat_id = self.current_chat_id
+        stream.begin()
+        self._active_streams.add(stream)
+        self._evict_oldest()
+        return stream
+    
+    def finish_streaming_message(self, stream, text=None, sender="assistant"):
+        """Complete a streamed message and save it to the chat it was started in"""
+        self._active_streams.discard(stream)
+        # The streamed plain text is replaced with the rendered final text once it is parsed
+        render = self._renders_markdown(sender) and stream.message_key in self.message_window
+        if render:
+            self._mark_body(stream.message_key, stream.start_mark, stream.end_mark)
+        text = stream.finish(text)
+        if text:
+            self._save_message(text, sender, stream.chat_id)
+            if stream.chat_id and stream.chat_id == self.current_chat_id:
+                self.message_window.stored(stream.message_key)
+            if render:
+                self._render_markdown_later(stream.message_key, text, stream.tag)
+        else:
+            stream.discard(stream.header_index)
+            if self.message_window.remove(stream.message_key):
+                self._unset_message_marks([stream.message_key])
+        return text
+    
+    def _detach_streams(self):
+        """Stop showing streamed messages when the display is cleared"""
+        for stream in self._active_streams:
+            stream.detach()
+    
+    def _request_chat(self, message, on_result, on_error):
+        """Send a chat message on the background loop; with streaming the answer shows up as it arrives
+        
+        on_result(response, stream) and on_error(error, stream) are called on the Tk thread;
+        stream is None when streaming is off.
+        """
+        if not self.stream_chat:
+            self.api_bridge.run(
+                self.async_api_client.send_message(message, self.last_response_id),
+                lambda response: on_result(response, None),
+                lambda error: on_error(error, None)
+            )
+            return
+            
+        stream = self.start_streaming_message("assistant")
+        stream.early_action = None
+        on_delta = self._early_action_handler(stream) if self._automation_enabled() else stream.push
+        self.api_bridge.run(
+            self.async_api_client.stream_message(message, self.last_response_id, on_delta=on_delta),
+            lambda response: on_result(response, stream),
+            lambda error: on_error(error, stream)
+        )
+    
+    def _end_failed_stream(self, stream, response=None):
+        """Keep the part of a failed streamed answer that arrived, drop an empty one"""
+        if stream:
+            partial = (response or {}).get("partial_message") or None
+            self.finish_streaming_message(stream, partial)
+    
     def send_message(self):
         """Send message to AI"""
         message = self.message_entry.get()
@@ -508,34 +816,48 @@ class ModernChatWidget(ctk.CTkFrame):
         # Clear input
         self.message_entry.delete(0, "end")
         
-        # Send to API in background
-        threading.Thread(target=self._send_to_api, args=(message,), daemon=True).start()
+        # Send to API on the background event loop
+        self._request_chat(message, self._on_chat_response, self._on_chat_error)
     
-    def _send_to_api(self, message):
-        """Send message to API (runs in background thread)"""
-        try:
-            # Send to API with previous response ID for conversation context
-            response = self.api_client.send_message(message, self.last_response_id)
-            
-            if response and response.get("success") and response.get("message"):
-                ai_response = response.get("message", "Нет ответа")
-                # Store the response ID for next message
-                self.last_response_id = response.get("response_id")
-                self.after(0, lambda: self.add_message(ai_response, "assistant"))
-                
-                # Check for automation actions in the response
-                self.after(0, lambda: self._check_and_execute_automation(ai_response))
+    def _on_chat_response(self, response, stream=None):
+        """Handle chat API response (called on the Tk thread)"""
+        if response and response.get("success") and response.get("message"):
+            ai_response = response.get("message", "Нет ответа")
+            # Store the response ID for next message
+            self.last_response_id = response.get("response_id")
+            if stream:
+                self.finish_streaming_message(stream, ai_response)
             else:
-                error_msg = response.get("error", "Неизвестная ошибка") if response else "Нет ответа от сервера"
-                self.after(0, lambda: self.add_message(f"❌ {error_msg}", "error"))
-                
-        except Exception as e:
-            self.logger.error(f"Error sending message: {e}")
-            self.after(0, lambda: self.add_message(f"❌ Ошибка отправки: {str(e)}", "error"))
+                self.add_message(ai_response, "assistant")
+            
+            # Check for automation actions in the response
+            self._check_and_execute_automation(ai_response, getattr(stream, "early_action", None))
+        else:
+            self._end_failed_stream(stream, response)
+            error_msg = response.get("error", "Неизвестная ошибка") if response else "Нет ответа от сервера"
+            self.add_message(f"❌ {error_msg}", "error")
+    
+    def _on_chat_error(self, error, stream=None):
+        """Handle chat request failure (called on the Tk thread)"""
+        self._end_failed_stream(stream)
+        self.logger.error(f"Error sending message: {error}")
+        self.add_message(f"❌ Ошибка отправки: {str(error)}", "error")
     
-    def _check_and_execute_automation(self, ai_response):
-        """Check if AI response contains automation action and execute it"""
+    def _check_and_execute_automation(self, ai_response, early_action=None):
+        """Check if AI response contains automation action and execute it
+        
+        early_action: (action, click future) if the button was already clicked while the answer streamed
+        """
         try:
+            if early_action:
+                action, click = early_action
+                self.api_bridge.watch(
+                    click,
+                    lambda success: self._report_action_result(action, success),
+                    lambda error: self._report_action_error(action, error)
+                )
+                return
+                
             self.logger.info(f"Checking automation for response: {ai_response[:100]}...")
             
             # Check if automation is enabled
@@ -559,87 +881,69 @@ class ModernChatWidget(ctk.CTkFrame):
                 
                 # Execute the action using new button system
                 success = self.automation_service.perform_button_action(action)
-                
-                if success:
-                    # Get button info for better user feedback
-                    button_info = self.coordinates_manager.get_button_info(action)
-                    button_name = button_info.get("name", action) if button_info else action
-                    self.add_message(f"✅ Нажата кнопка '{button_name}' ({action})", "assistant")
-                    self.logger.info(f"Automation button '{action}' executed successfully")
-                else:
-                    # Get available buttons for error message
-                    available_buttons = self.coordinates_manager.get_available_button_ids()
-                    self.add_message(f"❌ Кнопка '{action}' не найдена. Доступные кнопки: {', '.join(available_buttons)}", "error")
-                    self.logger.error(f"Failed to execute automation action: {action}")
+                self._report_action_result(action, success)
             else:
                 self.logger.info("No valid action found in response")
                     
         except Exception as e:
             self.logger.error(f"Error in automation check: {e}")
     
+    def _report_action_result(self, action, success):
+        """Show the result of a button click in the chat"""
+        if success:
+            # Get button info for better user feedback
+            button_info = self.coordinates_manager.get_button_info(action)
+            button_name = button_info.get("name", action) if button_info else action
+            self.add_message(f"✅ Нажата кнопка '{button_name}' ({action})", "assistant")
+            self.logger.info(f"Automation button '{action}' executed successfully")
+        else:
+            # Get available buttons for error message
+            available_buttons = self.coordinates_manager.get_available_button_ids()
+            self.add_message(f"❌ Кнопка '{action}' не найдена. Доступные кнопки: {', '.join(available_buttons)}", "error")
+            self.logger.error(f"Failed to execute automation action: {action}")
+    
+    def _report_action_error(self, action, error):
+        """Show a button click that raised in the chat"""
+        self.add_message(f"❌ Ошибка выполнения действия '{action}': {error}", "error")
+        self.logger.error(f"Error executing automation action {action}: {error}")
+    
     def _extract_action_from_response(self, response_text):
         """Extract button action from AI response text"""
         try:
-            import json
-            import re
-            
             self.logger.info(f"Extracting action from response: {response_text[:200]}...")
-            
-            # Try to find JSON in the response text
-            # Look for patterns like {"action": "button_name"}
-            json_pattern = r'\{[^}]*"action"[^}]*\}'
-            matches = re.findall(json_pattern, response_text)
-            
-            self.logger.info(f"Found {len(matches)} JSON matches: {matches}")
-            
-            if matches:
-                for match in matches:
-                    try:
-                        data = json.loads(match)
-                        action = data.get("action")
-                        self.logger.info(f"Parsed action from JSON: {action}")
-                        
-                        if action:
-                            # Check if this button exists in coordinates
-                            available_buttons = self.coordinates_manager.get_available_button_ids()
-                            
-                            # First try direct match
-                            if action in available_buttons:
-                                self.logger.info(f"Direct button match found: {action}")
-                                return action
-                            
-                            # Try legacy mapping for backward compatibility
-                            action_map = {
-                                "button_fold": "fold",
-                                "button_call": "call", 
-                                "button_raise": "raise",
-                                "button_check": "check",
-                                "fold": "fold",
-                                "call": "call",
-                                "raise": "raise",
-                                "check": "check"
-                            }
-                            mapped_action = action_map.get(action)
-                            
-                            if mapped_action and mapped_action in available_buttons:
-                                self.logger.info(f"Mapped action: {action} -> {mapped_action}")
-                                return mapped_action
-                            else:
-                                self.logger.warning(f"Action '{action}' not found in available buttons: {available_buttons}")
-                                
-                    except json.JSONDecodeError as e:
-                        self.logger.warning(f"JSON decode error for match '{match}': {e}")
-                        continue
-            
-            self.logger.info("No valid action found in response")
-            return None
+            action = extract_action(response_text, self.coordinates_manager.get_available_button_ids())
+            if not action:
+                self.logger.info("No valid action found in response")
+            return action
             
         except Exception as e:
             self.logger.error(f"Error extracting action from response: {e}")
             return None
     
-    def take_quick_screenshot(self):
-        """Take quick screenshot using saved settings"""
+    def _automation_enabled(self):
+        return self.screenshot_settings.get_settings().get("ai_automation_enabled", False)
+    
+    def _early_action_handler(self, stream):
+        """on_delta wrapper that clicks the button as soon as an action shows up in the streamed answer"""
+        detector = IncrementalActionDetector(self.coordinates_manager.get_available_button_ids())
+        
+        def on_delta(delta):
+            stream.push(delta)
+            action = detector.feed(delta)
+            if action:
+                # Runs on the event loop thread: the click goes to the automation worker
+                stream.early_action = (action, self._action_executor.submit(self.automation_service.perform_button_action, action))
+                self.logger.info(f"Action '{action}' detected in streamed response, clicking before the answer is complete")
+                self.after(0, lambda: self.add_message(f"🎯 Выполняю действие: {action}", "assistant"))
+                
+        return on_delta
+    
+    def take_quick_screenshot(self, skip_unchanged=False):
+        """Take quick screenshot using saved settings
+        
+        Args:
+            skip_unchanged: Do not analyze the screenshot if the screen has not changed (auto screenshots)
+        """
         try:
             settings = self.screenshot_settings.get_settings()
             screenshot_type = settings.get("screenshot_type", "fullscreen")
@@ -655,30 +959,25 @@ class ModernChatWidget(ctk.CTkFrame):
                 prompt = "Проанализируй этот скриншот максимально подробно на русском языке."
                 self.logger.info("Using default prompt for screenshot analysis")
             
-            # Hide main application window before taking screenshot
-            self.logger.info("Hiding main application window for clean screenshot...")
-            # Get the root window (main application window)
-            root_window = self.winfo_toplevel()
-            self.logger.info(f"Root window: {root_window}")
-            if hasattr(root_window, 'withdraw'):
-                root_window.withdraw()  # Hide the main window
-                self.logger.info("Main window hidden successfully")
-                
-                # Add delay to ensure window is fully hidden before screenshot
-                self.logger.info("Waiting for window to fully hide...")
-                import time
-                time.sleep(0.5)  # 500ms delay to ensure window is hidden
-                self.logger.info("Delay completed, proceeding with screenshot")
-            else:
-                self.logger.warning("Cannot hide main window - withdraw method not available")
+            # The main window is hidden only for captures that read the screen (see _capture_full_screen_frame)
+            self._apply_capture_settings(settings)
+            self._main_window_hidden = False
             
-            screenshot_path = None
+            screenshot = None
             
             # Take screenshot based on saved settings
             if screenshot_type == "fullscreen":
                 self.logger.info("Attempting full screen screenshot...")
-                screenshot_path = self.screenshot_service.capture_full_screen()
-                self.logger.info(f"Full screen screenshot result: {screenshot_path}")
+                screenshot = self._capture_full_screen_frame()
+                self.logger.info(f"Full screen screenshot result: {screenshot}")
+            elif screenshot_type == "regions":
+                self.logger.info("Attempting region screenshot...")
+                screenshot = self._capture_regions_frame(settings)
+                if screenshot:
+                    prompt = self._with_regions_hint(prompt, screenshot)
+                else:
+                    self.add_message("⚠️ Не удалось снять информационные области. Делаю скриншот полного экрана.", "assistant")
+                    screenshot = self._capture_full_screen_frame()
             elif (screenshot_type == "app" or screenshot_type == "application") and selected_app:
                 # Check if selected_app is a string (from settings) or dict (from running app)
                 if isinstance(selected_app, str):
@@ -686,150 +985,242 @@ class ModernChatWidget(ctk.CTkFrame):
                     self.logger.info(f"Selected app is string: {selected_app}")
                     # For now, fallback to fullscreen
                     self.add_message("⚠️ Настройки приложения требуют обновления. Делаю скриншот полного экрана.", "assistant")
-                    screenshot_path = self.screenshot_service.capture_full_screen()
+                    screenshot = self._capture_full_screen_frame()
                 elif isinstance(selected_app, dict):
                     # selected_app is a dict with app info
                     if self._is_app_still_running(selected_app):
-                        # Hide all other windows for clean screenshot (same as in settings dialog)
-                        self.logger.info(f"Hiding all windows except target app for clean screenshot...")
-                        hidden_windows = self.screenshot_service._hide_all_windows_except(selected_app.get("hwnd"))
-                        
-                        try:
-                            screenshot_path = self.screenshot_service.capture_application(
-                                selected_app["pid"], 
-                                selected_app.get("hwnd")
-                            )
-                        finally:
-                            # Always restore hidden windows
-                            if hidden_windows:
-                                self.screenshot_service._restore_windows(hidden_windows)
+                        # Window content is rendered off-screen; the service hides covering
+                        # windows itself only if it has to fall back to a screen-area grab
+                        screenshot = self.screenshot_service.capture_application_frame(
+                            selected_app["pid"], 
+                            selected_app.get("hwnd")
+                        )
                     else:
                         self.add_message(f"⚠️ Приложение '{selected_app.get('name', 'Unknown')}' не запущено. Делаю скриншот полного экрана.", "assistant")
-                        screenshot_path = self.screenshot_service.capture_full_screen()
+                        screenshot = self._capture_full_screen_frame()
                 else:
                     self.add_message("⚠️ Неизвестный формат настроек приложения. Делаю скриншот полного экрана.", "assistant")
-                    screenshot_path = self.screenshot_service.capture_full_screen()
+                    screenshot = self._capture_full_screen_frame()
             else:
                 self.add_message("⚠️ Настройки приложения неполные. Делаю скриншот полного экрана.", "assistant")
-                screenshot_path = self.screenshot_service.capture_full_screen()
+                screenshot = self._capture_full_screen_frame()
             
-            if screenshot_path:
-                self.add_message(f"📷 Скриншот сделан, анализирую...", "assistant")
-                self.analyze_screenshot(screenshot_path, prompt)
+            if screenshot and not self._frame_needs_analysis(screenshot, settings, skip_unchanged):
+                self.logger.info("Screen has not changed, skipping analysis")
+                self.schedule_next_screenshot()
+                return
+                
+            if screenshot:
+                self._persist_screenshot_if_enabled(screenshot)
+                self.set_status("📷 Скриншот сделан, анализирую...")
+                self.analyze_screenshot(screenshot, prompt)
             else:
                 self.logger.warning("Screenshot failed, attempting retry...")
-                # Try one more time with a small delay
-                import time
-                time.sleep(0.1)  # Small delay
-                retry_screenshot_path = self.screenshot_service.capture_full_screen()
-                self.logger.info(f"Retry screenshot result: {retry_screenshot_path}")
+                # Try one more time
+                retry_screenshot = self._capture_full_screen_frame()
+                self.logger.info(f"Retry screenshot result: {retry_screenshot}")
                 
-                if retry_screenshot_path:
-                    self.add_message(f"📷 Скриншот сделан (повторная попытка), анализирую...", "assistant")
-                    self.analyze_screenshot(retry_screenshot_path, prompt)
+                if retry_screenshot and not self._frame_needs_analysis(retry_screenshot, settings, skip_unchanged):
+                    self.logger.info("Screen has not changed, skipping analysis")
+                    self.schedule_next_screenshot()
+                elif retry_screenshot:
+                    self._persist_screenshot_if_enabled(retry_screenshot)
+                    self.set_status("📷 Скриншот сделан (повторная попытка), анализирую...")
+                    self.analyze_screenshot(retry_screenshot, prompt)
                 else:
+                    self.clear_status()
                     self.add_message("❌ Не удалось сделать скриншот. Проверьте настройки.", "error")
                 
         except Exception as e:
             self.logger.error(f"Quick screenshot error: {e}")
+            self.clear_status()
             self.add_message(f"❌ Ошибка быстрого скриншота: {str(e)}", "error")
         finally:
-            # Always restore main application window
-            try:
-                root_window = self.winfo_toplevel()
-                if hasattr(root_window, 'deiconify'):
-                    root_window.deiconify()  # Show the main window again
-                    self.logger.info("Main application window restored")
-                else:
-                    self.logger.warning("Cannot restore main window - deiconify method not available")
-            except Exception as e:
-                self.logger.error(f"Error restoring main window: {e}")
+            # Restore main application window if it was hidden
+            if self._main_window_hidden:
+                try:
+                    root_window = self.winfo_toplevel()
+                    if hasattr(root_window, 'deiconify'):
+                        root_window.deiconify()  # Show the main window again
+                        self.logger.info("Main application window restored")
+                    else:
+                        self.logger.warning("Cannot restore main window - deiconify method not available")
+                except Exception as e:
+                    self.logger.error(f"Error restoring main window: {e}")
+                self._main_window_hidden = False
     
-    def analyze_screenshot(self, screenshot_path, prompt):
-        """Analyze screenshot with AI"""
-        # Show loading message
-        self.add_message("🔄 Анализирую скриншот... Это может занять несколько секунд.", "assistant")
-        
-        # Start analysis in separate thread
-        threading.Thread(target=self._analyze_screenshot_async, args=(screenshot_path, prompt), daemon=True).start()
+    def _apply_capture_settings(self, settings):
+        """Pass window hiding mode from screenshot settings to the screenshot service"""
+        self.screenshot_service.hiding_policy.mode = settings.get("window_hiding", "auto")
+    
+    def _hide_main_window_for(self, screenshot_type):
+        """Hide the main window when the hiding policy requires it for this kind of screenshot"""
+        policy = self.screenshot_service.hiding_policy
+        if self._main_window_hidden or not policy.requires_main_window_withdraw(screenshot_type):
+            return
+        root_window = self.winfo_toplevel()
+        if hasattr(root_window, 'withdraw'):
+            root_window.withdraw()  # Hide the main window
+            # Process the unmap now and give the compositor a frame to drop the window
+            root_window.update_idletasks()
+            time.sleep(policy.settle_delay)
+            self._main_window_hidden = True
+            self.logger.info(f"Main window hidden for {screenshot_type} screenshot")
+        else:
+            self.logger.warning("Cannot hide main window - withdraw method not available")
+    
+    def _capture_full_screen_frame(self):
+        """Full screen capture with the main window hidden when the hiding policy requires it"""
+        self._hide_main_window_for("fullscreen")
+        return self.screenshot_service.capture_full_screen_frame()
+    
+    def _capture_regions_frame(self, settings):
+        """Capture only the info elements from the coordinates settings as one frame"""
+        regions = self.coordinates_manager.get_info_element_regions(settings.get("region_elements"))
+        if not regions:
+            return None
+        self._hide_main_window_for("regions")
+        mode = "union" if settings.get("region_mode") == "union" else "composite"
+        return self.screenshot_service.capture_regions(regions, mode)
+    
+    def _with_regions_hint(self, prompt, frame):
+        """Tell the model which info elements the stacked image consists of"""
+        region_ids = frame.metadata.get("regions")
+        if not region_ids:
+            return prompt
+        elements = self.coordinates_manager.get_all_info_elements()
+        names = [elements.get(region_id, {}).get("name", region_id) for region_id in region_ids]
+        return f"{prompt}\n\nИзображение составлено из областей экрана сверху вниз: {', '.join(names)}."
     
-    def _analyze_screenshot_async(self, screenshot_path, prompt):
-        """Analyze screenshot asynchronously"""
+    def _frame_needs_analysis(self, frame, settings, skip_unchanged):
+        """Change gate: an unchanged auto screenshot is neither uploaded nor sent to chat"""
+        key = f"{settings.get('screenshot_type')}:{frame.metadata.get('pid') or frame.metadata.get('method')}"
+        regions = self._change_detection_regions(frame, settings)
+        if not skip_unchanged or not settings.get("skip_unchanged_frames", True):
+            self.change_detector.remember(frame, key, regions)
+            return True
+        self.change_detector.min_changed_fraction = settings.get("change_threshold", 0.01)
+        return self.change_detector.has_changed(frame, key, regions)
+    
+    def _change_detection_regions(self, frame, settings):
+        """Info element rectangles in frame coordinates, if change detection is limited to them"""
+        rect = frame.metadata.get("rect")
+        if not settings.get("change_detection_regions", False) or not rect or frame.metadata.get("regions"):
+            return None
+        left, top = rect[0], rect[1]
+        regions = self.coordinates_manager.get_info_element_regions(settings.get("region_elements"))
+        return [(x - left, y - top, w, h) for x, y, w, h in regions.values()] or None
+    
+    def _persist_screenshot_if_enabled(self, frame):
+        """Save captured frame to disk only when enabled in screenshot settings"""
         try:
-            # Set analysis in progress flag
-            self.analysis_in_progress = True
+            if self.screenshot_settings.get_settings().get("save_screenshots", False):
+                self.screenshot_service.save_frame(frame, "screenshot")
+        except Exception as e:
+            self.logger.error(f"Error saving screenshot: {e}")
+    
+    def analyze_screenshot(self, screenshot, prompt):
+        """Analyze screenshot (in-memory frame or file path) with AI"""
+        # Show progress
+        self.set_status("🔄 Отправляю скриншот на анализ... Это может занять несколько секунд.")
+        
+        # Set analysis in progress flag
+        self.analysis_in_progress = True
+        
+        # Encode and upload on the background event loop
+        self.api_bridge.run(
+            self.async_api_client.analyze_image(screenshot, prompt),
+            self._on_screenshot_analysis,
+            self._on_screenshot_analysis_error
+        )
+    
+    def _on_screenshot_analysis(self, response):
+        """Handle screenshot analysis response (called on the Tk thread)"""
+        # Reset analysis in progress flag
+        self.analysis_in_progress = False
+        self.clear_status()
+        
+        if response and (response.get("success") or response.get("analysis")):
+            # Try to get analysis from either 'analysis' or 'message' field
+            analysis = response.get("analysis") or response.get("message", "No analysis received")
             
-            # Update loading message
-            self.after(0, lambda: self.add_message("🔄 Отправляю изображение на сервер...", "assistant"))
+            # Add analysis to chat as AI message (for display)
+            self.add_message(f"📷 Анализ скриншота:\n\n{analysis}", "assistant")
             
-            # Send screenshot for analysis
-            response = self.api_client.analyze_image(screenshot_path, prompt)
+            # Check for automation actions in the analysis
+            self._check_and_execute_automation(analysis)
             
-            if response and (response.get("success") or response.get("analysis")):
-                # Try to get analysis from either 'analysis' or 'message' field
-                analysis = response.get("analysis") or response.get("message", "No analysis received")
-                
-                # Add analysis to chat as AI message (for display)
-                self.after(0, lambda: self.add_message(f"📷 Анализ скриншота:\n\n{analysis}", "assistant"))
-                
-                # Check for automation actions in the analysis
-                self.after(0, lambda: self._check_and_execute_automation(analysis))
-                
-                # Now automatically send the analysis as a user message to OpenAI chat
-                # This creates a proper conversation flow where the user can continue discussing the analysis
-                self.logger.info("Sending screenshot analysis to OpenAI chat for context...")
-                
-                # Send analysis to OpenAI chat in a separate thread
-                threading.Thread(target=self._send_analysis_to_chat, args=(analysis,), daemon=True).start()
-                
-                # Analysis is complete, user can now continue the conversation
-                self.logger.info("Screenshot analysis completed")
-                
-            else:
-                error_msg = response.get("error") or response.get("message", "Неизвестная ошибка") if response else "Нет ответа от сервера"
-                self.after(0, lambda: self.add_message(f"❌ Ошибка анализа: {error_msg}", "error"))
-                
-        except Exception as e:
-            self.logger.error(f"Image analysis error: {e}")
-            self.after(0, lambda: self.add_message(f"❌ Ошибка анализа изображения: {str(e)}", "error"))
-        finally:
-            # Reset analysis in progress flag
-            self.analysis_in_progress = False
+            # Now automatically send the analysis as a user message to OpenAI chat
+            # This creates a proper conversation flow where the user can continue discussing the analysis
+            self.logger.info("Sending screenshot analysis to OpenAI chat for context...")
+            self._send_analysis_to_chat(analysis)
+            
+            # Analysis is complete, user can now continue the conversation
+            self.logger.info("Screenshot analysis completed")
+            
+        else:
+            error_msg = response.get("error") or response.get("message", "Неизвестная ошибка") if response else "Нет ответа от сервера"
+            self.add_message(f"❌ Ошибка анализа: {error_msg}", "error")
+            # Frame was not analyzed - do not let the change gate skip the same screen again
+            self.change_detector.reset()
+    
+    def _on_screenshot_analysis_error(self, error):
+        """Handle screenshot analysis failure (called on the Tk thread)"""
+        self.analysis_in_progress = False
+        self.clear_status()
+        self.logger.error(f"Image analysis error: {error}")
+        self.add_message(f"❌ Ошибка анализа изображения: {str(error)}", "error")
+        self.change_detector.reset()
     
     def _send_analysis_to_chat(self, analysis):
         """Send screenshot analysis to OpenAI chat for context with smart scheduling"""
-        try:
-            # Send the analysis as a user message to maintain conversation context
-            self.logger.info("Sending analysis to OpenAI chat for context...")
+        # Send the analysis as a user message to maintain conversation context
+        self.logger.info("Sending analysis to OpenAI chat for context...")
+        self.set_status("💬 Отправляю анализ в чат...")
+        self._request_chat(analysis, self._on_analysis_chat_response, self._on_analysis_chat_error)
+    
+    def _on_analysis_chat_response(self, response, stream=None):
+        """Handle chat response to a sent analysis (called on the Tk thread)"""
+        self.clear_status()
+        if response and (response.get("response") or response.get("message")):
+            # Try both possible response fields
+            ai_response = response.get("response") or response.get("message", "No response received")
+            # Store the response ID for next message
+            self.last_response_id = response.get("response_id")
+            if stream:
+                self.finish_streaming_message(stream, ai_response)
+            else:
+                self.add_message(ai_response, "assistant")
+            self.logger.info("Analysis successfully sent to OpenAI chat")
             
-            # Send analysis to OpenAI chat with conversation context
-            response = self.api_client.send_message(analysis, self.last_response_id)
+            # Smart scheduling: may click a button with pyautogui, keep it off the Tk thread
+            threading.Thread(
+                target=self._handle_ai_response_with_smart_scheduling,
+                args=(ai_response, getattr(stream, "early_action", None)),
+                daemon=True
+            ).start()
             
-            if response and (response.get("response") or response.get("message")):
-                # Try both possible response fields
-                ai_response = response.get("response") or response.get("message", "No response received")
-                # Store the response ID for next message
-                self.last_response_id = response.get("response_id")
-                self.after(0, lambda: self.add_message(ai_response, "assistant"))
-                self.logger.info("Analysis successfully sent to OpenAI chat")
-                
-                # Smart scheduling: check if there's an action to execute
-                self._handle_ai_response_with_smart_scheduling(ai_response)
-                
-            else:
-                error_msg = response.get("error", "Неизвестная ошибка") if response else "Нет ответа от сервера"
-                self.after(0, lambda: self.add_message(f"❌ Ошибка отправки анализа в чат: {error_msg}", "error"))
-                # Take next screenshot even on error with delay
-                self.after(100, self.take_auto_screenshot)  # 100ms delay
-                
-        except Exception as e:
-            self.logger.error(f"Error sending analysis to chat: {e}")
-            self.after(0, lambda: self.add_message(f"❌ Ошибка отправки анализа в чат: {str(e)}", "error"))
+        else:
+            self._end_failed_stream(stream, response)
+            error_msg = response.get("error", "Неизвестная ошибка") if response else "Нет ответа от сервера"
+            self.add_message(f"❌ Ошибка отправки анализа в чат: {error_msg}", "error")
             # Take next screenshot even on error with delay
             self.after(100, self.take_auto_screenshot)  # 100ms delay
     
-    def _handle_ai_response_with_smart_scheduling(self, ai_response):
-        """Handle AI response with smart scheduling based on whether action is needed"""
+    def _on_analysis_chat_error(self, error, stream=None):
+        """Handle failure of sending an analysis to chat (called on the Tk thread)"""
+        self.clear_status()
+        self._end_failed_stream(stream)
+        self.logger.error(f"Error sending analysis to chat: {error}")
+        self.add_message(f"❌ Ошибка отправки анализа в чат: {str(error)}", "error")
+        # Take next screenshot even on error with delay
+        self.after(100, self.take_auto_screenshot)  # 100ms delay
+    
+    def _handle_ai_response_with_smart_scheduling(self, ai_response, early_action=None):
+        """Handle AI response with smart scheduling based on whether action is needed
+        
+        early_action: (action, click future) if the button was already clicked while the answer streamed
+        """
         try:
             # Check if automation is enabled
             settings = self.screenshot_settings.get_settings()
@@ -842,16 +1233,24 @@ class ModernChatWidget(ctk.CTkFrame):
                 return
             
             # Check if AI response contains an action
-            action = self._extract_action_from_response(ai_response)
+            if early_action:
+                action, click = early_action
+            else:
+                action, click = self._extract_action_from_response(ai_response), None
             
             if action:
-                self.logger.info(f"AI response contains action: {action}, executing with smart scheduling")
-                
-                # Show action execution message
-                self.after(0, lambda: self.add_message(f"🎯 Выполняю действие: {action}", "assistant"))
-                
-                # Execute the action
-                success = self.automation_service.perform_button_action(action)
+                if click:
+                    # Clicked while the answer was streaming - only wait for the click to finish
+                    self.logger.info(f"Action '{action}' was executed early from the streamed response")
+                    success = click.result()
+                else:
+                    self.logger.info(f"AI response contains action: {action}, executing with smart scheduling")
+                    
+                    # Show action execution message
+                    self.after(0, lambda: self.add_message(f"🎯 Выполняю действие: {action}", "assistant"))
+                    
+                    # Execute the action
+                    success = self.automation_service.perform_button_action(action)
                 
                 if success:
                     # Get button info for better user feedback
@@ -942,68 +1341,49 @@ class ModernChatWidget(ctk.CTkFrame):
             prompt = self.screenshot_settings.settings.get("prompt", "Проанализируй это изображение")
             
             # Show progress
-            self.add_message("🔄 Анализирую изображение...", "assistant")
+            self.set_status("🔄 Анализирую изображение...")
             
-            # Analyze image in background thread
-            threading.Thread(
-                target=self._analyze_uploaded_image_async, 
-                args=(image_path, prompt), 
-                daemon=True
-            ).start()
+            # Analyze image on the background event loop
+            self.api_bridge.run(
+                self.async_api_client.analyze_image(image_path, prompt),
+                self._on_uploaded_image_analysis,
+                self._on_uploaded_image_analysis_error
+            )
             
         except Exception as e:
             self.logger.error(f"Error analyzing uploaded image: {e}")
             self.add_message(f"❌ Ошибка анализа изображения: {str(e)}", "error")
     
-    def _analyze_uploaded_image_async(self, image_path, prompt):
-        """Analyze uploaded image asynchronously"""
-        try:
-            # Analyze image using API
-            response = self.api_client.analyze_image(image_path, prompt)
+    def _on_uploaded_image_analysis(self, response):
+        """Handle uploaded image analysis response (called on the Tk thread)"""
+        self.clear_status()
+        if response and response.get("analysis"):
+            analysis = response.get("analysis", "Анализ не получен")
+        elif response and not response.get("error") and response.get("message"):
+            # Sometimes the API returns the analysis in "message" field instead of "analysis"
+            analysis = response.get("message", "Анализ не получен")
+        else:
+            error_msg = response.get("error", "Неизвестная ошибка") if response else "Нет ответа от сервера"
+            self.add_message(f"❌ Ошибка анализа: {error_msg}", "error")
+            return
             
-            if response and response.get("analysis"):
-                analysis = response.get("analysis", "Анализ не получен")
-                
-                # Add analysis to chat as AI message (for display)
-                self.after(0, lambda: self.add_message(f"📷 Анализ изображения:\n\n{analysis}", "assistant"))
-                
-                # Check for automation actions in the analysis
-                self.after(0, lambda: self._check_and_execute_automation(analysis))
-                
-                # Now automatically send the analysis as a user message to OpenAI chat
-                # This creates a proper conversation flow where the user can continue discussing the analysis
-                self.logger.info("Sending image analysis to OpenAI chat for context...")
-                
-                # Send analysis to OpenAI chat in a separate thread
-                threading.Thread(target=self._send_analysis_to_chat, args=(analysis,), daemon=True).start()
-                
-                # Analysis is complete, user can now continue the conversation
-                self.logger.info("Image analysis completed")
-                
-            else:
-                # Check if this is an error response from the API
-                if response and response.get("error"):
-                    error_msg = response.get("error", "Неизвестная ошибка")
-                    self.after(0, lambda: self.add_message(f"❌ Ошибка анализа: {error_msg}", "error"))
-                elif response and response.get("message"):
-                    # Sometimes the API returns the analysis in "message" field instead of "analysis"
-                    analysis = response.get("message", "Анализ не получен")
-                    self.after(0, lambda: self.add_message(f"📷 Анализ изображения:\n\n{analysis}", "assistant"))
-                    
-                    # Check for automation actions in the analysis
-                    self.after(0, lambda: self._check_and_execute_automation(analysis))
-                    
-                    # Send analysis to OpenAI chat
-                    self.logger.info("Sending image analysis to OpenAI chat for context...")
-                    threading.Thread(target=self._send_analysis_to_chat, args=(analysis,), daemon=True).start()
-                    self.logger.info("Image analysis completed")
-                else:
-                    error_msg = "Нет ответа от сервера"
-                    self.after(0, lambda: self.add_message(f"❌ Ошибка анализа: {error_msg}", "error"))
-                
-        except Exception as e:
-            self.logger.error(f"Image analysis error: {e}")
-            self.after(0, lambda: self.add_message(f"❌ Ошибка анализа изображения: {str(e)}", "error"))
+        # Add analysis to chat as AI message (for display)
+        self.add_message(f"📷 Анализ изображения:\n\n{analysis}", "assistant")
+        
+        # Check for automation actions in the analysis
+        self._check_and_execute_automation(analysis)
+        
+        # Now automatically send the analysis as a user message to OpenAI chat
+        # This creates a proper conversation flow where the user can continue discussing the analysis
+        self.logger.info("Sending image analysis to OpenAI chat for context...")
+        self._send_analysis_to_chat(analysis)
+        self.logger.info("Image analysis completed")
+    
+    def _on_uploaded_image_analysis_error(self, error):
+        """Handle uploaded image analysis failure (called on the Tk thread)"""
+        self.clear_status()
+        self.logger.error(f"Image analysis error: {error}")
+        self.add_message(f"❌ Ошибка анализа изображения: {str(error)}", "error")
     
     def create_new_chat(self):
         """Create a new chat"""
@@ -1012,12 +1392,13 @@ class ModernChatWidget(ctk.CTkFrame):
             chat_id = str(uuid.uuid4())
             self.chat_manager.create_chat(chat_id, "Новый чат")
             self.current_chat_id = chat_id
-            self.messages_text.delete("1.0", tk.END)
+            self._clear_messages()
             
             # Add welcome message without saving to chat manager (it's a system message)
             from datetime import datetime
             timestamp = datetime.now().strftime("%H:%M")
             self.messages_text.insert(tk.END, f"[{timestamp}] 🤖 ИИ: 👋 Новый чат создан! Чем могу помочь?\n\n")
+            self.messages_text.mark_set(self._message_mark(self.message_window.append(stored=False)), "1.0")
             self.messages_text.see(tk.END)
             
             self.logger.info(f"Created new chat: {chat_id}")
@@ -1043,11 +1424,10 @@ class ModernChatWidget(ctk.CTkFrame):
     def load_initial_chat(self):
         """Load initial chat"""
         try:
-            chats = self.chat_manager.get_all_chats()
+            chats = self.chat_manager.get_chat_list()
             if chats:
-                # Get first chat ID
-                first_chat_id = list(chats.keys())[0]
-                self.current_chat_id = first_chat_id
+                # Open the most recently updated chat
+                self.current_chat_id = chats[0]["id"]
                 self.load_messages()
             else:
                 self.create_new_chat()
@@ -1061,19 +1441,119 @@ class ModernChatWidget(ctk.CTkFrame):
             return
         
         try:
-            messages = self.chat_manager.get_messages(self.current_chat_id)
-            self.messages_text.delete("1.0", tk.END)
+            total = self.chat_manager.get_message_count(self.current_chat_id)
+            messages = self.chat_manager.get_messages(self.current_chat_id, before=total, limit=self.message_page_size)
+            self._clear_messages(total)
+            if messages:
+                # Inserted at the top once parsed, so live messages added meanwhile stay below the page
+                self._history_loading = True
+                self._parse_in_background(
+                    self._markdown_texts(messages),
+                    lambda parsed: self._insert_older_page(total, messages, parsed, keep_view=False)
+                )
             
-            for message in messages:
-                sender = message.get("sender", "assistant")
-                content = message.get("content", "")
-                self.add_message(content, sender)
-            
-            self.logger.info(f"Loaded {len(messages)} messages for chat {self.current_chat_id}")
+            self.logger.info(f"Loaded {len(messages)} of {total} messages for chat {self.current_chat_id}")
             
         except Exception as e:
             self.logger.error(f"Error loading messages: {e}")
     
+    def _on_messages_scroll(self, first, last):
+        """yscrollcommand of the messages view: moves the scrollbar and loads messages past either end"""
+        self.messages_text.vbar.set(first, last)
+        if self._history_loading:
+            return
+        if float(first) <= 0.0 and self.message_window.has_older:
+            self._history_loading = True
+            self.after_idle(self._load_older_messages)
+        elif float(last) >= 1.0 and self.message_window.has_newer:
+            self._history_loading = True
+            self.after_idle(self._load_newer_messages)
+    
+    def _load_older_messages(self):
+        """Fetch the page of messages before the oldest shown one; it is inserted once parsed"""
+        try:
+            page = self.message_window.older_page()
+            messages = []
+            if self.current_chat_id and page is not None:
+                messages = self.chat_manager.get_messages(self.current_chat_id, before=page[0], limit=page[1])
+            if messages:
+                self._parse_in_background(
+                    self._markdown_texts(messages),
+                    lambda parsed: self._insert_older_page(page[0], messages, parsed)
+                )
+                return
+        except Exception as e:
+            self.logger.error(f"Error loading older messages: {e}")
+        self._history_loading = False
+    
+    def _insert_older_page(self, before, messages, parsed, keep_view=True):
+        """Insert a parsed page of the messages before position `before` at the top of the view
+        
+        keep_view: Keep the view on the line it shows (otherwise it scrolls to the latest message)
+        """
+        try:
+            if self.message_window.start != before:
+                return  # The window moved meanwhile; scrolling loads the right page
+                
+            # Both marks move past every insert at the top: messages stay in chronological order
+            # and the view keeps the line it shows
+            self.messages_text.mark_set("view_top", "@0,0")
+            self.messages_text.mark_set("history_insert", "1.0")
+            for key, message, spans in zip(self.message_window.prepend(len(messages)), messages, parsed):
+                self._render_message(message, key, "history_insert", spans)
+            self.messages_text.mark_unset("history_insert")
+            self._evict_newest()
+            
+            if keep_view:
+                self.messages_text.yview("view_top")
+            else:
+                self.messages_text.see(tk.END)
+            self.messages_text.mark_unset("view_top")
+            self.logger.debug(f"Loaded {len(messages)} older messages for chat {self.current_chat_id}")
+            
+        except Exception as e:
+            self.logger.error(f"Error loading older messages: {e}")
+        finally:
+            self._history_loading = False
+    
+    def _load_newer_messages(self):
+        """Fetch the page of messages evicted after the newest shown one; it is appended once parsed"""
+        try:
+            page = self.message_window.newer_page()
+            messages = []
+            if self.current_chat_id and page is not None:
+                messages = self.chat_manager.get_messages(self.current_chat_id, before=page[0], limit=page[1])
+            if messages:
+                end = self.message_window.end
+                self._parse_in_background(
+                    self._markdown_texts(messages),
+                    lambda parsed: self._append_newer_page(end, messages, parsed)
+                )
+                return
+        except Exception as e:
+            self.logger.error(f"Error loading newer messages: {e}")
+        self._history_loading = False
+    
+    def _append_newer_page(self, end, messages, parsed):
+        """Append a parsed page of the messages from position `end` on, keeping the view in place"""
+        try:
+            if self.message_window.end != end:
+                return  # The window moved meanwhile; scrolling loads the right page
+                
+            self.messages_text.mark_set("view_top", "@0,0")
+            for key, message, spans in zip(self.message_window.extend(len(messages)), messages, parsed):
+                self._render_message(message, key, tk.END, spans)
+            self._evict_oldest()
+            
+            self.messages_text.yview("view_top")
+            self.messages_text.mark_unset("view_top")
+            self.logger.debug(f"Loaded {len(messages)} newer messages for chat {self.current_chat_id}")
+            
+        except Exception as e:
+            self.logger.error(f"Error loading newer messages: {e}")
+        finally:
+            self._history_loading = False
+    
     def set_current_chat(self, chat_id):
         """Set current chat and load its messages"""
         try:
@@ -1099,13 +1579,18 @@ class ModernChatWidget(ctk.CTkFrame):
         """Toggle auto screenshot mode"""
         self.auto_screenshots_enabled = not self.auto_screenshots_enabled
         
+        # Shown first, so the progress of the first auto screenshot replaces it
+        self.set_status(
+            f"🔄 Автоматические скриншоты: {'ВКЛ' if self.auto_screenshots_enabled else 'ВЫКЛ'}",
+            clear_after_ms=self.status_notice_ms
+        )
+        
         if self.auto_screenshots_enabled:
             self.start_auto_screenshots()
         else:
             self.stop_auto_screenshots()
         
         self.update_window_title()
-        self.add_message(f"🔄 Автоматические скриншоты: {'ВКЛ' if self.auto_screenshots_enabled else 'ВЫКЛ'}", "assistant")
     
     def start_auto_screenshots(self):
         """Start automatic screenshots in chain mode"""
@@ -1149,7 +1634,7 @@ class ModernChatWidget(ctk.CTkFrame):
         try:
             self.logger.info("Taking auto screenshot in chain mode")
             # Call take_quick_screenshot in a way that won't cause recursion issues
-            self.take_quick_screenshot()
+            self.take_quick_screenshot(skip_unchanged=True)
             # Note: Next screenshot will be triggered by _send_analysis_to_chat after analysis
         except Exception as e:
             self.logger.error(f"Auto screenshot error: {e}")
@@ -13,9 +13,12 @@ from .login_dialog_modern import ModernLoginDialog
 from .chat_widget_modern import ModernChatWidget
 from .themes import ThemeManager
 from services.api_client import APIClient
+from services.async_api_client import AsyncAPIClient
 from services.screenshot import ScreenshotService
 from services.chat_manager import ChatManager
+from services.chat_archive import RetentionPolicy
 from services.coordinates_manager import CoordinatesManager
+from utils.write_behind import get_writer
 
 class ModernMainWindow(ctk.CTk):
     """Modern main application window using CustomTkinter"""
@@ -28,8 +31,16 @@ class ModernMainWindow(ctk.CTk):
         
         # Initialize services
         self.api_client = APIClient(config)
+        self.async_api_client = AsyncAPIClient(config, auth_client=self.api_client)
         self.screenshot_service = ScreenshotService()
-        self.chat_manager = ChatManager()
+        self.chat_manager = ChatManager(
+            backend=config.get("storage", "backend", "journal"),
+            retention=RetentionPolicy(
+                max_messages=config.getint("storage", "retention_max_messages", 2000),
+                max_age_hours=config.getfloat("storage", "retention_max_age_hours", 0),
+                max_bytes=config.getint("storage", "retention_max_bytes", 0)
+            )
+        )
         self.theme_manager = ThemeManager()
         self.coordinates_manager = CoordinatesManager()
         
@@ -240,7 +251,8 @@ class ModernMainWindow(ctk.CTk):
             self.api_client,
             self.screenshot_service,
             self.chat_manager,
-            self.theme_manager
+            self.theme_manager,
+            self.async_api_client
         )
         self.chat_widget.grid(row=0, column=0, sticky="nsew")
     
@@ -312,11 +324,12 @@ class ModernMainWindow(ctk.CTk):
                 button.destroy()
             self.chat_buttons.clear()
             
-            # Get all chats
-            chats = self.chat_manager.get_all_chats()
+            # Chat summaries only - messages are not needed for the sidebar
+            chats = self.chat_manager.get_chat_list()
             
             if chats:
-                for chat_id, chat_data in chats.items():
+                for chat_data in chats:
+                    chat_id = chat_data["id"]
                     chat_name = chat_data.get("name", f"Чат {chat_id[:8]}")
                     self.create_chat_button(chat_id, chat_name)
                 
@@ -535,4 +548,11 @@ class ModernMainWindow(ctk.CTk):
     def run(self):
         """Start the application"""
         self.logger.info("Starting main application loop")
-        self.mainloop()
+        try:
+            self.mainloop()
+        finally:
+            self.screenshot_service.close()
+            self.async_api_client.close()
+            self.chat_manager.close()
+            # Settings are written in the background - make sure nothing is lost on exit
+            get_writer().close()
@@ -0,0 +1,160 @@
+"""
+Message Window - Which messages of a chat are rendered in the chat view, kept to a bounded number
+"""
+
+from collections import deque
+from typing import List, Optional, Tuple
+
+class MessageWindow:
+    """Bounded, contiguous window of rendered messages over a chat's history
+    
+    The view holds the stored messages [start, end) of the chat plus unsaved
+    entries (welcome and status lines) among them. Every rendered entry gets a
+    key the view finds it by (a Text mark). Adding entries beyond the capacity
+    evicts from the other side: live and newer messages push the oldest out at
+    the top, older pages loaded on scrolling up push the newest out at the
+    bottom. Evicted stored messages come back through older_page() and
+    newer_page(); unsaved entries are gone for good. Pinned entries (streams
+    still receiving text) are never evicted, and nothing is evicted at the
+    bottom while one is shown, so live messages always go below the latest
+    stored one.
+    
+    Holds no Tk state, so the window and eviction logic can be checked headlessly.
+    """
+    
+    def __init__(self, capacity: int = 200, page_size: int = 50):
+        """
+        Args:
+            capacity: Most entries kept rendered
+            page_size: Messages loaded at a time on scrolling
+        """
+        self.page_size = page_size
+        # Room for two pages, so loading one never evicts what is on screen
+        self.capacity = max(capacity, 2 * page_size)
+        self._entries = deque()  # [key, stored, pinned], top to bottom
+        self._next_key = 0
+        self.reset(0)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: int) -> bool:
+        """Whether the entry with this key is rendered"""
+        return any(entry[0] == key for entry in self._entries)
+    
+    def reset(self, total: int):
+        """Forget all entries; the chat has `total` stored messages and the window sits after the last one"""
+        self._entries.clear()
+        self.total = total
+        self.start = total
+        self.end = total
+    
+    @property
+    def keys(self) -> List[int]:
+        """Keys of the rendered entries, top to bottom"""
+        return [entry[0] for entry in self._entries]
+    
+    @property
+    def first_key(self) -> Optional[int]:
+        return self._entries[0][0] if self._entries else None
+    
+    @property
+    def has_older(self) -> bool:
+        """Stored messages before the window"""
+        return self.start > 0
+    
+    @property
+    def has_newer(self) -> bool:
+        """Stored messages after the window"""
+        return self.end < self.total
+    
+    def older_page(self) -> Optional[Tuple[int, int]]:
+        """(before, limit) of the page before the window for ChatManager.get_messages; None at the chat start"""
+        if self.start <= 0:
+            return None
+        return self.start, min(self.page_size, self.start)
+    
+    def newer_page(self) -> Optional[Tuple[int, int]]:
+        """(before, limit) of the page after the window; None when the latest message is rendered"""
+        if self.end >= self.total:
+            return None
+        before = min(self.total, self.end + self.page_size)
+        return before, before - self.end
+    
+    def prepend(self, count: int) -> List[int]:
+        """Add `count` stored messages right before the window; returns their keys, oldest first"""
+        keys = self._new_keys(count)
+        self._entries.extendleft([key, True, False] for key in reversed(keys))
+        self.start -= count
+        return keys
+    
+    def extend(self, count: int) -> List[int]:
+        """Add `count` stored messages right after the window; returns their keys, oldest first"""
+        keys = self._new_keys(count)
+        self._entries.extend([key, True, False] for key in keys)
+        self.end += count
+        return keys
+    
+    def append(self, stored: bool = True, pinned: bool = False) -> int:
+        """Add a live entry at the bottom; returns its key
+        
+        A stored entry is a message just saved to the chat, so the chat grows
+        with it. The latest messages must be rendered first (has_newer is False).
+        """
+        key = self._new_keys(1)[0]
+        self._entries.append([key, stored, pinned])
+        if stored:
+            self.total += 1
+            self.end += 1
+        return key
+    
+    def stored(self, key: int):
+        """A pinned entry (a finished stream) was saved to the chat and may be evicted from now on
+        
+        Messages saved while it streamed are stored before it but shown below
+        it; until those are evicted too, the window may be off by one message.
+        """
+        self.total += 1
+        for entry in self._entries:
+            if entry[0] == key:
+                entry[1] = True
+                entry[2] = False
+                self.end += 1
+                return
+        # Not rendered any more (the view was reloaded meanwhile): it is one of the newer messages
+    
+    def remove(self, key: int) -> bool:
+        """Drop an unsaved entry removed from the view (an empty stream); False if it is not rendered"""
+        for entry in self._entries:
+            if entry[0] == key:
+                self._entries.remove(entry)
+                return True
+        return False
+    
+    def evict_top(self) -> List[int]:
+        """Drop the oldest entries over the capacity; returns their keys, top to bottom"""
+        evicted = []
+        while len(self._entries) > self.capacity and not self._entries[0][2]:
+            key, stored, _ = self._entries.popleft()
+            if stored:
+                self.start += 1
+            evicted.append(key)
+        return evicted
+    
+    def evict_bottom(self) -> List[int]:
+        """Drop the newest entries over the capacity; returns their keys, top to bottom"""
+        if any(entry[2] for entry in self._entries):
+            return []
+        evicted = []
+        while len(self._entries) > self.capacity:
+            key, stored, _ = self._entries.pop()
+            if stored:
+                self.end -= 1
+            evicted.append(key)
+        evicted.reverse()
+        return evicted
+    
+    def _new_keys(self, count: int) -> List[int]:
+        keys = list(range(self._next_key, self._next_key + count))
+        self._next_key += count
+        return keys
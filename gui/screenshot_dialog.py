@@ -90,6 +90,15 @@ class ScreenshotDialog(ctk.CTkToplevel):
         )
         app_radio.pack(anchor="w", padx=30, pady=2)
         
+        regions_radio = ctk.CTkRadioButton(
+            type_frame,
+            text="🎯 Информационные области",
+            variable=self.screenshot_type,
+            value="regions",
+            font=ctk.CTkFont(size=12)
+        )
+        regions_radio.pack(anchor="w", padx=30, pady=2)
+        
         # App selection
         app_frame = ctk.CTkFrame(content_frame)
         app_frame.pack(fill="x", pady=(0, 15))
@@ -0,0 +1,140 @@
+"""
+Stream Appender - Batches streamed text pieces into a Tk Text widget at a fixed interval
+"""
+
+import logging
+import threading
+import tkinter as tk
+from typing import Optional
+
+class TkStreamAppender:
+    """Appends a streamed message to a Text widget without an insert per piece
+    
+    push() may be called from any thread (e.g. the API event loop) and only
+    collects the pieces; while the stream is open the Tk thread inserts them
+    in one batch every flush_interval_ms. Text goes in at a mark in front of
+    the message's trailing newlines, so messages added meanwhile are not
+    interleaved with it.
+    """
+    
+    _counter = 0
+    
+    def __init__(self, text_widget, tag: str, flush_interval_ms: int = 40):
+        """
+        Args:
+            text_widget: tk.Text (or ScrolledText) the message is shown in
+            tag: Text tag for the message body
+            flush_interval_ms: How often collected pieces are inserted
+        """
+        self.logger = logging.getLogger(__name__)
+        self.text_widget = text_widget
+        self.tag = tag
+        self.flush_interval_ms = flush_interval_ms
+        self._parts = []
+        self._pending = []
+        self._lock = threading.Lock()
+        self._open = False
+        self._detached = False
+        
+        TkStreamAppender._counter += 1
+        self.end_mark = f"stream_{TkStreamAppender._counter}_end"
+        self.start_mark = f"stream_{TkStreamAppender._counter}_start"
+    
+    @property
+    def text(self) -> str:
+        """Text received so far"""
+        with self._lock:
+            return "".join(self._parts)
+    
+    def begin(self):
+        """Reserve the message place at the end of the widget and start flushing (Tk thread)"""
+        self.text_widget.insert(tk.END, "\n\n", self.tag)
+        # Both marks sit before the two newlines; the end mark moves with inserted text
+        self.text_widget.mark_set(self.start_mark, "end-3c")
+        self.text_widget.mark_gravity(self.start_mark, tk.LEFT)
+        self.text_widget.mark_set(self.end_mark, "end-3c")
+        self.text_widget.mark_gravity(self.end_mark, tk.RIGHT)
+        self.text_widget.see(tk.END)
+        self._open = True
+        self.text_widget.after(self.flush_interval_ms, self._tick)
+    
+    def push(self, delta: str):
+        """Add a piece of the message (any thread)"""
+        with self._lock:
+            self._parts.append(delta)
+            self._pending.append(delta)
+    
+    def _tick(self):
+        if not self._open:
+            return
+        self._flush()
+        self.text_widget.after(self.flush_interval_ms, self._tick)
+    
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = "".join(self._pending), []
+        if not pending or self._detached:
+            return
+        try:
+            # Follow the message only if the user has not scrolled up
+            at_bottom = self.text_widget.yview()[1] >= 0.999
+            self.text_widget.insert(self.end_mark, pending, self.tag)
+            if at_bottom:
+                self.text_widget.see(tk.END)
+        except tk.TclError as e:
+            self._open = False
+            self.logger.debug(f"Stream target is gone: {e}")
+    
+    def finish(self, text: Optional[str] = None) -> str:
+        """Insert what is left and stop flushing (Tk thread)
+        
+        Args:
+            text: Final message text; replaces the shown text if it differs
+            
+        Returns:
+            Text of the message
+        """
+        self._flush()
+        self._open = False
+        shown = self.text
+        if text is not None and text != shown:
+            self.replace(text)
+            shown = text
+        self._release_marks()
+        return shown
+    
+    def replace(self, text: str):
+        """Replace the shown text, e.g. with the final answer (Tk thread)"""
+        if self._detached:
+            return
+        try:
+            self.text_widget.delete(self.start_mark, self.end_mark)
+            self.text_widget.insert(self.end_mark, text, self.tag)
+        except tk.TclError as e:
+            self.logger.debug(f"Stream target is gone: {e}")
+    
+    def discard(self, header_index: Optional[str] = None):
+        """Remove the message place, e.g. when nothing arrived (Tk thread)
+        
+        Args:
+            header_index: Where the message header starts, if it should be removed too
+        """
+        self._open = False
+        if not self._detached:
+            try:
+                self.text_widget.delete(header_index or self.start_mark, f"{self.end_mark}+2c")
+            except tk.TclError as e:
+                self.logger.debug(f"Stream target is gone: {e}")
+        self._release_marks()
+    
+    def detach(self):
+        """Stop showing the stream, e.g. when the widget is cleared for another chat"""
+        self._detached = True
+        self._open = False
+        self._release_marks()
+    
+    def _release_marks(self):
+        try:
+            self.text_widget.mark_unset(self.start_mark, self.end_mark)
+        except tk.TclError:
+            pass
@@ -7,6 +7,7 @@ A Python-based AI chat application with screenshot analysis capabilities.
 import sys
 import os
 import logging
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
 # Add the project root to Python path
@@ -14,33 +15,57 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from gui.main_window_modern import ModernMainWindow
+from services.request_log import CAPTURE_LOGGER_NAME
+from utils import json_codec
 from utils.config import Config
 
-def setup_logging():
-    """Setup logging configuration"""
+def setup_logging(config: Config):
+    """Setup logging configuration from the [logging] section"""
     log_dir = project_root / "logs"
     log_dir.mkdir(exist_ok=True)
     
+    level = getattr(logging, config.get("logging", "level", "INFO").upper(), logging.INFO)
+    max_file_size = config.getint("logging", "max_file_size", 10485760)
+    backup_count = config.getint("logging", "backup_count", 5)
+    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    
     logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=level,
+        format=log_format,
         handlers=[
-            logging.FileHandler(log_dir / "ai_chat_messenger.log", encoding='utf-8'),
+            RotatingFileHandler(log_dir / "ai_chat_messenger.log", maxBytes=max_file_size,
+                                backupCount=backup_count, encoding='utf-8'),
             logging.StreamHandler(sys.stdout)
         ]
     )
     
+    # Full API request/response capture goes to its own file, never to the main log
+    capture_logger = logging.getLogger(CAPTURE_LOGGER_NAME)
+    capture_logger.propagate = False
+    if config.getboolean("logging", "api_debug_capture", False):
+        capture_handler = RotatingFileHandler(
+            log_dir / config.get("logging", "api_debug_file", "api_debug.log"),
+            maxBytes=max_file_size, backupCount=backup_count, encoding='utf-8'
+        )
+        capture_handler.setFormatter(logging.Formatter(log_format))
+        capture_logger.addHandler(capture_handler)
+        capture_logger.setLevel(logging.DEBUG)
+    else:
+        capture_logger.disabled = True
+    
     return logging.getLogger(__name__)
 
 def main():
     """Main application entry point"""
-    logger = setup_logging()
+    # Configuration is loaded first - it holds the logging settings
+    config = Config()
+    logger = setup_logging(config)
     logger.info("Starting Modern AI Chat Messenger...")
     
+    codec = json_codec.set_codec(config.get("storage", "json_codec", "auto"))
+    logger.info(f"JSON codec for saved data: {codec.name}")
+    
     try:
-        # Load configuration
-        config = Config()
-        
         # Create and run the modern main window
         app = ModernMainWindow(config)
         app.run()
@@ -0,0 +1,78 @@
+"""
+Action Detector - Finds {"action": "..."} button commands in complete or still streaming model output
+"""
+
+import logging
+import re
+from typing import Iterable, Optional
+
+# Legacy action names for backward compatibility
+ACTION_ALIASES = {
+    "button_fold": "fold",
+    "button_call": "call",
+    "button_raise": "raise",
+    "button_check": "check",
+    "fold": "fold",
+    "call": "call",
+    "raise": "raise",
+    "check": "check"
+}
+
+# An object with an "action" string value; matched as soon as the value is closed,
+# without waiting for the rest of the object or the text after it
+ACTION_PATTERN = re.compile(r'\{[^{}]*?"action"\s*:\s*"([^"\\]+)"')
+
+def resolve_action(action: str, available_buttons: Iterable[str]) -> Optional[str]:
+    """Button ID for an action name: direct match first, then the legacy mapping"""
+    available_buttons = set(available_buttons)
+    if action in available_buttons:
+        return action
+    mapped_action = ACTION_ALIASES.get(action)
+    if mapped_action and mapped_action in available_buttons:
+        return mapped_action
+    return None
+
+class IncrementalActionDetector:
+    """Detects the first valid button action while the response text is still arriving
+    
+    feed() is called with every new piece of text and returns the button ID
+    once, as soon as the action value is complete. Each call rescans only
+    from the last "{" that may still start an action object.
+    """
+    
+    def __init__(self, available_buttons: Iterable[str]):
+        """
+        Args:
+            available_buttons: Button IDs from CoordinatesManager
+        """
+        self.logger = logging.getLogger(__name__)
+        self.available_buttons = set(available_buttons)
+        self.action = None
+        self._text = ""
+        self._scan_from = 0
+    
+    @property
+    def detected(self) -> bool:
+        return self.action is not None
+    
+    def feed(self, delta: str) -> Optional[str]:
+        """Add text; returns the button ID the first time an action is found"""
+        if self.action is not None or not delta:
+            return None
+        self._text += delta
+        
+        for match in ACTION_PATTERN.finditer(self._text, self._scan_from):
+            action = resolve_action(match.group(1), self.available_buttons)
+            if action:
+                self.action = action
+                return action
+            self.logger.warning(f"Action '{match.group(1)}' not found in available buttons: {sorted(self.available_buttons)}")
+            self._scan_from = match.end()
+            
+        # A later match can only start at the last "{" - any earlier one is closed or already matched
+        self._scan_from = max(self._scan_from, self._text.rfind("{"))
+        return None
+
+def extract_action(response_text: str, available_buttons: Iterable[str]) -> Optional[str]:
+    """First valid button action in a complete response"""
+    return IncrementalActionDetector(available_buttons).feed(response_text)
@@ -3,13 +3,35 @@ API Client - Handles communication with the YourSmartScreen API
 """
 
 import requests
+import urllib3
+import io
+import time
 import json
 import logging
+import mimetypes
 from pathlib import Path
-from typing import Dict, Optional
+from typing import BinaryIO, Callable, Dict, Optional, Tuple, Union
 
-class APIClient:
-    """Client for YourSmartScreen API"""
+from .chat_stream import EVENT_STREAM_TYPE, ChatStreamParser, is_event_stream
+from .frame import Frame
+from .image_encoder import ImageEncoder
+from .multipart import MultipartStream
+from .request_log import RequestLog
+from .request_policy import RequestPolicy
+
+# System prompt for poker bot context
+CHAT_SYSTEM_PROMPT = """Ты - ИИ-агент для игры в покер. Твоя задача:
+1. Анализировать скриншоты покерных столов
+2. Выбирать оптимальные действия (fold/call/raise)
+3. Отвечать на вопросы о покере
+4. Помогать с игровой стратегией
+
+Отвечай кратко и по делу. Для действий в покере используй только JSON формат: {"action": "button_fold"}, {"action": "button_call"}, {"action": "button_raise"}."""
+
+IMAGE_ANALYSIS_MODEL = 'openai/gpt-4.1-mini'
+
+class APIClientBase:
+    """Configuration, request payloads and response parsing shared by the sync and async clients"""
     
     def __init__(self, config):
         self.config = config
@@ -18,6 +40,102 @@ class APIClient:
         # API configuration
         self.base_url = config.get("api", "base_url", "http://147.45.227.57")
         self.timeout = config.getint("api", "timeout", 30)
+        
+        # Per-endpoint timeouts, retries and deadlines
+        self.request_policy = RequestPolicy(config)
+        self.request_log = RequestLog(config)
+        
+        # Upload encoding (format, quality, downscale, size budget) from the [screenshots] section
+        self.image_encoder = ImageEncoder.from_config(config)
+    
+    def _chat_payload(self, message: str, previous_response_id: Optional[str] = None) -> Dict:
+        """JSON body for /chat/send"""
+        data = {
+            "message": message,
+            "system_prompt": CHAT_SYSTEM_PROMPT
+        }
+        
+        if previous_response_id:
+            data["previous_response_id"] = previous_response_id
+        return data
+    
+    def _full_response_as_stream(self, result: Dict, on_delta: Optional[Callable[[str], None]]) -> Dict:
+        """Server answered with plain JSON instead of a stream - deliver it as one delta"""
+        result = self._parse_chat_result(result)
+        if result.get("success") and on_delta:
+            on_delta(result["message"])
+        return result
+    
+    def _parse_chat_result(self, result: Dict) -> Dict:
+        """Normalize /chat/send response"""
+        if result.get("response"):
+            return {
+                "success": True,
+                "message": result.get("response", ""),
+                "response_id": result.get("response_id"),
+                "tokens_used": result.get("tokens_used"),
+                "model": result.get("model")
+            }
+        else:
+            return {
+                "success": False,
+                "error": result.get("detail", "Unknown error")
+            }
+    
+    def _analysis_fields(self, prompt: str) -> Dict:
+        """Form fields for /openrouter/image/analyze"""
+        return {
+            'prompt': prompt,
+            'model': IMAGE_ANALYSIS_MODEL
+        }
+    
+    def _open_image(self, image: Union[str, Frame]) -> Tuple[str, BinaryIO, str]:
+        """Upload file part (filename, file object, content type) for a frame or an image file"""
+        # In-memory frames are encoded straight into the request body, no disk round trip
+        if isinstance(image, Frame):
+            encoded = self.image_encoder.encode(image)
+            self.logger.debug("Uploading %s", encoded)
+            return encoded.filename, io.BytesIO(encoded.data), encoded.mime_type
+            
+        filename = Path(image).name
+        mime_type = mimetypes.guess_type(filename)[0] or 'image/png'
+        return filename, open(image, 'rb'), mime_type
+    
+    def _parse_analysis_result(self, result: Dict) -> Dict:
+        """Normalize /openrouter/image/analyze response"""
+        if result.get("analysis"):
+            return {
+                "success": True,
+                "analysis": result.get("analysis", ""),
+                "message": result.get("analysis", ""),  # Keep both for compatibility
+                "model": result.get("model"),
+                "tokens_used": result.get("tokens_used"),
+                "processing_time": result.get("processing_time")
+            }
+        else:
+            return {
+                "success": False,
+                "error": result.get("error", "Analysis failed")
+            }
+    
+    def save_auth_token(self):
+        """Save authentication token to file"""
+        try:
+            config_dir = Path("config")
+            config_dir.mkdir(exist_ok=True)
+            
+            token_file = config_dir / "auth_token.json"
+            with open(token_file, 'w') as f:
+                json.dump({"token": self.auth_token}, f)
+                
+        except Exception as e:
+            self.logger.error(f"Failed to save auth token: {e}")
+
+class APIClient(APIClientBase):
+    """Client for YourSmartScreen API"""
+    
+    def __init__(self, config):
+        super().__init__(config)
         self.auth_token = None
         
         # Session for connection reuse
@@ -27,6 +145,51 @@ class APIClient:
             "User-Agent": "AI-Chat-Messenger/1.0"
         })
     
+    def _request(self, endpoint: str, method: str, url: str, body_factory=None, **kwargs) -> requests.Response:
+        """Execute a request with the endpoint's timeouts, retries and deadline
+        
+        Args:
+            endpoint: Policy name (auth, register, verify, chat, analyze)
+            method: HTTP method
+            url: Request URL
+            body_factory: Returns extra request kwargs for every attempt (for bodies that can be read only once)
+        """
+        retry = self.request_policy.start(endpoint)
+        while True:
+            attempt_kwargs = dict(kwargs)
+            if body_factory:
+                attempt_kwargs.update(body_factory())
+                
+            try:
+                response = self.session.request(method, url, timeout=retry.timeouts(), **attempt_kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                delay = retry.next_delay(error_kind=self._error_kind(e))
+                if delay is None:
+                    self.request_log.record_error(endpoint, method, url, e, retry.started_at, retry.attempt)
+                    raise
+                self.logger.warning(f"{endpoint} request failed ({e}), retry {retry.attempt} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+                
+            delay = retry.next_delay(status=response.status_code, retry_after=response.headers.get("Retry-After"))
+            if delay is None:
+                self.request_log.record(endpoint, method, url, response, retry.started_at, retry.attempt)
+                return response
+            self.logger.warning(f"{endpoint} request got HTTP {response.status_code}, retry {retry.attempt} in {delay:.2f}s")
+            response.close()
+            time.sleep(delay)
+    
+    @staticmethod
+    def _error_kind(error: requests.exceptions.RequestException) -> str:
+        """"connect" if the request never reached the server, "read" if it may have"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return "connect"
+        if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+            reason = getattr(error.args[0], "reason", None)
+            if isinstance(reason, urllib3.exceptions.NewConnectionError):
+                return "connect"
+        return "read"
+    
     def login(self, username: str, password: str) -> bool:
         """Login user and get authentication token"""
         try:
@@ -36,7 +199,7 @@ class APIClient:
                 "password": password
             }
             
-            response = self.session.post(url, json=data)
+            response = self._request("auth", "POST", url, json=data)
             response.raise_for_status()
             
             result = response.json()
@@ -69,7 +232,7 @@ class APIClient:
             if email:
                 data["email"] = email
             
-            response = self.session.post(url, json=data)
+            response = self._request("register", "POST", url, json=data)
             response.raise_for_status()
             
             result = response.json()
@@ -107,7 +270,7 @@ class APIClient:
             url = f"{self.base_url}/auth/verify"
             headers = {"Authorization": f"Bearer {self.auth_token}"}
             
-            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            response = self._request("verify", "GET", url, headers=headers)
             
             if response.status_code == 200:
                 result = response.json()
@@ -137,46 +300,12 @@ class APIClient:
                 return {"success": False, "error": "Not authenticated"}
             
             url = f"{self.base_url}/chat/send"
-            # Add system prompt for poker bot context
-            system_prompt = """Ты - ИИ-агент для игры в покер. Твоя задача:
-1. Анализировать скриншоты покерных столов
-2. Выбирать оптимальные действия (fold/call/raise)
-3. Отвечать на вопросы о покере
-4. Помогать с игровой стратегией
-
-Отвечай кратко и по делу. Для действий в покере используй только JSON формат: {"action": "button_fold"}, {"action": "button_call"}, {"action": "button_raise"}."""
-
-            data = {
-                "message": message,
-                "system_prompt": system_prompt
-            }
-            
-            if previous_response_id:
-                data["previous_response_id"] = previous_response_id
-            
-            response = self.session.post(url, json=data)
-            
-            # Детальное логирование для отладки
-            self.logger.info(f"Send message request - Status: {response.status_code}")
-            self.logger.info(f"Send message request - Headers: {dict(response.headers)}")
-            self.logger.info(f"Send message request - Response text: {response.text}")
+            data = self._chat_payload(message, previous_response_id)
             
+            response = self._request("chat", "POST", url, json=data)
             response.raise_for_status()
             
-            result = response.json()
-            if result.get("response"):
-                return {
-                    "success": True,
-                    "message": result.get("response", ""),
-                    "response_id": result.get("response_id"),
-                    "tokens_used": result.get("tokens_used"),
-                    "model": result.get("model")
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": result.get("detail", "Unknown error")
-                }
+            return self._parse_chat_result(response.json())
                 
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Send message request failed: {e}")
@@ -185,56 +314,90 @@ class APIClient:
             self.logger.error(f"Send message error: {e}")
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def analyze_image(self, image_path: str, prompt: str) -> Dict:
-        """Analyze an image using the API"""
+    def stream_message(self, message: str, previous_response_id: Optional[str] = None,
+                       on_delta: Optional[Callable[[str], None]] = None) -> Dict:
+        """Send a chat message and receive the answer as a stream of text pieces
+        
+        Args:
+            message: Message text
+            previous_response_id: Response ID of the previous answer for conversation context
+            on_delta: Called with every piece of the answer as soon as it arrives
+            
+        Returns:
+            Same result as send_message(); on failure "partial_message" holds the text received so far
+        """
+        parser = ChatStreamParser()
+        try:
+            if not self.auth_token:
+                return {"success": False, "error": "Not authenticated"}
+            
+            url = f"{self.base_url}/chat/send"
+            data = self._chat_payload(message, previous_response_id)
+            
+            response = self._request("chat", "POST", url, json=data, headers={"Accept": EVENT_STREAM_TYPE}, stream=True)
+            with response:
+                response.raise_for_status()
+                if not is_event_stream(response.headers.get("Content-Type")):
+                    return self._full_response_as_stream(response.json(), on_delta)
+                    
+                # SSE is always UTF-8; iter_lines yields lines as the chunks arrive
+                response.encoding = "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    delta = parser.feed_line(line)
+                    if delta and on_delta:
+                        on_delta(delta)
+                delta = parser.finish()
+                if delta and on_delta:
+                    on_delta(delta)
+                    
+            result = parser.result()
+            if result["success"]:
+                self.logger.debug("Chat stream finished, first token after %.2fs", result["time_to_first_token"])
+            return result
+            
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Stream message request failed: {e}")
+            return {"success": False, "error": f"Request failed: {str(e)}", "partial_message": parser.text}
+        except Exception as e:
+            self.logger.error(f"Stream message error: {e}")
+            return {"success": False, "error": f"Error: {str(e)}", "partial_message": parser.text}
+    
+    def analyze_image(self, image: Union[str, Frame], prompt: str) -> Dict:
+        """Analyze an image (file path or in-memory Frame) using the API"""
         try:
             if not self.auth_token:
                 return {"success": False, "error": "Not authenticated"}
             
             url = f"{self.base_url}/openrouter/image/analyze"
             
-            # Prepare multipart form data
-            with open(image_path, 'rb') as image_file:
-                files = {
-                    'file': ('screenshot.png', image_file, 'image/png')
-                }
-                data = {
-                    'prompt': prompt,
-                    'model': 'openai/gpt-4.1-mini'
-                }
+            filename, image_file, mime_type = self._open_image(image)
+            
+            def multipart_body():
+                # Multipart body is streamed from the buffer/file, not built in memory;
+                # a retry streams it again from the start
+                image_file.seek(0)
+                body = MultipartStream(
+                    fields=self._analysis_fields(prompt),
+                    files={
+                        'file': (filename, image_file, mime_type)
+                    }
+                )
                 
-                # Use direct requests.post for multipart data
+                # Pooled session keeps the connection alive between analyses
                 headers = {
-                    'Authorization': f'Bearer {self.auth_token}'
+                    'Authorization': f'Bearer {self.auth_token}',
+                    'Content-Type': body.content_type
                 }
-                
-                response = requests.post(url, files=files, data=data, headers=headers)
-                
-                # Детальное логирование для отладки
-                self.logger.info(f"Image analysis request - Status: {response.status_code}")
-                self.logger.info(f"Image analysis request - Headers: {dict(response.headers)}")
-                self.logger.info(f"Image analysis request - Response text: {response.text}")
-                
+                return {"data": body, "headers": headers}
+            
+            with image_file:
+                response = self._request("analyze", "POST", url, body_factory=multipart_body)
                 response.raise_for_status()
                 
-                result = response.json()
-                if result.get("analysis"):
-                    return {
-                        "success": True,
-                        "analysis": result.get("analysis", ""),
-                        "message": result.get("analysis", ""),  # Keep both for compatibility
-                        "model": result.get("model"),
-                        "tokens_used": result.get("tokens_used"),
-                        "processing_time": result.get("processing_time")
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": result.get("error", "Analysis failed")
-                    }
+                return self._parse_analysis_result(response.json())
                     
         except FileNotFoundError:
-            self.logger.error(f"Image file not found: {image_path}")
+            self.logger.error(f"Image file not found: {image}")
             return {"success": False, "error": "Image file not found"}
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Image analysis request failed: {e}")
@@ -243,19 +406,6 @@ class APIClient:
             self.logger.error(f"Image analysis error: {e}")
             return {"success": False, "error": f"Error: {str(e)}"}
     
-    def save_auth_token(self):
-        """Save authentication token to file"""
-        try:
-            config_dir = Path("config")
-            config_dir.mkdir(exist_ok=True)
-            
-            token_file = config_dir / "auth_token.json"
-            with open(token_file, 'w') as f:
-                json.dump({"token": self.auth_token}, f)
-                
-        except Exception as e:
-            self.logger.error(f"Failed to save auth token: {e}")
-    
     def load_auth_token(self) -> bool:
         """Load authentication token from file"""
         try:
@@ -0,0 +1,297 @@
+"""
+Async API Client - httpx.AsyncClient variant of APIClient running on one background event loop
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Callable, Coroutine, Dict, Optional, Union
+
+import httpx
+
+from .api_client import APIClientBase
+from .chat_stream import EVENT_STREAM_TYPE, ChatStreamParser, is_event_stream
+from .frame import Frame
+
+class AsyncLoopThread:
+    """Runs an asyncio event loop in a daemon thread and accepts coroutines from other threads"""
+    
+    def __init__(self, name: str = "api-event-loop"):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the loop thread (no-op if already running)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+    
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; the result is delivered through a thread-safe future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the loop and wait for the thread to finish"""
+        with self._lock:
+            if not self._thread:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+class AsyncAPIClient(APIClientBase):
+    """Async client for YourSmartScreen API with the same methods as APIClient"""
+    
+    def __init__(self, config, auth_client=None, loop_thread: Optional[AsyncLoopThread] = None):
+        """
+        Args:
+            config: Application config
+            auth_client: Sync APIClient whose token is used while this client has none of its own
+            loop_thread: Event loop thread to run requests on (a new one by default)
+        """
+        super().__init__(config)
+        self.auth_client = auth_client
+        self._auth_token = None
+        self.loop_thread = loop_thread or AsyncLoopThread()
+        self._client: Optional[httpx.AsyncClient] = None
+        # Image encoding is CPU-bound and runs next to the loop, not on it
+        self._encoder_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-encoder")
+    
+    @property
+    def auth_token(self) -> Optional[str]:
+        if self._auth_token:
+            return self._auth_token
+        return self.auth_client.auth_token if self.auth_client else None
+    
+    @auth_token.setter
+    def auth_token(self, value: Optional[str]):
+        self._auth_token = value
+    
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Run a coroutine of this client on the background loop"""
+        return self.loop_thread.submit(coro)
+    
+    def close(self):
+        """Close the connection pool and stop the loop"""
+        if self._client is not None and self.loop_thread.loop is not None:
+            try:
+                self.submit(self._client.aclose()).result(timeout=5)
+            except Exception as e:
+                self.logger.debug(f"Error closing async HTTP client: {e}")
+            self._client = None
+        self.loop_thread.stop()
+        self._encoder_executor.shutdown(wait=False)
+    
+    def _http(self) -> httpx.AsyncClient:
+        """Pooled HTTP client, created on the loop it is used from"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"User-Agent": "AI-Chat-Messenger/1.0"}
+            )
+        return self._client
+    
+    async def _request(self, endpoint: str, method: str, url: str, body_factory=None, stream: bool = False,
+                       **kwargs) -> httpx.Response:
+        """Execute a request with the endpoint's timeouts, retries and deadline (see APIClient._request)
+        
+        With stream=True the body is not read; the caller must close the response (aclose()).
+        """
+        retry = self.request_policy.start(endpoint)
+        while True:
+            attempt_kwargs = dict(kwargs)
+            if body_factory:
+                attempt_kwargs.update(body_factory())
+                
+            connect_timeout, read_timeout = retry.timeouts()
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+            try:
+                request = self._http().build_request(method, url, timeout=timeout, **attempt_kwargs)
+                response = await self._http().send(request, stream=stream)
+            except httpx.TransportError as e:
+                error_kind = "connect" if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)) else "read"
+                delay = retry.next_delay(error_kind=error_kind)
+                if delay is None:
+                    self.request_log.record_error(endpoint, method, url, e, retry.started_at, retry.attempt)
+                    raise
+                self.logger.warning(f"{endpoint} request failed ({e!r}), retry {retry.attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+                
+            delay = retry.next_delay(status=response.status_code, retry_after=response.headers.get("Retry-After"))
+            if delay is None:
+                self.request_log.record(endpoint, method, url, response, retry.started_at, retry.attempt)
+                return response
+            self.logger.warning(f"{endpoint} request got HTTP {response.status_code}, retry {retry.attempt} in {delay:.2f}s")
+            await response.aclose()
+            await asyncio.sleep(delay)
+    
+    def _auth_headers(self) -> Dict:
+        return {"Authorization": f"Bearer {self.auth_token}"}
+    
+    async def login(self, username: str, password: str) -> bool:
+        """Login user and get authentication token"""
+        try:
+            url = f"{self.base_url}/auth/login"
+            response = await self._request("auth", "POST", url, json={"username": username, "password": password})
+            response.raise_for_status()
+            
+            result = response.json()
+            if result.get("access_token"):
+                self.auth_token = result.get("access_token")
+                self.save_auth_token()
+                self.logger.info("Login successful")
+                return True
+                
+            self.logger.error(f"Login failed: {result.get('detail', 'Unknown error')}")
+            return False
+            
+        except httpx.HTTPError as e:
+            self.logger.error(f"Login request failed: {e}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Login error: {e}")
+            return False
+    
+    async def verify_token(self) -> Dict:
+        """Verify the current authentication token"""
+        try:
+            if not self.auth_token:
+                return {"success": False, "valid": False, "error": "No token available"}
+                
+            url = f"{self.base_url}/auth/verify"
+            response = await self._request("verify", "GET", url, headers=self._auth_headers())
+            
+            if response.status_code == 200:
+                result = response.json()
+                return {
+                    "success": True,
+                    "valid": result.get("valid", False),
+                    "user_id": result.get("user_id")
+                }
+            else:
+                return {
+                    "success": False,
+                    "valid": False,
+                    "error": f"HTTP {response.status_code}"
+                }
+                
+        except httpx.HTTPError as e:
+            self.logger.error(f"Token verification request failed: {e}")
+            return {"success": False, "valid": False, "error": str(e)}
+        except Exception as e:
+            self.logger.error(f"Token verification error: {e}")
+            return {"success": False, "valid": False, "error": str(e)}
+    
+    async def send_message(self, message: str, previous_response_id: Optional[str] = None) -> Dict:
+        """Send a chat message to the API"""
+        try:
+            if not self.auth_token:
+                return {"success": False, "error": "Not authenticated"}
+                
+            url = f"{self.base_url}/chat/send"
+            response = await self._request(
+                "chat", "POST", url, json=self._chat_payload(message, previous_response_id), headers=self._auth_headers()
+            )
+            response.raise_for_status()
+            
+            return self._parse_chat_result(response.json())
+            
+        except httpx.HTTPError as e:
+            self.logger.error(f"Send message request failed: {e}")
+            return {"success": False, "error": f"Request failed: {str(e)}"}
+        except Exception as e:
+            self.logger.error(f"Send message error: {e}")
+            return {"success": False, "error": f"Error: {str(e)}"}
+    
+    async def stream_message(self, message: str, previous_response_id: Optional[str] = None,
+                             on_delta: Optional[Callable[[str], None]] = None) -> Dict:
+        """Send a chat message and receive the answer as a stream (see APIClient.stream_message)
+        
+        on_delta is called on the event loop thread.
+        """
+        parser = ChatStreamParser()
+        try:
+            if not self.auth_token:
+                return {"success": False, "error": "Not authenticated"}
+                
+            url = f"{self.base_url}/chat/send"
+            headers = dict(self._auth_headers(), Accept=EVENT_STREAM_TYPE)
+            response = await self._request(
+                "chat", "POST", url, stream=True, json=self._chat_payload(message, previous_response_id), headers=headers
+            )
+            try:
+                response.raise_for_status()
+                if not is_event_stream(response.headers.get("Content-Type")):
+                    await response.aread()
+                    return self._full_response_as_stream(response.json(), on_delta)
+                    
+                async for line in response.aiter_lines():
+                    delta = parser.feed_line(line)
+                    if delta and on_delta:
+                        on_delta(delta)
+                delta = parser.finish()
+                if delta and on_delta:
+                    on_delta(delta)
+            finally:
+                await response.aclose()
+                
+            return parser.result()
+            
+        except httpx.HTTPError as e:
+            self.logger.error(f"Stream message request failed: {e}")
+            return {"success": False, "error": f"Request failed: {str(e)}", "partial_message": parser.text}
+        except Exception as e:
+            self.logger.error(f"Stream message error: {e}")
+            return {"success": False, "error": f"Error: {str(e)}", "partial_message": parser.text}
+    
+    async def analyze_image(self, image: Union[str, Frame], prompt: str) -> Dict:
+        """Analyze an image (file path or in-memory Frame) using the API"""
+        try:
+            if not self.auth_token:
+                return {"success": False, "error": "Not authenticated"}
+                
+            url = f"{self.base_url}/openrouter/image/analyze"
+            
+            # Encoding is CPU-bound - keep it off the event loop
+            loop = asyncio.get_running_loop()
+            filename, image_file, mime_type = await loop.run_in_executor(self._encoder_executor, self._open_image, image)
+            
+            def multipart_body():
+                # httpx streams the multipart body from the buffer/file; a retry starts it over
+                image_file.seek(0)
+                return {
+                    "data": self._analysis_fields(prompt),
+                    "files": {'file': (filename, image_file, mime_type)}
+                }
+            
+            with image_file:
+                response = await self._request(
+                    "analyze", "POST", url, body_factory=multipart_body, headers=self._auth_headers()
+                )
+                response.raise_for_status()
+                
+                return self._parse_analysis_result(response.json())
+                
+        except FileNotFoundError:
+            self.logger.error(f"Image file not found: {image}")
+            return {"success": False, "error": "Image file not found"}
+        except httpx.HTTPError as e:
+            self.logger.error(f"Image analysis request failed: {e}")
+            return {"success": False, "error": f"Request failed: {str(e)}"}
+        except Exception as e:
+            self.logger.error(f"Image analysis error: {e}")
+            return {"success": False, "error": f"Error: {str(e)}"}
@@ -0,0 +1,262 @@
+"""
+Capture Backend - Reusable per-window capture contexts (DC + bitmap) behind a backend interface
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Raster operation codes (wingdi.h)
+SRCCOPY = 0x00CC0020
+CAPTUREBLT = 0x40000000
+
+class CaptureContext:
+    """Device context and bitmap sized to one window, owned by a CaptureBackend"""
+    
+    def __init__(self, hwnd: int, width: int, height: int, handles: Dict):
+        self.hwnd = hwnd
+        self.width = width
+        self.height = height
+        self.handles = handles
+        self.created_at = time.time()
+        self.uses = 0
+    
+    def __repr__(self):
+        return f"CaptureContext(hwnd={self.hwnd}, {self.width}x{self.height}, uses={self.uses})"
+
+class CaptureBackend:
+    """Interface for the platform calls used by window capture"""
+    
+    def is_window(self, hwnd: int) -> bool:
+        """Check that the window handle is still valid"""
+        raise NotImplementedError
+    
+    def create_context(self, hwnd: int, width: int, height: int) -> CaptureContext:
+        """Create a window DC, a compatible DC and a bitmap of the given size"""
+        raise NotImplementedError
+    
+    def release_context(self, context: CaptureContext):
+        """Free everything allocated by create_context"""
+        raise NotImplementedError
+    
+    def print_window(self, context: CaptureContext, flag: int) -> bool:
+        """Render the window into the context bitmap with PrintWindow"""
+        raise NotImplementedError
+    
+    def bit_blt(self, context: CaptureContext, raster_op: int = SRCCOPY) -> bool:
+        """Copy the window DC into the context bitmap"""
+        raise NotImplementedError
+    
+    def read_pixels(self, context: CaptureContext) -> bytes:
+        """Return the context bitmap as top-down BGRA bytes"""
+        raise NotImplementedError
+
+class Win32CaptureBackend(CaptureBackend):
+    """pywin32 implementation of CaptureBackend"""
+    
+    def __init__(self):
+        import win32api
+        import win32gui
+        import win32ui
+        
+        self.win32api = win32api
+        self.win32gui = win32gui
+        self.win32ui = win32ui
+    
+    def is_window(self, hwnd: int) -> bool:
+        return bool(self.win32gui.IsWindow(hwnd))
+    
+    def create_context(self, hwnd: int, width: int, height: int) -> CaptureContext:
+        # Get device context
+        hwnd_dc = self.win32gui.GetWindowDC(hwnd)
+        mfc_dc = self.win32ui.CreateDCFromHandle(hwnd_dc)
+        save_dc = mfc_dc.CreateCompatibleDC()
+        
+        # Create bitmap
+        bitmap = self.win32ui.CreateBitmap()
+        bitmap.CreateCompatibleBitmap(mfc_dc, width, height)
+        save_dc.SelectObject(bitmap)
+        
+        return CaptureContext(hwnd, width, height, {
+            "hwnd_dc": hwnd_dc,
+            "mfc_dc": mfc_dc,
+            "save_dc": save_dc,
+            "bitmap": bitmap
+        })
+    
+    def release_context(self, context: CaptureContext):
+        handles = context.handles
+        self.win32gui.DeleteObject(handles["bitmap"].GetHandle())
+        handles["save_dc"].DeleteDC()
+        handles["mfc_dc"].DeleteDC()
+        self.win32gui.ReleaseDC(context.hwnd, handles["hwnd_dc"])
+    
+    def print_window(self, context: CaptureContext, flag: int) -> bool:
+        return bool(self.win32api.PrintWindow(context.hwnd, context.handles["save_dc"].GetSafeHdc(), flag))
+    
+    def bit_blt(self, context: CaptureContext, raster_op: int = SRCCOPY) -> bool:
+        # pywin32 returns None on success and raises win32ui.error on failure
+        context.handles["save_dc"].BitBlt(
+            (0, 0), (context.width, context.height), context.handles["mfc_dc"], (0, 0), raster_op
+        )
+        return True
+    
+    def read_pixels(self, context: CaptureContext) -> bytes:
+        return context.handles["bitmap"].GetBitmapBits(True)
+
+class FakeCaptureBackend(CaptureBackend):
+    """Pure-Python backend with synthetic windows, used to exercise pooling without Win32"""
+    
+    def __init__(self, print_window_flags=(3, 2, 1, 0), bit_blt_ok: bool = True):
+        """
+        Args:
+            print_window_flags: PrintWindow flags that "succeed" for every window
+            bit_blt_ok: Whether BitBlt succeeds
+        """
+        self.windows: Dict[int, Tuple[int, int, bytes]] = {}
+        self.print_window_flags = set(print_window_flags)
+        self.bit_blt_ok = bit_blt_ok
+        self.created = 0
+        self.released = 0
+        self.calls = []
+    
+    def add_window(self, hwnd: int, width: int, height: int, color: bytes = b"\x40\x80\xc0\xff"):
+        """Register (or resize) a synthetic window filled with one BGRA color"""
+        self.windows[hwnd] = (width, height, color)
+    
+    def remove_window(self, hwnd: int):
+        """Simulate the window being destroyed"""
+        self.windows.pop(hwnd, None)
+    
+    def is_window(self, hwnd: int) -> bool:
+        return hwnd in self.windows
+    
+    def create_context(self, hwnd: int, width: int, height: int) -> CaptureContext:
+        if hwnd not in self.windows:
+            raise OSError(f"Invalid window handle {hwnd}")
+        self.created += 1
+        return CaptureContext(hwnd, width, height, {"buffer": bytearray(width * height * 4)})
+    
+    def release_context(self, context: CaptureContext):
+        self.released += 1
+        context.handles.clear()
+    
+    def _render(self, context: CaptureContext):
+        width, height, color = self.windows[context.hwnd]
+        buffer = context.handles["buffer"]
+        row = color * min(width, context.width) + bytes(4 * max(0, context.width - width))
+        for y in range(context.height):
+            start = y * context.width * 4
+            buffer[start:start + len(row)] = row if y < height else bytes(len(row))
+    
+    def print_window(self, context: CaptureContext, flag: int) -> bool:
+        self.calls.append(("print_window", context.hwnd, flag))
+        if context.hwnd not in self.windows or flag not in self.print_window_flags:
+            return False
+        self._render(context)
+        return True
+    
+    def bit_blt(self, context: CaptureContext, raster_op: int = SRCCOPY) -> bool:
+        self.calls.append(("bit_blt", context.hwnd, raster_op))
+        if context.hwnd not in self.windows or not self.bit_blt_ok:
+            return False
+        self._render(context)
+        return True
+    
+    def read_pixels(self, context: CaptureContext) -> bytes:
+        return bytes(context.handles["buffer"])
+
+class CaptureContextPool:
+    """Keeps one capture context per (window, slot), recreated only when the window size changes"""
+    
+    def __init__(self, backend: CaptureBackend, max_contexts: int = 8):
+        """
+        Args:
+            backend: Platform backend creating and using the contexts
+            max_contexts: Maximum number of cached contexts (least recently used are released)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.max_contexts = max_contexts
+        self._contexts: "OrderedDict[Tuple[int, str], CaptureContext]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {"created": 0, "reused": 0, "recreated": 0, "evicted": 0, "invalidated": 0}
+    
+    @contextmanager
+    def lease(self, hwnd: int, width: int, height: int, slot: str = "window"):
+        """Borrow the context for a window; it is dropped if the capture raises"""
+        with self._lock:
+            context = self.acquire(hwnd, width, height, slot)
+            try:
+                yield context
+            except Exception:
+                self._discard((hwnd, slot))
+                raise
+    
+    def acquire(self, hwnd: int, width: int, height: int, slot: str = "window") -> CaptureContext:
+        """Get a context sized width x height for the window, reusing the cached one if possible"""
+        key = (hwnd, slot)
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is not None:
+                if context.width == width and context.height == height:
+                    self._contexts.move_to_end(key)
+                    context.uses += 1
+                    self.stats["reused"] += 1
+                    return context
+                    
+                # Window was resized - the bitmap no longer fits
+                self.logger.debug(f"Window {hwnd} resized to {width}x{height}, recreating capture context")
+                self._discard(key)
+                self.stats["recreated"] += 1
+                
+            context = self.backend.create_context(hwnd, width, height)
+            context.uses = 1
+            self._contexts[key] = context
+            self.stats["created"] += 1
+            
+            while len(self._contexts) > self.max_contexts:
+                old_key, _ = next(iter(self._contexts.items()))
+                self._discard(old_key)
+                self.stats["evicted"] += 1
+                
+            return context
+    
+    def invalidate(self, hwnd: int):
+        """Release every context of a window (closed, recreated or failing window)"""
+        with self._lock:
+            for key in [key for key in self._contexts if key[0] == hwnd]:
+                self._discard(key)
+                self.stats["invalidated"] += 1
+    
+    def prune(self):
+        """Release contexts of windows that no longer exist"""
+        with self._lock:
+            for hwnd in {key[0] for key in self._contexts}:
+                if not self.backend.is_window(hwnd):
+                    self.invalidate(hwnd)
+    
+    def release_all(self):
+        """Release every cached context"""
+        with self._lock:
+            for key in list(self._contexts):
+                self._discard(key)
+    
+    def get(self, hwnd: int, slot: str = "window") -> Optional[CaptureContext]:
+        """Cached context for a window, if any"""
+        return self._contexts.get((hwnd, slot))
+    
+    def __len__(self):
+        return len(self._contexts)
+    
+    def _discard(self, key):
+        context = self._contexts.pop(key, None)
+        if context is None:
+            return
+        try:
+            self.backend.release_context(context)
+        except Exception as e:
+            self.logger.debug(f"Failed to release capture context {context}: {e}")
@@ -0,0 +1,170 @@
+"""
+Capture Strategy - Remembers which capture method works for which kind of window
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# (method name, PrintWindow flag or None)
+CaptureMethod = Tuple[str, Optional[int]]
+
+# Order used for windows we know nothing about - same as the historical fallback chain
+DEFAULT_CAPTURE_METHODS: List[CaptureMethod] = [
+    ("printwindow", 3),  # PW_RENDERFULLCONTENT
+    ("printwindow", 2),  # PW_CLIENTONLY
+    ("printwindow", 1),  # PW_PRINTCLIENT
+    ("printwindow", 0),  # Default
+    ("bitblt", None),
+    ("getdibits", None),
+    ("printwindow_client", 3),
+    ("printwindow_client", 2),
+    ("printwindow_client", 1),
+    ("printwindow_client", 0),
+    ("mss_client", None),
+    ("mss_window", None),
+]
+
+def method_label(method: CaptureMethod) -> str:
+    """Readable method id, e.g. 'printwindow:3' or 'bitblt'"""
+    name, flag = method
+    return name if flag is None else f"{name}:{flag}"
+
+class CaptureMethodStats:
+    """Attempt/success/latency counters for one capture method on one window kind"""
+    
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.total_latency = 0.0
+        self.last_success_at = None
+    
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+    
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.attempts if self.attempts else 0.0
+    
+    def to_dict(self) -> Dict:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "success_rate": round(self.success_rate, 3),
+            "avg_latency_ms": round(self.average_latency * 1000, 2),
+            "last_success_at": self.last_success_at
+        }
+
+class CaptureStrategy:
+    """Orders capture methods per window kind (process name + window class) by past results"""
+    
+    def __init__(self, methods: Optional[List[CaptureMethod]] = None):
+        self.methods = list(methods or DEFAULT_CAPTURE_METHODS)
+        self._stats: Dict[Tuple[str, str], Dict[CaptureMethod, CaptureMethodStats]] = {}
+        self._preferred: Dict[Tuple[str, str], CaptureMethod] = {}
+        self._lock = threading.Lock()
+    
+    def order(self, window_key: Tuple[str, str]) -> List[CaptureMethod]:
+        """Methods to try for this window kind, most promising first"""
+        with self._lock:
+            stats = self._stats.get(window_key, {})
+            preferred = self._preferred.get(window_key)
+            
+            def rank(item):
+                index, method = item
+                method_stats = stats.get(method)
+                if method_stats is None or method_stats.attempts == 0:
+                    # Untried methods keep the default order, after the proven ones
+                    return (1, 0.0, index)
+                if method_stats.successes == 0:
+                    # Methods that never worked for this window kind go last
+                    return (2, 0.0, index)
+                return (0, -method_stats.success_rate, index)
+                
+            ordered = [method for _, method in sorted(enumerate(self.methods), key=rank)]
+            if preferred in ordered:
+                ordered.remove(preferred)
+                ordered.insert(0, preferred)
+            return ordered
+    
+    def record(self, window_key: Tuple[str, str], method: CaptureMethod, success: bool, latency: float):
+        """Record the outcome of one capture attempt"""
+        with self._lock:
+            method_stats = self._stats.setdefault(window_key, {}).setdefault(method, CaptureMethodStats())
+            method_stats.attempts += 1
+            method_stats.total_latency += latency
+            if success:
+                method_stats.successes += 1
+                method_stats.last_success_at = time.time()
+                self._preferred[window_key] = method
+            elif self._preferred.get(window_key) == method:
+                # Last known good method stopped working - fall back to ranking
+                del self._preferred[window_key]
+    
+    def get_statistics(self) -> Dict:
+        """Per window kind: preferred method and counters of every tried method"""
+        with self._lock:
+            result = {}
+            for window_key, methods in self._stats.items():
+                preferred = self._preferred.get(window_key)
+                result[" | ".join(window_key)] = {
+                    "preferred": method_label(preferred) if preferred else None,
+                    "methods": {method_label(method): stats.to_dict() for method, stats in methods.items()}
+                }
+            return result
+    
+    def reset(self, window_key: Optional[Tuple[str, str]] = None):
+        """Forget what was learned (for one window kind or everything)"""
+        with self._lock:
+            if window_key is None:
+                self._stats.clear()
+                self._preferred.clear()
+            else:
+                self._stats.pop(window_key, None)
+                self._preferred.pop(window_key, None)
+
+# Methods that render the window's own content, regardless of what covers it on screen
+OFFSCREEN_CAPTURE_METHODS = {"printwindow", "printwindow_client", "minimized_printwindow"}
+
+# Methods that read pixels from the screen, so covering windows end up in the frame
+# (BitBlt and GetDIBits copy from the window DC, which holds the composed screen pixels)
+SCREEN_CAPTURE_METHODS = {"bitblt", "getdibits", "mss_client", "mss_window"}
+
+class WindowHidingPolicy:
+    """Decides when other windows (or our own main window) have to be hidden for a capture"""
+    
+    MODES = ("auto", "always", "never")
+    
+    def __init__(self, mode: str = "auto", settle_delay: float = 0.05, restore_timeout: float = 0.5):
+        """
+        Args:
+            mode: "auto" - hide only what actually covers a screen-area capture,
+                  "always" - hide all other windows for every application capture (old behaviour),
+                  "never" - never hide anything
+            settle_delay: Time for the compositor to drop a window we just hid
+            restore_timeout: Maximum wait for a minimized window to finish restoring
+        """
+        self.mode = mode if mode in self.MODES else "auto"
+        self.settle_delay = settle_delay
+        self.restore_timeout = restore_timeout
+    
+    def hide_all_before_capture(self) -> bool:
+        """Hide every other window once, before any capture method runs"""
+        return self.mode == "always"
+    
+    def requires_hiding(self, method: CaptureMethod, occluded: bool) -> bool:
+        """Whether windows covering the target must be hidden for this capture method"""
+        if self.mode != "auto":
+            return False
+        return method[0] in SCREEN_CAPTURE_METHODS and occluded
+    
+    def requires_main_window_withdraw(self, screenshot_type: str) -> bool:
+        """Whether our own window has to be hidden for this kind of screenshot"""
+        if self.mode == "never":
+            return False
+        if self.mode == "always":
+            return True
+        # Application captures render the target window off-screen (and hide
+        # covering windows themselves if they fall back to a screen-pixel grab)
+        return screenshot_type not in ("app", "application")
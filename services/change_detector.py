@@ -0,0 +1,153 @@
+"""
+Change Detector - Skips analysis of frames that did not change since the last analyzed one
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .frame import Frame
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, strided sampling over a memoryview is used instead
+    np = None
+
+# Rectangle in frame coordinates: (x, y, width, height)
+Region = Tuple[int, int, int, int]
+
+class FrameChangeDetector:
+    """Compares a block-wise luminance signature of each frame with the last accepted frame"""
+    
+    def __init__(self, grid_columns: int = 32, grid_rows: int = 18, samples_per_block: int = 4,
+                 block_threshold: float = 12.0, min_changed_fraction: float = 0.01,
+                 max_unchanged_seconds: float = 60.0, use_numpy: bool = True):
+        """
+        Args:
+            grid_columns: Number of signature blocks per row (per region)
+            grid_rows: Number of signature block rows (per region)
+            samples_per_block: Sampled pixels per block side (samples_per_block^2 pixels per block)
+            block_threshold: Mean luminance difference (0-255) for a block to count as changed
+            min_changed_fraction: Share of changed blocks needed to treat the frame as changed
+            max_unchanged_seconds: Accept a frame anyway after this long without changes (0 - never)
+            use_numpy: Use NumPy when it is installed
+        """
+        self.logger = logging.getLogger(__name__)
+        self.grid_columns = grid_columns
+        self.grid_rows = grid_rows
+        self.samples_per_block = samples_per_block
+        self.block_threshold = block_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.max_unchanged_seconds = max_unchanged_seconds
+        self.use_numpy = use_numpy and np is not None
+        self._references: Dict[str, Tuple[List[float], float]] = {}
+        self.last_report: Dict = {}
+    
+    def has_changed(self, frame: Frame, key: str = "default", regions: Optional[List[Region]] = None) -> bool:
+        """Check the frame against the last accepted one; a changed frame becomes the new reference
+        
+        Args:
+            frame: Captured frame
+            key: Capture source (frames of different sources are never compared)
+            regions: Only compare these rectangles of the frame
+        """
+        signature = self.signature(frame, regions)
+        reference = self._references.get(key)
+        now = time.time()
+        report = {"key": key, "blocks": len(signature), "changed_fraction": 1.0, "changed": True, "reason": None}
+        
+        if reference is None:
+            report["reason"] = "no reference"
+        elif len(reference[0]) != len(signature):
+            report["reason"] = "layout changed"
+        else:
+            changed_blocks = sum(
+                1 for old, new in zip(reference[0], signature) if abs(old - new) > self.block_threshold
+            )
+            report["changed_fraction"] = changed_blocks / len(signature) if signature else 0.0
+            if report["changed_fraction"] >= self.min_changed_fraction:
+                report["reason"] = "content changed"
+            elif self.max_unchanged_seconds and now - reference[1] >= self.max_unchanged_seconds:
+                report["reason"] = "refresh"
+            else:
+                report["changed"] = False
+                report["reason"] = "unchanged"
+                
+        if report["changed"]:
+            self._references[key] = (signature, now)
+        self.last_report = report
+        self.logger.debug(f"Change check [{key}]: {report['reason']}, changed={report['changed_fraction']:.2%}")
+        return report["changed"]
+    
+    def remember(self, frame: Frame, key: str = "default", regions: Optional[List[Region]] = None):
+        """Make the frame the reference without checking it (e.g. after a manual screenshot)"""
+        self._references[key] = (self.signature(frame, regions), time.time())
+    
+    def reset(self, key: Optional[str] = None):
+        """Forget the reference frame so the next frame is always treated as changed"""
+        if key is None:
+            self._references.clear()
+        else:
+            self._references.pop(key, None)
+    
+    def signature(self, frame: Frame, regions: Optional[List[Region]] = None) -> List[float]:
+        """Mean luminance of every block of the frame (or of each region)"""
+        if not regions:
+            regions = [(0, 0, frame.width, frame.height)]
+            
+        signature = []
+        for x, y, width, height in regions:
+            # Clamp region to the frame
+            left, top = max(0, x), max(0, y)
+            right, bottom = min(frame.width, x + width), min(frame.height, y + height)
+            if right <= left or bottom <= top:
+                continue
+            columns = max(1, min(self.grid_columns, right - left))
+            rows = max(1, min(self.grid_rows, bottom - top))
+            xs = self._grid(left, right, columns * self.samples_per_block)
+            ys = self._grid(top, bottom, rows * self.samples_per_block)
+            if self.use_numpy:
+                signature.extend(self._blocks_numpy(frame, xs, ys, columns, rows))
+            else:
+                signature.extend(self._blocks_python(frame, xs, ys, columns, rows))
+        return signature
+    
+    @staticmethod
+    def _grid(start: int, end: int, count: int) -> List[int]:
+        """Evenly spaced sample coordinates centred in their cells"""
+        length = end - start
+        count = max(1, min(count, length))
+        return [start + int((i + 0.5) * length / count) for i in range(count)]
+    
+    def _blocks_numpy(self, frame: Frame, xs: List[int], ys: List[int], columns: int, rows: int) -> List[float]:
+        """Block means with NumPy; only the sampled pixels are copied"""
+        pixels = np.frombuffer(frame.data, dtype=np.uint8, count=frame.width * frame.height * 4)
+        pixels = pixels.reshape(frame.height, frame.width, 4)
+        sampled = pixels[np.ix_(ys, xs)][..., :3].astype(np.float32)
+        # BGR -> luminance
+        luma = sampled[..., 0] * 0.114 + sampled[..., 1] * 0.587 + sampled[..., 2] * 0.299
+        
+        # Same block boundaries as the pure-Python path
+        row_blocks = np.arange(len(ys)) * rows // len(ys)
+        column_blocks = np.arange(len(xs)) * columns // len(xs)
+        row_starts = np.flatnonzero(np.diff(row_blocks, prepend=-1))
+        column_starts = np.flatnonzero(np.diff(column_blocks, prepend=-1))
+        sums = np.add.reduceat(np.add.reduceat(luma, row_starts, axis=0), column_starts, axis=1)
+        counts = np.outer(np.bincount(row_blocks, minlength=rows), np.bincount(column_blocks, minlength=columns))
+        return (sums / counts).ravel().tolist()
+    
+    def _blocks_python(self, frame: Frame, xs: List[int], ys: List[int], columns: int, rows: int) -> List[float]:
+        """Block means with strided reads over a memoryview"""
+        view = memoryview(frame.data)
+        stride = frame.stride
+        sums = [0.0] * (columns * rows)
+        counts = [0] * (columns * rows)
+        for row_index, y in enumerate(ys):
+            block_row = row_index * rows // len(ys)
+            row = view[y * stride:(y + 1) * stride]
+            for column_index, x in enumerate(xs):
+                block = block_row * columns + column_index * columns // len(xs)
+                offset = x * 4
+                sums[block] += row[offset] * 0.114 + row[offset + 1] * 0.587 + row[offset + 2] * 0.299
+                counts[block] += 1
+        return [total / count if count else 0.0 for total, count in zip(sums, counts)]
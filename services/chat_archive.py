@@ -0,0 +1,182 @@
+"""
+Chat Archive - Retention policy for chat history and gzip-compressed archive segments for the messages it evicts
+"""
+
+import gzip
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils import json_codec
+
+from .chat_storage import chat_file_name
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+# After an eviction a chat is down to this share of its limits, so evictions come in batches
+# (one archive segment and one storage rewrite per batch, not per new message)
+TARGET_SHARE = 0.9
+
+def _content_size(message: Dict) -> int:
+    return len((message.get("content") or "").encode("utf-8"))
+
+def _sent_before(message: Dict, cutoff: datetime) -> bool:
+    try:
+        return datetime.fromisoformat(message.get("timestamp") or "") < cutoff
+    except ValueError:
+        return False
+
+class RetentionPolicy:
+    """How much history a chat keeps in storage; the oldest messages beyond it go to the archive
+    
+    Limits apply to every chat on its own; 0 means no limit. The newest
+    message always stays in storage.
+    """
+    
+    def __init__(self, max_messages: int = 0, max_age_hours: float = 0, max_bytes: int = 0):
+        """
+        Args:
+            max_messages: Most messages kept in storage
+            max_age_hours: Messages older than this are archived
+            max_bytes: Most bytes of message text kept in storage
+        """
+        self.max_messages = max(0, max_messages)
+        self.max_age = timedelta(hours=max_age_hours) if max_age_hours > 0 else None
+        self.max_bytes = max(0, max_bytes)
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_messages or self.max_age or self.max_bytes)
+    
+    def exceeded(self, count: int, size: int = 0, oldest: Optional[Dict] = None, now: Optional[datetime] = None) -> bool:
+        """Whether a chat of `count` messages with `size` bytes of text and its oldest message is over a limit"""
+        if count <= 1:
+            return False
+        if self.max_messages and count > self.max_messages:
+            return True
+        if self.max_bytes and size > self.max_bytes:
+            return True
+        return bool(self.max_age and oldest and _sent_before(oldest, (now or datetime.now()) - self.max_age))
+    
+    def evict_count(self, messages: List[Dict], count: int, size: int = 0, now: Optional[datetime] = None) -> int:
+        """How many of the oldest messages to archive
+        
+        Args:
+            messages: The chat's oldest messages, oldest first (all but the newest is enough)
+            count: Messages in the chat
+            size: Bytes of message text in the chat
+        """
+        max_count = int(self.max_messages * TARGET_SHARE)
+        max_size = int(self.max_bytes * TARGET_SHARE)
+        cutoff = (now or datetime.now()) - self.max_age * TARGET_SHARE if self.max_age else None
+        evicted = 0
+        for message in messages[:count - 1]:
+            over = (
+                (self.max_messages and count - evicted > max_count)
+                or (self.max_bytes and size > max_size)
+                or (cutoff and _sent_before(message, cutoff))
+            )
+            if not over:
+                break
+            evicted += 1
+            size -= _content_size(message)
+        return evicted
+
+class ChatArchive:
+    """Messages evicted from chat storage, as gzip-compressed JSON Lines segments on disk
+    
+    Every eviction of a chat writes one segment <directory>/<chat>/<first>_<end>.jsonl.gz
+    with the messages at positions [first, end) of the chat (positions count
+    archived messages too). Segments are only read on demand - when the chat
+    is scrolled back that far or exported - and the last few read are cached.
+    """
+    
+    def __init__(self, directory: Path, cache_segments: int = 4):
+        """
+        Args:
+            directory: Directory with an archive subdirectory per chat
+            cache_segments: Decompressed segments kept in memory
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory)
+        self.cache_segments = cache_segments
+        self._cache: "OrderedDict[Path, List[Dict]]" = OrderedDict()
+    
+    def _chat_dir(self, chat_id: str) -> Path:
+        return self.directory / chat_file_name(chat_id)
+    
+    def segments(self, chat_id: str) -> List[Tuple[int, int, Path]]:
+        """(first, end, path) of the chat's segments, oldest first"""
+        chat_dir = self._chat_dir(chat_id)
+        if not chat_dir.is_dir():
+            return []
+        segments = []
+        for path in chat_dir.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                first, end = (int(part) for part in path.name[:-len(SEGMENT_SUFFIX)].split("_"))
+            except ValueError:
+                continue
+            segments.append((first, end, path))
+        segments.sort()
+        return segments
+    
+    def write_segment(self, chat_id: str, first: int, messages: List[Dict]):
+        """Archive messages that start at position `first` of the chat
+        
+        The segment is complete on disk before the messages are removed from
+        storage. If that removal never happened (a crash in between), the next
+        eviction starts at the same position and replaces the segment.
+        """
+        if not messages:
+            return
+        chat_dir = self._chat_dir(chat_id)
+        chat_dir.mkdir(parents=True, exist_ok=True)
+        for segment_first, _, path in self.segments(chat_id):
+            if segment_first >= first:
+                path.unlink()
+                self._cache.pop(path, None)
+                
+        path = chat_dir / f"{first:09d}_{first + len(messages):09d}{SEGMENT_SUFFIX}"
+        temp = path.with_name(path.name + ".tmp")
+        data = b"".join(json_codec.dumpb(message) + b"\n" for message in messages)
+        with open(temp, "wb") as f:
+            f.write(gzip.compress(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+        self.logger.info(f"Archived {len(messages)} messages of chat {chat_id} to {path.name}")
+    
+    def read(self, chat_id: str, start: int, end: int) -> List[Dict]:
+        """Archived messages at positions [start, end) of the chat, in chronological order"""
+        messages = []
+        for first, segment_end, path in self.segments(chat_id):
+            if segment_end <= start or first >= end:
+                continue
+            segment = self._read_segment(path)
+            messages.extend(segment[max(start, first) - first:min(end, segment_end) - first])
+        return messages
+    
+    def _read_segment(self, path: Path) -> List[Dict]:
+        segment = self._cache.get(path)
+        if segment is None:
+            with open(path, "rb") as f:
+                data = gzip.decompress(f.read())
+            segment = [json_codec.loads(line) for line in data.splitlines() if line.strip()]
+            self._cache[path] = segment
+            if len(self._cache) > self.cache_segments:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(path)
+        return segment
+    
+    def delete_chat(self, chat_id: str):
+        """Remove everything archived for the chat"""
+        chat_dir = self._chat_dir(chat_id)
+        for path in list(self._cache):
+            if path.parent == chat_dir:
+                del self._cache[path]
+        shutil.rmtree(chat_dir, ignore_errors=True)
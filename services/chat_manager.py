@@ -4,7 +4,6 @@ Chat Manager Service
 Управление чатами, сохранение и загрузка истории
 """
 
-import json
 import os
 import sys
 import logging
@@ -12,15 +11,24 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
+from utils import json_codec
+
+from .chat_archive import ChatArchive, RetentionPolicy
+from .chat_storage import ChatStorage, JournalChatStorage, SQLiteChatStorage, _page_bounds
+
 class ChatManager:
     """Менеджер для управления чатами и их сохранения"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", compact_min_ops: int = 50, backend: str = "journal",
+                 retention: Optional[RetentionPolicy] = None):
         """
         Инициализация менеджера чатов
         
         Args:
             data_dir: Директория для хранения данных
+            compact_min_ops: Сколько устаревших записей журнала чата допускается до его сжатия
+            backend: Хранилище чатов: "journal" (файл-журнал на чат) или "sqlite" (data/chats.db)
+            retention: Сколько истории чат держит в хранилище; старые сообщения уходят в архив (по умолчанию - без ограничений)
         """
         self.logger = logging.getLogger(__name__)
         
@@ -33,40 +41,79 @@ class ChatManager:
             # Running as Python script
             self.data_dir = Path(data_dir)
         
+        # Старый формат: все чаты в одном файле, переписываемом при каждом изменении
         self.chats_file = self.data_dir / "chats.json"
         
         # Создаем директорию если не существует
         self.data_dir.mkdir(exist_ok=True)
         
-        # Загружаем существующие чаты
-        self.chats = self._load_chats()
+        self.journals_dir = self.data_dir / "chats"
+        self.compact_min_ops = compact_min_ops
+        self.storage = self._create_storage(backend)
+        
+        # Вытесненные политикой хранения сообщения - сжатые сегменты в data/archive, читаются по требованию
+        self.retention = retention or RetentionPolicy()
+        self.archive = ChatArchive(self.data_dir / "archive")
+        
+        # Переносим чаты из прежнего хранилища, если новое только что создано
+        self._load_chats()
         
         self.logger.info(f"ChatManager initialized. Data directory: {self.data_dir}")
     
-    def _load_chats(self) -> Dict[str, Dict]:
-        """Загрузить чаты из файла"""
+    def _create_storage(self, backend: str) -> ChatStorage:
+        """Создать хранилище по настройке [storage] backend"""
+        if backend == "sqlite":
+            # Индексированные запросы, чаты не держатся в памяти
+            return SQLiteChatStorage(self.data_dir / "chats.db")
+        if backend != "journal":
+            self.logger.warning(f"Unknown chat storage backend '{backend}', using journal")
+        # Каждый чат - отдельный журнал, новое сообщение дописывается одной строкой
+        return JournalChatStorage(self.journals_dir, compact_min_ops=self.compact_min_ops)
+    
+    def _load_chats(self):
+        """Перенести чаты в новое хранилище: из журналов (для SQLite) или из старого chats.json"""
         try:
-            if self.chats_file.exists():
-                with open(self.chats_file, 'r', encoding='utf-8') as f:
-                    chats = json.load(f)
-                    self.logger.info(f"Loaded {len(chats)} chats from {self.chats_file}")
-                    return chats
-            else:
-                self.logger.info("No existing chats file found, starting with empty chats")
-                return {}
+            if self.storage.created:
+                if isinstance(self.storage, SQLiteChatStorage) and self.journals_dir.exists():
+                    self._migrate_journals()
+                elif self.chats_file.exists():
+                    self._migrate_chats_file()
+                
+            self.logger.info(f"Loaded {self.storage.count_chats()} chats from {self.storage.path}")
         except Exception as e:
             self.logger.error(f"Error loading chats: {e}")
-            return {}
     
-    def _save_chats(self):
-        """Сохранить чаты в файл"""
+    def _migrate_chats_file(self):
+        """Перенести чаты из старого chats.json в хранилище"""
+        with open(self.chats_file, 'rb') as f:
+            chats = json_codec.loads(f.read())
+            
+        self.storage.import_chats(chats)
+        # Старый файл сохраняется рядом на случай отката
+        self.chats_file.replace(self.chats_file.with_suffix(".json.migrated"))
+        self.logger.info(f"Migrated {len(chats)} chats from {self.chats_file} to {self.storage.path}")
+    
+    def _migrate_journals(self):
+        """Перенести чаты из журналов в SQLite (журналы остаются для возврата к backend = journal)"""
+        chats = JournalChatStorage(self.journals_dir, compact_min_ops=self.compact_min_ops).get_all_chats()
+        self.storage.import_chats(chats)
+        self.logger.info(f"Migrated {len(chats)} chats from {self.journals_dir} to {self.storage.path}")
+    
+    def _persist(self, operation, *args):
+        """Записать изменение в хранилище"""
         try:
-            with open(self.chats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.chats, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"Saved {len(self.chats)} chats to {self.chats_file}")
+            operation(*args)
         except Exception as e:
             self.logger.error(f"Error saving chats: {e}")
     
+    def compact(self):
+        """Освободить место, занятое устаревшими данными хранилища"""
+        self._persist(self.storage.compact)
+    
+    def close(self):
+        """Закрыть хранилище"""
+        self.storage.close()
+    
     def create_chat(self, chat_id: str, name: str = None) -> Dict:
         """
         Создать новый чат
@@ -78,12 +125,12 @@ class ChatManager:
         Returns:
             Словарь с данными чата
         """
-        if chat_id in self.chats:
+        if self.storage.has_chat(chat_id):
             self.logger.warning(f"Chat {chat_id} already exists")
-            return self.chats[chat_id]
+            return self.storage.get_chat(chat_id)
         
         if not name:
-            name = f"Chat {len(self.chats) + 1}"
+            name = f"Chat {self.storage.count_chats() + 1}"
         
         chat_data = {
             "id": chat_id,
@@ -93,35 +140,23 @@ class ChatManager:
             "messages": []
         }
         
-        self.chats[chat_id] = chat_data
-        self._save_chats()
+        self._persist(self.storage.create_chat, chat_data)
         
         self.logger.info(f"Created new chat: {chat_id} - {name}")
         return chat_data
     
     def get_chat(self, chat_id: str) -> Optional[Dict]:
         """Получить чат по ID"""
-        return self.chats.get(chat_id)
+        return self.storage.get_chat(chat_id)
     
     def get_all_chats(self) -> Dict[str, Dict]:
-        """Получить все чаты"""
-        return self.chats.copy()
+        """Получить все чаты (вместе с сообщениями)"""
+        return self.storage.get_all_chats()
     
     def get_chat_list(self) -> List[Dict]:
         """Получить список чатов для отображения"""
-        chat_list = []
-        for chat_id, chat_data in self.chats.items():
-            chat_list.append({
-                "id": chat_id,
-                "name": chat_data["name"],
-                "created_at": chat_data["created_at"],
-                "updated_at": chat_data["updated_at"],
-                "message_count": len(chat_data["messages"])
-            })
-        
-        # Сортируем по времени обновления (новые сверху)
-        chat_list.sort(key=lambda x: x["updated_at"], reverse=True)
-        return chat_list
+        # Сортировка по времени обновления (новые сверху)
+        return self.storage.get_chat_list()
     
     def add_message(self, chat_id: str, message: Dict):
         """
@@ -131,7 +166,7 @@ class ChatManager:
             chat_id: ID чата
             message: Словарь с данными сообщения
         """
-        if chat_id not in self.chats:
+        if not self.storage.has_chat(chat_id):
             self.logger.error(f"Chat {chat_id} not found")
             return
         
@@ -141,56 +176,121 @@ class ChatManager:
         
         # Добавляем ID сообщения если его нет
         if "id" not in message:
-            message["id"] = f"msg_{len(self.chats[chat_id]['messages'])}"
-        
-        self.chats[chat_id]["messages"].append(message)
-        self.chats[chat_id]["updated_at"] = datetime.now().isoformat()
+            message["id"] = f"msg_{self.get_message_count(chat_id)}"
         
-        self._save_chats()
+        # Одна запись в хранилище вместо перезаписи всей истории
+        self._persist(self.storage.add_message, chat_id, message, datetime.now().isoformat())
         self.logger.debug(f"Added message to chat {chat_id}")
     
-    def get_messages(self, chat_id: str) -> List[Dict]:
-        """Получить все сообщения чата"""
-        if chat_id not in self.chats:
+        if self.retention.enabled:
+            self._persist(self._apply_retention, chat_id)
+    
+    def _apply_retention(self, chat_id: str):
+        """Перенести самые старые сообщения чата в архив, если чат вышел за пределы политики хранения"""
+        policy = self.retention
+        count = self.storage.count_messages(chat_id)
+        size = self.storage.content_size(chat_id) if policy.max_bytes else 0
+        oldest = self.storage.get_messages(chat_id, before=1, limit=1) if policy.max_age else []
+        if not policy.exceeded(count, size, oldest[0] if oldest else None):
+            return
+            
+        # Проверка дешевая и идет на каждое сообщение; чтение и перенос - раз в пакет
+        candidates = self.storage.get_messages(chat_id, before=count - 1, limit=count - 1)
+        evict = policy.evict_count(candidates, count, size)
+        if not evict:
+            return
+        # Сначала сегмент архива, затем удаление из хранилища - сбой между ними не теряет сообщений
+        self.archive.write_segment(chat_id, self.storage.count_archived(chat_id), candidates[:evict])
+        self.storage.drop_oldest(chat_id, evict)
+        self.logger.info(f"Archived {evict} oldest messages of chat {chat_id}, {count - evict} left in storage")
+    
+    def get_messages(self, chat_id: str, before: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Получить сообщения чата (все или страницу)
+        
+        Позиции считаются с начала чата вместе с архивными сообщениями и не
+        меняются при переносе в архив; архивные сообщения читаются из архива.
+        
+        Args:
+            chat_id: ID чата
+            before: Позиция (номер с начала чата), до которой берутся сообщения; по умолчанию - до конца
+            limit: Сколько последних сообщений перед before вернуть; по умолчанию - все
+            
+        Returns:
+            Сообщения в хронологическом порядке
+        """
+        archived = self.storage.count_archived(chat_id)
+        if not archived:
+            return self.storage.get_messages(chat_id, before=before, limit=limit)
+            
+        start, end = _page_bounds(archived + self.storage.count_messages(chat_id), before, limit)
+        messages = self.archive.read(chat_id, start, min(end, archived)) if start < archived else []
+        if end > archived:
+            stored_start = max(start, archived) - archived
+            messages += self.storage.get_messages(chat_id, before=end - archived, limit=end - archived - stored_start)
+        return messages
+    
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """
+        Найти сообщения, содержащие все слова запроса
+        
+        Регистр и "ё"/"е" не различаются, окончания слов отбрасываются
+        ("карты" находит "карта" и "картой").
+        
+        Args:
+            query: Поисковый запрос
+            limit: Максимальное число результатов
+            
+        Returns:
+            Найденные сообщения, новые сверху: {chat_id, chat_name, message_id, position,
+            sender, timestamp, snippet}; архивные сообщения не ищутся
+        """
+        try:
+            hits = self.storage.search(query, limit)
+            # Позиции в хранилище -> позиции в чате
+            archived = {}
+            for hit in hits:
+                if hit["chat_id"] not in archived:
+                    archived[hit["chat_id"]] = self.storage.count_archived(hit["chat_id"])
+                hit["position"] += archived[hit["chat_id"]]
+            return hits
+        except Exception as e:
+            self.logger.error(f"Error searching chats: {e}")
             return []
-        return self.chats[chat_id]["messages"].copy()
+    
+    def get_message_count(self, chat_id: str) -> int:
+        """Количество сообщений в чате (вместе с архивными)"""
+        return self.storage.count_messages(chat_id) + self.storage.count_archived(chat_id)
     
     def update_chat_name(self, chat_id: str, new_name: str):
         """Обновить название чата"""
-        if chat_id not in self.chats:
+        if not self.storage.has_chat(chat_id):
             self.logger.error(f"Chat {chat_id} not found")
             return
         
-        old_name = self.chats[chat_id]["name"]
-        self.chats[chat_id]["name"] = new_name
-        self.chats[chat_id]["updated_at"] = datetime.now().isoformat()
-        
-        self._save_chats()
-        self.logger.info(f"Updated chat {chat_id} name: '{old_name}' -> '{new_name}'")
+        self._persist(self.storage.rename_chat, chat_id, new_name, datetime.now().isoformat())
+        self.logger.info(f"Updated chat {chat_id} name: '{new_name}'")
     
     def delete_chat(self, chat_id: str):
         """Удалить чат"""
-        if chat_id not in self.chats:
+        if not self.storage.has_chat(chat_id):
             self.logger.error(f"Chat {chat_id} not found")
             return
         
-        chat_name = self.chats[chat_id]["name"]
-        del self.chats[chat_id]
-        self._save_chats()
+        self._persist(self.storage.delete_chat, chat_id)
+        self._persist(self.archive.delete_chat, chat_id)
         
-        self.logger.info(f"Deleted chat {chat_id} - {chat_name}")
+        self.logger.info(f"Deleted chat {chat_id}")
     
     def clear_chat_messages(self, chat_id: str):
         """Очистить все сообщения в чате"""
-        if chat_id not in self.chats:
+        if not self.storage.has_chat(chat_id):
             self.logger.error(f"Chat {chat_id} not found")
             return
         
-        message_count = len(self.chats[chat_id]["messages"])
-        self.chats[chat_id]["messages"] = []
-        self.chats[chat_id]["updated_at"] = datetime.now().isoformat()
-        
-        self._save_chats()
+        message_count = self.get_message_count(chat_id)
+        self._persist(self.storage.clear_messages, chat_id, datetime.now().isoformat())
+        self._persist(self.archive.delete_chat, chat_id)
         self.logger.info(f"Cleared {message_count} messages from chat {chat_id}")
     
     def export_chat(self, chat_id: str, format: str = "json") -> str:
@@ -204,19 +304,24 @@ class ChatManager:
         Returns:
             Путь к экспортированному файлу
         """
-        if chat_id not in self.chats:
+        chat_data = self.storage.get_chat(chat_id)
+        if not chat_data:
             self.logger.error(f"Chat {chat_id} not found")
             return None
+        if self.storage.count_archived(chat_id):
+            # Экспорт - полная история, вместе с архивом
+            chat_data = dict(chat_data, messages=self.get_messages(chat_id))
+            chat_data.pop("archived", None)
         
-        chat_data = self.chats[chat_id]
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         if format == "json":
             filename = f"chat_{chat_id}_{timestamp}.json"
             filepath = self.data_dir / filename
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(chat_data, f, ensure_ascii=False, indent=2)
+            # Export is meant to be read - keep it indented
+            with open(filepath, 'wb') as f:
+                f.write(json_codec.dumpb(chat_data, pretty=True))
         
         elif format == "txt":
             filename = f"chat_{chat_id}_{timestamp}.txt"
@@ -240,13 +345,15 @@ class ChatManager:
     
     def get_stats(self) -> Dict:
         """Получить статистику чатов"""
-        total_chats = len(self.chats)
-        total_messages = sum(len(chat["messages"]) for chat in self.chats.values())
+        total_chats = self.storage.count_chats()
+        total_messages = self.storage.count_messages()
+        archived_messages = self.storage.count_archived()
         
         return {
             "total_chats": total_chats,
-            "total_messages": total_messages,
+            "total_messages": total_messages + archived_messages,
+            "archived_messages": archived_messages,
             "data_directory": str(self.data_dir),
-            "chats_file": str(self.chats_file)
+            "chats_file": str(self.storage.path)
         }
 
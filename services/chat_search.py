@@ -0,0 +1,112 @@
+"""
+Chat Search - Russian-aware text normalization and an incremental inverted index over chat messages
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+WORD = re.compile(r"\w+")
+
+# Characters of context around the first match in a snippet
+SNIPPET_WIDTH = 120
+
+# Light stemming: the longest of these endings is cut off if at least MIN_STEM characters remain.
+# Covers the common noun, adjective and verb endings - enough to match "карта", "карты" and "картой".
+RUSSIAN_ENDINGS = sorted((
+    "иями", "ями", "ами", "ыми", "ими", "ого", "его", "ому", "ему", "ией", "ием",
+    "ешь", "ишь", "ете", "ите", "ает", "яет", "ует", "ают", "яют", "уют", "ала", "яла", "ило", "ила",
+    "ая", "яя", "ое", "ее", "ые", "ие", "ый", "ий", "ой", "ей", "ую", "юю", "ам", "ям", "ах", "ях",
+    "ом", "ем", "ов", "ев", "ми", "ть", "ет", "ит", "ут", "ют", "ат", "ят", "ал", "ял", "ил", "ла", "ло", "ли",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+), key=len, reverse=True)
+ENGLISH_ENDINGS = ("ing", "ed", "es", "s")
+MIN_STEM = 3
+
+CYRILLIC = re.compile(r"[а-я]")
+
+def normalize(text: str) -> str:
+    """Case-fold and treat "ё" as "е" """
+    return text.casefold().replace("ё", "е")
+
+@lru_cache(maxsize=100000)
+def stem(word: str) -> str:
+    """Stem of a normalized word"""
+    endings = RUSSIAN_ENDINGS if CYRILLIC.search(word) else ENGLISH_ENDINGS
+    for ending in endings:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+def terms(text: str) -> List[str]:
+    """Index terms of a text, in order"""
+    return [stem(word) for word in WORD.findall(normalize(text))]
+
+def make_snippet(text: str, query_terms: Set[str], width: int = SNIPPET_WIDTH) -> str:
+    """Part of the text around the first word matching the query, on one line"""
+    start, end = 0, min(len(text), width)
+    for match in WORD.finditer(text):
+        if stem(normalize(match.group())) in query_terms:
+            start = max(0, match.start() - width // 3)
+            end = min(len(text), start + width)
+            start = max(0, end - width)
+            break
+    snippet = " ".join(text[start:end].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+class MessageIndex:
+    """In-memory inverted index: term -> ids of the messages containing it
+    
+    Messages are added in chronological order, so a larger id is a newer
+    message and search() returns the newest hits without sorting by time.
+    Removed chats leave dead ids behind; `removed` tells when a rebuild pays off.
+    """
+    
+    def __init__(self):
+        self._postings: Dict[str, List[int]] = {}
+        self._docs: List[Optional[Tuple[str, int]]] = []
+        self._chat_docs: Dict[str, List[int]] = {}
+        self.removed = 0
+    
+    def __len__(self) -> int:
+        return len(self._docs) - self.removed
+    
+    def add(self, chat_id: str, position: int, text: str):
+        """Index the message at `position` in the chat"""
+        doc = len(self._docs)
+        self._docs.append((chat_id, position))
+        self._chat_docs.setdefault(chat_id, []).append(doc)
+        # Stem each distinct word once - long analysis texts repeat words a lot
+        postings = self._postings
+        for term in {stem(word) for word in set(WORD.findall(normalize(text)))}:
+            posting = postings.get(term)
+            if posting is None:
+                postings[term] = [doc]
+            else:
+                posting.append(doc)
+    
+    def remove_chat(self, chat_id: str):
+        for doc in self._chat_docs.pop(chat_id, ()):
+            self._docs[doc] = None
+            self.removed += 1
+    
+    def search(self, query_terms: Iterable[str], limit: int) -> List[Tuple[str, int]]:
+        """(chat_id, position) of messages containing all terms, newest first"""
+        postings = sorted((self._postings.get(term, ()) for term in set(query_terms)), key=len)
+        if not postings or not postings[0]:
+            return []
+            
+        found = set(postings[0])
+        for posting in postings[1:]:
+            found.intersection_update(posting)
+            if not found:
+                return []
+                
+        hits = []
+        for doc in sorted(found, reverse=True):
+            entry = self._docs[doc]
+            if entry:
+                hits.append(entry)
+                if len(hits) >= limit:
+                    break
+        return hits
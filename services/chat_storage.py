@@ -0,0 +1,743 @@
+"""
+Chat Storage - Storage backends behind ChatManager: append-only per-chat journals (JSON Lines) or SQLite
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils import json_codec
+
+from .chat_search import MessageIndex, make_snippet, terms
+
+JOURNAL_SUFFIX = ".jsonl"
+
+# Chat IDs that can be used as file names as they are (uuid4 and the like)
+SAFE_CHAT_ID = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+
+# Keys stored in their own SQLite columns; any other keys of a chat or message go to the "extra" JSON column
+CHAT_COLUMNS = ("id", "name", "created_at", "updated_at")
+MESSAGE_COLUMNS = ("id", "sender", "content", "timestamp")
+
+def chat_file_name(chat_id: str) -> str:
+    """File name for a chat's data: the ID itself if it is safe, otherwise its hash"""
+    if SAFE_CHAT_ID.match(chat_id):
+        return chat_id
+    return "chat_" + hashlib.sha1(chat_id.encode("utf-8")).hexdigest()
+
+def _page_bounds(total: int, before: Optional[int], limit: Optional[int]) -> tuple:
+    """Slice [start, end) of a chat's messages for get_messages(before, limit)"""
+    end = total if before is None else max(0, min(before, total))
+    start = 0 if limit is None else max(0, end - limit)
+    return start, end
+
+def _search_hit(chat_id: str, chat_name: str, position: int, message: Dict, query_terms: List[str]) -> Dict:
+    """Search result for a message at `position` in its chat"""
+    return {
+        "chat_id": chat_id,
+        "chat_name": chat_name,
+        "message_id": message.get("id"),
+        "position": position,
+        "sender": message.get("sender"),
+        "timestamp": message.get("timestamp"),
+        "snippet": make_snippet(message.get("content") or "", set(query_terms))
+    }
+
+class ChatStorage:
+    """Interface of a chat storage backend
+    
+    Chats are dicts {id, name, created_at, updated_at, messages} and messages
+    dicts {id, sender, content, timestamp, ...}, as ChatManager returns them.
+    """
+    
+    # True when the storage did not exist before, so data of an older storage can be imported into it
+    created = False
+    
+    @property
+    def path(self) -> Path:
+        raise NotImplementedError
+    
+    def is_empty(self) -> bool:
+        raise NotImplementedError
+    
+    def has_chat(self, chat_id: str) -> bool:
+        raise NotImplementedError
+    
+    def count_chats(self) -> int:
+        raise NotImplementedError
+    
+    def count_messages(self, chat_id: Optional[str] = None) -> int:
+        """Messages in one chat, or in all chats"""
+        raise NotImplementedError
+    
+    def count_archived(self, chat_id: Optional[str] = None) -> int:
+        """Messages moved out of one chat (or all chats) to the archive by drop_oldest()"""
+        raise NotImplementedError
+    
+    def content_size(self, chat_id: str) -> int:
+        """Bytes of message text (UTF-8) in a chat"""
+        raise NotImplementedError
+    
+    def get_chat(self, chat_id: str) -> Optional[Dict]:
+        """Chat with all its messages"""
+        raise NotImplementedError
+    
+    def get_all_chats(self) -> Dict[str, Dict]:
+        """All chats with their messages, in creation order"""
+        raise NotImplementedError
+    
+    def get_chat_list(self) -> List[Dict]:
+        """Chat summaries {id, name, created_at, updated_at, message_count}, most recently updated first"""
+        raise NotImplementedError
+    
+    def get_messages(self, chat_id: str, before: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Messages in chronological order; with before/limit only the last `limit` messages before position `before`
+        
+        Positions count the messages in storage from the oldest one. They shift
+        down when drop_oldest() removes messages and reset when the chat is cleared.
+        """
+        raise NotImplementedError
+    
+    def create_chat(self, chat: Dict):
+        raise NotImplementedError
+    
+    def import_chats(self, chats: Dict[str, Dict]):
+        """Add chats loaded from elsewhere (the old chats.json, another backend)"""
+        for chat in chats.values():
+            self.create_chat(chat)
+    
+    def add_message(self, chat_id: str, message: Dict, updated_at: str):
+        raise NotImplementedError
+    
+    def rename_chat(self, chat_id: str, name: str, updated_at: str):
+        raise NotImplementedError
+    
+    def clear_messages(self, chat_id: str, updated_at: str):
+        """Remove all messages; the archived count goes back to 0 as well"""
+        raise NotImplementedError
+    
+    def drop_oldest(self, chat_id: str, count: int):
+        """Remove the oldest `count` messages, already written to the archive, and add them to the archived count"""
+        raise NotImplementedError
+    
+    def delete_chat(self, chat_id: str):
+        raise NotImplementedError
+    
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """Messages containing every word of the query (case-insensitive, light stemming), newest first
+        
+        Hits are dicts {chat_id, chat_name, message_id, position, sender, timestamp, snippet};
+        position is the message's place in storage, as used by get_messages(before=...).
+        Archived messages are not searched.
+        """
+        raise NotImplementedError
+    
+    def compact(self):
+        """Reclaim space taken by obsolete data"""
+    
+    def close(self):
+        """Release files and connections"""
+
+class JournalChatStorage(ChatStorage):
+    """Keeps chats in memory and stores every chat as a journal of operations, one JSON object per line
+    
+    Adding a message appends one line to the chat's own file, so it costs the
+    same no matter how many chats and messages exist. Operations that make
+    earlier lines obsolete (rename, clear) are compacted away: the journal is
+    rewritten as a snapshot (a "chat" line followed by its messages) into a
+    temporary file and atomically swapped in with os.replace.
+    
+    Journal lines:
+        {"op": "chat", "chat": {id, name, created_at, updated_at}}
+        {"op": "message", "message": {...}, "updated_at": "..."}
+        {"op": "rename", "name": "...", "updated_at": "..."}
+        {"op": "clear", "updated_at": "..."}
+        
+    A line torn by a crash or power loss is skipped on load and cut off, so
+    later appends start on a clean line.
+    """
+    
+    def __init__(self, directory: Path, compact_min_ops: int = 50, fsync: bool = False):
+        """
+        Args:
+            directory: Directory with the chat journals
+            compact_min_ops: Obsolete lines a journal may hold before it is compacted
+            fsync: Force every append to disk (safer on power loss, slower)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory)
+        self.compact_min_ops = compact_min_ops
+        self.fsync = fsync
+        self._obsolete_ops: Dict[str, int] = {}
+        # Search index, built on the first search and then kept up to date
+        self._index: Optional[MessageIndex] = None
+        self.created = not self.directory.exists()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chats = self._load()
+    
+    @property
+    def path(self) -> Path:
+        return self.directory
+    
+    def _journal_path(self, chat_id: str) -> Path:
+        return self.directory / f"{chat_file_name(chat_id)}{JOURNAL_SUFFIX}"
+    
+    @staticmethod
+    def _encode(op: Dict) -> bytes:
+        return json_codec.dumpb(op) + b"\n"
+    
+    def _append(self, chat_id: str, op: Dict):
+        with open(self._journal_path(chat_id), "ab") as f:
+            f.write(self._encode(op))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _load(self) -> Dict[str, Dict]:
+        """Replay all journals; chats are returned in creation order"""
+        # Leftovers of a compaction interrupted before os.replace; the journal itself is intact
+        for temp in self.directory.glob(f"*{JOURNAL_SUFFIX}.tmp"):
+            temp.unlink()
+            
+        chats = []
+        for journal in self.directory.glob(f"*{JOURNAL_SUFFIX}"):
+            chat = self._replay(journal)
+            if chat:
+                chats.append(chat)
+                
+        chats.sort(key=lambda chat: chat.get("created_at", ""))
+        result = {chat["id"]: chat for chat in chats}
+        
+        # Compact journals that collected too many obsolete lines
+        for chat_id, chat in result.items():
+            if self._obsolete_ops.get(chat_id, 0) >= self.compact_min_ops:
+                self._compact_chat(chat)
+        return result
+    
+    def _replay(self, journal: Path) -> Optional[Dict]:
+        """Rebuild one chat from its journal"""
+        chat = None
+        obsolete = 0
+        good_size = 0
+        with open(journal, "rb") as f:
+            data = f.read()
+            
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn last line
+            try:
+                op = json_codec.loads(line)
+            except ValueError:
+                self.logger.warning(f"Skipping damaged line in {journal.name}")
+                obsolete += 1
+                good_size += len(line)
+                continue
+            good_size += len(line)
+            
+            kind = op.get("op")
+            if kind == "chat":
+                if chat is not None:
+                    obsolete += 1 + len(chat["messages"])
+                chat = dict(op["chat"], messages=[])
+            elif chat is None:
+                obsolete += 1
+            elif kind == "message":
+                chat["messages"].append(op["message"])
+                chat["updated_at"] = op.get("updated_at", chat["updated_at"])
+            elif kind == "rename":
+                chat["name"] = op["name"]
+                chat["updated_at"] = op.get("updated_at", chat["updated_at"])
+                obsolete += 1
+            elif kind == "clear":
+                obsolete += 1 + len(chat["messages"])
+                chat["messages"] = []
+                chat["updated_at"] = op.get("updated_at", chat["updated_at"])
+            else:
+                obsolete += 1
+                
+        if good_size < len(data):
+            self.logger.warning(f"Recovered {journal.name}: dropped {len(data) - good_size} bytes of an unfinished write")
+            with open(journal, "r+b") as f:
+                f.truncate(good_size)
+                
+        if chat is None:
+            self.logger.warning(f"Journal {journal.name} has no chat header, ignoring it")
+            return None
+        self._obsolete_ops[chat["id"]] = obsolete
+        return chat
+    
+    def is_empty(self) -> bool:
+        return not self.chats
+    
+    def has_chat(self, chat_id: str) -> bool:
+        return chat_id in self.chats
+    
+    def count_chats(self) -> int:
+        return len(self.chats)
+    
+    def count_messages(self, chat_id: Optional[str] = None) -> int:
+        if chat_id is not None:
+            chat = self.chats.get(chat_id)
+            return len(chat["messages"]) if chat else 0
+        return sum(len(chat["messages"]) for chat in self.chats.values())
+    
+    def count_archived(self, chat_id: Optional[str] = None) -> int:
+        if chat_id is not None:
+            chat = self.chats.get(chat_id)
+            return chat.get("archived", 0) if chat else 0
+        return sum(chat.get("archived", 0) for chat in self.chats.values())
+    
+    def content_size(self, chat_id: str) -> int:
+        chat = self.chats.get(chat_id)
+        if not chat:
+            return 0
+        return sum(len((message.get("content") or "").encode("utf-8")) for message in chat["messages"])
+    
+    def get_chat(self, chat_id: str) -> Optional[Dict]:
+        return self.chats.get(chat_id)
+    
+    def get_all_chats(self) -> Dict[str, Dict]:
+        return self.chats.copy()
+    
+    def get_chat_list(self) -> List[Dict]:
+        chat_list = []
+        for chat_id, chat_data in self.chats.items():
+            chat_list.append({
+                "id": chat_id,
+                "name": chat_data["name"],
+                "created_at": chat_data["created_at"],
+                "updated_at": chat_data["updated_at"],
+                "message_count": len(chat_data["messages"]) + chat_data.get("archived", 0)
+            })
+        chat_list.sort(key=lambda x: x["updated_at"], reverse=True)
+        return chat_list
+    
+    def get_messages(self, chat_id: str, before: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        chat = self.chats.get(chat_id)
+        if not chat:
+            return []
+        start, end = _page_bounds(len(chat["messages"]), before, limit)
+        return chat["messages"][start:end]
+    
+    def create_chat(self, chat: Dict):
+        chat = dict(chat, messages=list(chat.get("messages", [])))
+        self.chats[chat["id"]] = chat
+        self._compact_chat(chat)
+        if self._index is not None:
+            self._index.remove_chat(chat["id"])
+            for position, message in enumerate(chat["messages"]):
+                self._index.add(chat["id"], position, message.get("content") or "")
+    
+    def add_message(self, chat_id: str, message: Dict, updated_at: str):
+        chat = self.chats[chat_id]
+        chat["messages"].append(message)
+        chat["updated_at"] = updated_at
+        self._append(chat_id, {"op": "message", "message": message, "updated_at": updated_at})
+        if self._index is not None:
+            self._index.add(chat_id, len(chat["messages"]) - 1, message.get("content") or "")
+    
+    def rename_chat(self, chat_id: str, name: str, updated_at: str):
+        chat = self.chats[chat_id]
+        chat["name"] = name
+        chat["updated_at"] = updated_at
+        self._append(chat_id, {"op": "rename", "name": name, "updated_at": updated_at})
+        self._count_obsolete(chat, 1)
+    
+    def clear_messages(self, chat_id: str, updated_at: str):
+        chat = self.chats[chat_id]
+        chat["messages"] = []
+        chat.pop("archived", None)
+        chat["updated_at"] = updated_at
+        # Nothing is left to keep - rewriting is as cheap as appending
+        self._compact_chat(chat)
+        if self._index is not None:
+            self._index.remove_chat(chat_id)
+    
+    def drop_oldest(self, chat_id: str, count: int):
+        chat = self.chats[chat_id]
+        count = min(count, len(chat["messages"]))
+        chat["messages"] = chat["messages"][count:]
+        chat["archived"] = chat.get("archived", 0) + count
+        # The archived count is part of the chat header, so the journal is rewritten once per eviction batch
+        self._compact_chat(chat)
+        # Positions of the remaining messages moved
+        self._index = None
+    
+    def delete_chat(self, chat_id: str):
+        self.chats.pop(chat_id, None)
+        self._obsolete_ops.pop(chat_id, None)
+        if self._index is not None:
+            self._index.remove_chat(chat_id)
+        try:
+            self._journal_path(chat_id).unlink()
+        except FileNotFoundError:
+            pass
+    
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        query_terms = terms(query)
+        if not query_terms:
+            return []
+        # Rebuild once removed chats make up most of the index
+        if self._index is None or self._index.removed > len(self._index):
+            self._index = self._build_index()
+            
+        hits = []
+        for chat_id, position in self._index.search(query_terms, limit):
+            chat = self.chats[chat_id]
+            hits.append(_search_hit(chat_id, chat["name"], position, chat["messages"][position], query_terms))
+        return hits
+    
+    def _build_index(self) -> MessageIndex:
+        """Index all messages, oldest first"""
+        messages = [
+            (message.get("timestamp") or "", chat_id, position, message.get("content") or "")
+            for chat_id, chat in self.chats.items()
+            for position, message in enumerate(chat["messages"])
+        ]
+        messages.sort(key=lambda item: item[0])
+        
+        index = MessageIndex()
+        for _, chat_id, position, content in messages:
+            index.add(chat_id, position, content)
+        self.logger.info(f"Built search index over {len(index)} messages")
+        return index
+    
+    def _count_obsolete(self, chat: Dict, count: int):
+        obsolete = self._obsolete_ops.get(chat["id"], 0) + count
+        self._obsolete_ops[chat["id"]] = obsolete
+        if obsolete >= self.compact_min_ops:
+            self._compact_chat(chat)
+    
+    def compact(self):
+        """Rewrite every journal as a snapshot of its chat's current state"""
+        for chat in self.chats.values():
+            self._compact_chat(chat)
+    
+    def _compact_chat(self, chat: Dict):
+        header = {key: value for key, value in chat.items() if key != "messages"}
+        self._write_snapshot(chat["id"], header, chat["messages"])
+        self.logger.debug(f"Compacted journal of chat {chat['id']}")
+    
+    def _write_snapshot(self, chat_id: str, header: Dict, messages):
+        journal = self._journal_path(chat_id)
+        temp = journal.with_suffix(journal.suffix + ".tmp")
+        with open(temp, "wb") as f:
+            f.write(self._encode({"op": "chat", "chat": header}))
+            for message in messages:
+                f.write(self._encode({"op": "message", "message": message}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, journal)
+        self._obsolete_ops[chat_id] = 0
+
+class SQLiteChatStorage(ChatStorage):
+    """Stores chats and messages in an SQLite database in WAL mode and reads them on demand
+    
+    Nothing is kept in memory: the chat list comes from the chats table
+    through the updated_at index, with message counts maintained in the
+    same transaction as every insert, and a chat's messages are read through
+    the (chat_id, seq) index. Search goes through an FTS5 table holding the
+    stemmed terms of every message (rowid = messages.seq), written together
+    with the message. The connection is shared between the Tk thread and
+    background workers and serialized with a lock.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chats (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            archived INTEGER NOT NULL DEFAULT 0,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_chats_updated_at ON chats (updated_at);
+        CREATE TABLE IF NOT EXISTS messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT NOT NULL REFERENCES chats (id) ON DELETE CASCADE,
+            id TEXT,
+            sender TEXT,
+            content TEXT,
+            timestamp TEXT,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_messages_chat_id ON messages (chat_id, seq);
+    """
+    
+    # Stemming is done in Python (chat_search.terms), FTS5 only matches whole terms
+    FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(terms, tokenize='unicode61')"
+    
+    # PRAGMA user_version: 1 - messages_fts exists and is filled
+    SCHEMA_VERSION = 1
+    
+    def __init__(self, db_file: Path):
+        """
+        Args:
+            db_file: Database file, created with the schema if missing
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_file = Path(db_file)
+        self.created = not self.db_file.exists()
+        self._lock = threading.Lock()
+        
+        self.connection = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL only risks the last transactions on power loss, never corruption
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(self.SCHEMA)
+        self._add_column("chats", "archived", "INTEGER NOT NULL DEFAULT 0")
+    
+        # Without FTS5 in the SQLite build, search uses an in-memory index rebuilt after changes
+        self._index: Optional[MessageIndex] = None
+        self.fts = self._create_fts()
+    
+    @property
+    def path(self) -> Path:
+        return self.db_file
+    
+    def _add_column(self, table: str, column: str, definition: str):
+        """Add a column that databases created by an older version lack"""
+        columns = [row["name"] for row in self.connection.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            with self.connection:
+                self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    
+    def _create_fts(self) -> bool:
+        try:
+            with self.connection:
+                self.connection.execute(self.FTS_SCHEMA)
+                if self.connection.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+                    # Database created before search existed - index the messages it already has
+                    rows = self.connection.execute("SELECT seq, content FROM messages").fetchall()
+                    self.connection.executemany(
+                        "INSERT INTO messages_fts (rowid, terms) VALUES (?, ?)",
+                        [(seq, " ".join(terms(content or ""))) for seq, content in rows]
+                    )
+                    self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            return True
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"SQLite FTS5 is not available ({e}), chat search uses an in-memory index")
+            return False
+    
+    def _insert_message(self, chat_id: str, message: Dict):
+        """Insert a message and its search terms (inside the caller's transaction)"""
+        cursor = self.connection.execute(
+            "INSERT INTO messages (chat_id, id, sender, content, timestamp, extra) VALUES (?, ?, ?, ?, ?, ?)",
+            (chat_id,) + self._to_row(message, MESSAGE_COLUMNS)
+        )
+        if self.fts:
+            self.connection.execute(
+                "INSERT INTO messages_fts (rowid, terms) VALUES (?, ?)",
+                (cursor.lastrowid, " ".join(terms(message.get("content") or "")))
+            )
+        self._index = None
+    
+    def _delete_messages(self, chat_id: str, count: Optional[int] = None) -> int:
+        """Delete a chat's messages (or its oldest `count`) and their search terms (inside the caller's transaction)"""
+        selection = "SELECT seq FROM messages WHERE chat_id = ?"
+        params = (chat_id,)
+        if count is not None:
+            selection += " ORDER BY seq LIMIT ?"
+            params += (count,)
+        if self.fts:
+            self.connection.execute(f"DELETE FROM messages_fts WHERE rowid IN ({selection})", params)
+        cursor = self.connection.execute(f"DELETE FROM messages WHERE seq IN ({selection})", params)
+        self._index = None
+        return cursor.rowcount
+    
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+    
+    @staticmethod
+    def _to_row(data: Dict, columns) -> tuple:
+        """Column values followed by the JSON of all other keys"""
+        extra = {key: value for key, value in data.items() if key not in columns and key != "messages"}
+        return tuple(data.get(column) for column in columns) + (json_codec.dumps(extra) if extra else None,)
+    
+    @staticmethod
+    def _from_row(row: sqlite3.Row, columns) -> Dict:
+        data = {column: row[column] for column in columns}
+        if row["extra"]:
+            data.update(json_codec.loads(row["extra"]))
+        return data
+    
+    def is_empty(self) -> bool:
+        return not self._query("SELECT 1 FROM chats LIMIT 1")
+    
+    def has_chat(self, chat_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM chats WHERE id = ?", (chat_id,)))
+    
+    def count_chats(self) -> int:
+        return self._query("SELECT COUNT(*) FROM chats")[0][0]
+    
+    def count_messages(self, chat_id: Optional[str] = None) -> int:
+        if chat_id is not None:
+            rows = self._query("SELECT message_count FROM chats WHERE id = ?", (chat_id,))
+            return rows[0][0] if rows else 0
+        return self._query("SELECT COALESCE(SUM(message_count), 0) FROM chats")[0][0]
+    
+    def count_archived(self, chat_id: Optional[str] = None) -> int:
+        if chat_id is not None:
+            rows = self._query("SELECT archived FROM chats WHERE id = ?", (chat_id,))
+            return rows[0][0] if rows else 0
+        return self._query("SELECT COALESCE(SUM(archived), 0) FROM chats")[0][0]
+    
+    def content_size(self, chat_id: str) -> int:
+        return self._query(
+            "SELECT COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM messages WHERE chat_id = ?", (chat_id,)
+        )[0][0]
+    
+    def get_chat(self, chat_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT * FROM chats WHERE id = ?", (chat_id,))
+        if not rows:
+            return None
+        chat = self._from_row(rows[0], CHAT_COLUMNS)
+        chat["messages"] = self.get_messages(chat_id)
+        return chat
+    
+    def get_all_chats(self) -> Dict[str, Dict]:
+        chats = {}
+        for row in self._query("SELECT * FROM chats ORDER BY created_at"):
+            chat = self._from_row(row, CHAT_COLUMNS)
+            chat["messages"] = self.get_messages(chat["id"])
+            chats[chat["id"]] = chat
+        return chats
+    
+    def get_chat_list(self) -> List[Dict]:
+        rows = self._query(
+            "SELECT id, name, created_at, updated_at, message_count + archived AS message_count FROM chats ORDER BY updated_at DESC"
+        )
+        return [dict(row) for row in rows]
+    
+    def get_messages(self, chat_id: str, before: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        if before is None and limit is None:
+            rows = self._query("SELECT id, sender, content, timestamp, extra FROM messages WHERE chat_id = ? ORDER BY seq", (chat_id,))
+            return [self._from_row(row, MESSAGE_COLUMNS) for row in rows]
+            
+        # Pages are counted from the newest message, so recent pages skip only a few index entries
+        total = self.count_messages(chat_id)
+        start, end = _page_bounds(total, before, limit)
+        rows = self._query(
+            "SELECT id, sender, content, timestamp, extra FROM messages WHERE chat_id = ? ORDER BY seq DESC LIMIT ? OFFSET ?",
+            (chat_id, end - start, total - end)
+        )
+        return [self._from_row(row, MESSAGE_COLUMNS) for row in reversed(rows)]
+    
+    def create_chat(self, chat: Dict):
+        with self._lock, self.connection:
+            self._insert_chat(chat)
+    
+    def import_chats(self, chats: Dict[str, Dict]):
+        # One transaction for the whole import
+        with self._lock, self.connection:
+            for chat in chats.values():
+                self._insert_chat(chat)
+    
+    def _insert_chat(self, chat: Dict):
+        chat = dict(chat)
+        messages = chat.get("messages", [])
+        archived = chat.pop("archived", 0)
+        self.connection.execute(
+            "INSERT INTO chats (id, name, created_at, updated_at, extra, message_count, archived) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._to_row(chat, CHAT_COLUMNS) + (len(messages), archived)
+        )
+        for message in messages:
+            self._insert_message(chat["id"], message)
+    
+    def add_message(self, chat_id: str, message: Dict, updated_at: str):
+        with self._lock, self.connection:
+            self._insert_message(chat_id, message)
+            self.connection.execute(
+                "UPDATE chats SET updated_at = ?, message_count = message_count + 1 WHERE id = ?",
+                (updated_at, chat_id)
+            )
+    
+    def rename_chat(self, chat_id: str, name: str, updated_at: str):
+        with self._lock, self.connection:
+            self.connection.execute("UPDATE chats SET name = ?, updated_at = ? WHERE id = ?", (name, updated_at, chat_id))
+    
+    def clear_messages(self, chat_id: str, updated_at: str):
+        with self._lock, self.connection:
+            self._delete_messages(chat_id)
+            self.connection.execute(
+                "UPDATE chats SET message_count = 0, archived = 0, updated_at = ? WHERE id = ?", (updated_at, chat_id)
+            )
+    
+    def drop_oldest(self, chat_id: str, count: int):
+        with self._lock, self.connection:
+            deleted = self._delete_messages(chat_id, count)
+            self.connection.execute(
+                "UPDATE chats SET message_count = message_count - ?, archived = archived + ? WHERE id = ?",
+                (deleted, deleted, chat_id)
+            )
+    
+    def delete_chat(self, chat_id: str):
+        with self._lock, self.connection:
+            self._delete_messages(chat_id)
+            self.connection.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+    
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        query_terms = terms(query)
+        if not query_terms:
+            return []
+        if not self.fts:
+            return self._search_in_memory(query_terms, limit)
+            
+        # Every term must match; terms are \w+ words, safe inside quotes
+        match = " ".join(f'"{term}"' for term in set(query_terms))
+        rows = self._query(
+            """
+            SELECT m.chat_id, m.id, m.sender, m.content, m.timestamp, m.extra, c.name AS chat_name,
+                   (SELECT COUNT(*) FROM messages p WHERE p.chat_id = m.chat_id AND p.seq < m.seq) AS position
+            FROM messages_fts f
+            JOIN messages m ON m.seq = f.rowid
+            JOIN chats c ON c.id = m.chat_id
+            WHERE messages_fts MATCH ?
+            ORDER BY f.rowid DESC
+            LIMIT ?
+            """,
+            (match, limit)
+        )
+        return [
+            _search_hit(row["chat_id"], row["chat_name"], row["position"], self._from_row(row, MESSAGE_COLUMNS), query_terms)
+            for row in rows
+        ]
+    
+    def _search_in_memory(self, query_terms: List[str], limit: int) -> List[Dict]:
+        with self._lock:
+            if self._index is None:
+                index = MessageIndex()
+                positions: Dict[str, int] = {}
+                for chat_id, content in self.connection.execute("SELECT chat_id, content FROM messages ORDER BY seq"):
+                    position = positions.get(chat_id, 0)
+                    positions[chat_id] = position + 1
+                    index.add(chat_id, position, content or "")
+                self._index = index
+            found = self._index.search(query_terms, limit)
+            
+        hits = []
+        for chat_id, position in found:
+            rows = self._query("SELECT name FROM chats WHERE id = ?", (chat_id,))
+            messages = self.get_messages(chat_id, before=position + 1, limit=1)
+            if rows and messages:
+                hits.append(_search_hit(chat_id, rows[0]["name"], position, messages[0], query_terms))
+        return hits
+    
+    def compact(self):
+        """Move the WAL into the database file and refresh the query planner statistics"""
+        with self._lock:
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.connection.execute("PRAGMA optimize")
+    
+    def close(self):
+        with self._lock:
+            self.connection.close()
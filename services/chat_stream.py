@@ -0,0 +1,125 @@
+"""
+Chat Stream - Incremental parser for streamed /chat/send responses (server-sent events)
+"""
+
+import json
+import time
+from typing import Dict, Optional
+
+EVENT_STREAM_TYPE = "text/event-stream"
+
+def is_event_stream(content_type: Optional[str]) -> bool:
+    """Whether a response is an SSE stream (servers without streaming answer with plain JSON)"""
+    return bool(content_type) and content_type.split(";")[0].strip().lower() == EVENT_STREAM_TYPE
+
+class ChatStreamParser:
+    """Collects a streamed chat answer line by line
+    
+    Expected events:
+        data: {"delta": "text"}                                   - next piece of the answer
+        event: done / data: {"response_id", "tokens_used", "model"} - end of the answer
+        event: error / data: {"detail": "..."}                    - server-side failure
+    A bare "data: [DONE]" also ends the stream.
+    """
+    
+    def __init__(self, started_at: Optional[float] = None):
+        """
+        Args:
+            started_at: time.monotonic() when the request was sent (for time to first token)
+        """
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.first_delta_at = None
+        self.parts = []
+        self.response_id = None
+        self.tokens_used = None
+        self.model = None
+        self.error = None
+        self.done = False
+        self._event = None
+        self._data = []
+    
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+    
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_delta_at is None:
+            return None
+        return self.first_delta_at - self.started_at
+    
+    def feed_line(self, line: str) -> Optional[str]:
+        """Feed one line of the stream; returns answer text if it completed a delta event"""
+        line = line.rstrip("\r")
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None  # comment / keep-alive
+            
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            self._event = value
+        elif field == "data":
+            self._data.append(value)
+        return None
+    
+    def finish(self) -> Optional[str]:
+        """Dispatch an event left without the trailing blank line"""
+        return self._dispatch()
+    
+    def _dispatch(self) -> Optional[str]:
+        event, data = self._event or "message", "\n".join(self._data)
+        self._event, self._data = None, []
+        if not data:
+            return None
+        if data == "[DONE]":
+            self.done = True
+            return None
+            
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            payload = {"delta": data}
+        if not isinstance(payload, dict):
+            payload = {"delta": str(payload)}
+            
+        if event == "error":
+            self.error = payload.get("detail") or payload.get("error") or "Stream error"
+            return None
+        if event == "done":
+            self.done = True
+            self.response_id = payload.get("response_id", self.response_id)
+            self.tokens_used = payload.get("tokens_used", self.tokens_used)
+            self.model = payload.get("model", self.model)
+            return None
+            
+        delta = payload.get("delta")
+        if not delta:
+            return None
+        if self.first_delta_at is None:
+            self.first_delta_at = time.monotonic()
+        self.parts.append(delta)
+        return delta
+    
+    def result(self) -> Dict:
+        """Same shape as APIClient.send_message() result"""
+        text = self.text
+        if self.error or not text or not self.done:
+            # Without the done event the answer was cut off (dropped connection, server crash)
+            return {
+                "success": False,
+                "error": self.error or ("Stream ended before the answer was complete" if text else "Empty response"),
+                "partial_message": text
+            }
+        return {
+            "success": True,
+            "message": text,
+            "response_id": self.response_id,
+            "tokens_used": self.tokens_used,
+            "model": self.model,
+            "streamed": True,
+            "complete": self.done,
+            "time_to_first_token": self.time_to_first_token
+        }
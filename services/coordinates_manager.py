@@ -2,13 +2,15 @@
 Flexible Coordinates Manager for saving and managing UI element coordinates
 """
 
-import json
 import logging
 import sys
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from utils import json_codec
+from utils.write_behind import get_writer
+
 class CoordinatesManager:
     """Manages UI element coordinates for automation with flexible button system"""
     
@@ -25,6 +27,7 @@ class CoordinatesManager:
         self.data_dir.mkdir(exist_ok=True)
         self.coordinates_file = self.data_dir / "coordinates.json"
         self.logger = logging.getLogger(__name__)
+        self.writer = get_writer()
         
         # Default coordinates structure - flexible button system
         self.default_coordinates = {
@@ -80,11 +83,11 @@ class CoordinatesManager:
     def load_coordinates(self) -> Dict:
         """Load coordinates from file"""
         try:
-            if self.coordinates_file.exists():
-                with open(self.coordinates_file, 'r', encoding='utf-8') as f:
-                    coordinates = json.load(f)
-                    self.logger.info(f"Loaded coordinates from {self.coordinates_file}")
-                    return coordinates
+            text = self.writer.read_text(self.coordinates_file)
+            if text is not None:
+                coordinates = json_codec.loads(text)
+                self.logger.info(f"Loaded coordinates from {self.coordinates_file}")
+                return coordinates
             else:
                 # Create default coordinates file
                 self.save_coordinates(self.default_coordinates)
@@ -95,16 +98,15 @@ class CoordinatesManager:
             return self.default_coordinates.copy()
     
     def save_coordinates(self, coordinates: Optional[Dict] = None) -> bool:
-        """Save coordinates to file"""
+        """Save coordinates to file (written in the background, write errors are only logged)"""
         try:
             if coordinates is None:
                 coordinates = self.coordinates
             
-            with open(self.coordinates_file, 'w', encoding='utf-8') as f:
-                json.dump(coordinates, f, indent=2, ensure_ascii=False)
+            self.writer.schedule(self.coordinates_file, json_codec.dumps(coordinates))
             
             self.coordinates = coordinates.copy()
-            self.logger.info(f"Saved coordinates to {self.coordinates_file}")
+            self.logger.info(f"Saving coordinates to {self.coordinates_file}")
             return True
         except Exception as e:
             self.logger.error(f"Error saving coordinates: {e}")
@@ -140,6 +142,19 @@ class CoordinatesManager:
         """Get all info elements"""
         return self.coordinates.get("info_elements", {})
     
+    def get_info_element_regions(self, element_ids: Optional[List[str]] = None) -> Dict[str, Tuple[int, int, int, int]]:
+        """Get screen rectangles (x, y, width, height) of info elements for region capture"""
+        regions = {}
+        for element_id, element in self.get_all_info_elements().items():
+            if element_ids is not None and element_id not in element_ids:
+                continue
+            coordinates = element.get("coordinates")
+            if self.validate_coordinates(coordinates):
+                regions[element_id] = tuple(coordinates)
+            else:
+                self.logger.warning(f"Skipping info element {element_id} with invalid coordinates: {coordinates}")
+        return regions
+    
     def add_button(self, button_id: str, name: str, coordinates: List[int], description: str = "") -> bool:
         """Add a new button"""
         try:
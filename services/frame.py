@@ -0,0 +1,121 @@
+"""
+Frame - In-memory screen capture passed from capture through validation to upload
+"""
+
+import io
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+class Frame:
+    """Raw top-down BGRA pixel buffer with its size and capture metadata"""
+    
+    BYTES_PER_PIXEL = 4
+    
+    def __init__(self, data, width: int, height: int, metadata: Optional[Dict] = None):
+        """
+        Args:
+            data: BGRA (or BGRX) pixel buffer, rows top-down, no padding
+            width: Frame width in pixels
+            height: Frame height in pixels
+            metadata: Capture details (method, pid, hwnd, timestamp, ...)
+        """
+        if len(data) < width * height * self.BYTES_PER_PIXEL:
+            raise ValueError(f"Buffer too small for {width}x{height} frame: {len(data)} bytes")
+            
+        self.data = data
+        self.width = width
+        self.height = height
+        self.metadata = dict(metadata or {})
+        self.metadata.setdefault("timestamp", time.time())
+    
+    @property
+    def size(self):
+        """Frame size as (width, height)"""
+        return (self.width, self.height)
+    
+    @property
+    def stride(self) -> int:
+        """Number of bytes in one row"""
+        return self.width * self.BYTES_PER_PIXEL
+    
+    @classmethod
+    def from_image(cls, image: Image.Image, metadata: Optional[Dict] = None) -> "Frame":
+        """Create frame from a PIL image (e.g. an image opened from disk or the clipboard)"""
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        return cls(image.tobytes("raw", "BGRA"), image.width, image.height, metadata)
+    
+    @classmethod
+    def from_file(cls, filepath: str, metadata: Optional[Dict] = None) -> "Frame":
+        """Load frame from an image file"""
+        with Image.open(filepath) as image:
+            frame = cls.from_image(image, metadata)
+        frame.metadata.setdefault("source_path", str(filepath))
+        return frame
+    
+    def to_image(self) -> Image.Image:
+        """Wrap the buffer as an RGB PIL image without an intermediate copy"""
+        return Image.frombuffer("RGB", self.size, self.data, "raw", "BGRX", 0, 1)
+    
+    def crop(self, left: int, top: int, right: int, bottom: int) -> "Frame":
+        """Return a new frame with the given box (clamped to the frame bounds)"""
+        left, right = max(0, left), min(self.width, right)
+        top, bottom = max(0, top), min(self.height, bottom)
+        if right <= left or bottom <= top:
+            raise ValueError(f"Empty crop box ({left}, {top}, {right}, {bottom})")
+            
+        view = memoryview(self.data)
+        row_start = left * self.BYTES_PER_PIXEL
+        row_end = right * self.BYTES_PER_PIXEL
+        rows = [view[y * self.stride + row_start:y * self.stride + row_end] for y in range(top, bottom)]
+        
+        metadata = dict(self.metadata)
+        metadata["crop"] = (left, top, right, bottom)
+        return Frame(b"".join(rows), right - left, bottom - top, metadata)
+    
+    @classmethod
+    def stack(cls, frames: List["Frame"], spacing: int = 4, metadata: Optional[Dict] = None) -> "Frame":
+        """Stack frames vertically into one frame (narrower frames are padded with black)"""
+        if not frames:
+            raise ValueError("No frames to stack")
+            
+        width = max(frame.width for frame in frames)
+        gap = bytes(width * cls.BYTES_PER_PIXEL) * spacing
+        parts = []
+        offsets = []
+        y = 0
+        for index, frame in enumerate(frames):
+            if index:
+                parts.append(gap)
+                y += spacing
+            offsets.append((0, y, frame.width, frame.height))
+            view = memoryview(frame.data)
+            padding = bytes((width - frame.width) * cls.BYTES_PER_PIXEL)
+            for row in range(frame.height):
+                parts.append(view[row * frame.stride:(row + 1) * frame.stride])
+                if padding:
+                    parts.append(padding)
+            y += frame.height
+            
+        metadata = dict(metadata or {})
+        metadata["parts"] = offsets
+        return cls(b"".join(parts), width, y, metadata)
+    
+    def encode(self, format: str = "PNG", **params) -> bytes:
+        """Encode frame into an image file format in memory"""
+        buffer = io.BytesIO()
+        self.to_image().save(buffer, format=format, **params)
+        return buffer.getvalue()
+    
+    def save(self, filepath, format: str = "PNG", **params) -> str:
+        """Persist frame to disk (optional sink, not needed for analysis)"""
+        filepath = Path(filepath)
+        self.to_image().save(filepath, format=format, **params)
+        self.metadata["saved_path"] = str(filepath)
+        return str(filepath)
+    
+    def __repr__(self):
+        return f"Frame({self.width}x{self.height}, method={self.metadata.get('method')})"
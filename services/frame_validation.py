@@ -0,0 +1,128 @@
+"""
+Frame Validation - Fast blank-frame detection on raw BGRA buffers
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, List
+
+from .frame import Frame
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, strided sampling over a memoryview is used instead
+    np = None
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+class FrameValidator:
+    """Detects black and white (failed) captures by sampling a pixel grid"""
+    
+    def __init__(self, sample_columns: int = 64, sample_rows: int = 36,
+                 min_content_fraction: float = 0.05, min_content_pixels: int = 10,
+                 max_uniform_fraction: float = 1.0, min_size: int = 10, use_numpy: bool = True):
+        """
+        Args:
+            sample_columns: Number of sampled pixels per row of the grid
+            sample_rows: Number of sampled rows of the grid
+            min_content_fraction: Minimum share of non-black and non-white samples
+            min_content_pixels: Minimum absolute number of non-black and non-white samples
+            max_uniform_fraction: Maximum share of samples with the most common color (1.0 never rejects)
+            min_size: Minimum frame width and height
+            use_numpy: Use NumPy when it is installed
+        """
+        self.logger = logging.getLogger(__name__)
+        self.sample_columns = sample_columns
+        self.sample_rows = sample_rows
+        self.min_content_fraction = min_content_fraction
+        self.min_content_pixels = min_content_pixels
+        self.max_uniform_fraction = max_uniform_fraction
+        self.min_size = min_size
+        self.use_numpy = use_numpy and np is not None
+    
+    def analyze(self, frame: Frame) -> Dict:
+        """Sample the frame and report black/white/uniform fractions and validity"""
+        width, height = frame.size
+        report = {
+            "width": width,
+            "height": height,
+            "samples": 0,
+            "black_fraction": 0.0,
+            "white_fraction": 0.0,
+            "uniform_fraction": 0.0,
+            "valid": False,
+            "reason": None
+        }
+        
+        if width < self.min_size or height < self.min_size:
+            report["reason"] = f"too small: {width}x{height}"
+            return report
+            
+        xs = self._grid(width, self.sample_columns)
+        ys = self._grid(height, self.sample_rows)
+        if self.use_numpy:
+            samples, black, white, most_common = self._count_numpy(frame, xs, ys)
+        else:
+            samples, black, white, most_common = self._count_python(frame, xs, ys)
+            
+        report["samples"] = samples
+        report["black_fraction"] = black / samples
+        report["white_fraction"] = white / samples
+        report["uniform_fraction"] = most_common / samples
+        
+        # Frame should have at least 5% non-black and non-white pixels
+        min_content = max(self.min_content_pixels, samples * self.min_content_fraction)
+        if samples - black < min_content:
+            report["reason"] = "mostly black"
+        elif samples - white < min_content:
+            report["reason"] = "mostly white"
+        elif report["uniform_fraction"] > self.max_uniform_fraction:
+            report["reason"] = "uniform color"
+        else:
+            report["valid"] = True
+            
+        return report
+    
+    def is_valid(self, frame: Frame) -> bool:
+        """Check if frame is valid (not black/white/uniform)"""
+        report = self.analyze(frame)
+        if not report["valid"]:
+            self.logger.debug(
+                f"Frame rejected ({report['reason']}): black={report['black_fraction']:.2%}, "
+                f"white={report['white_fraction']:.2%}, uniform={report['uniform_fraction']:.2%}"
+            )
+        return report["valid"]
+    
+    @staticmethod
+    def _grid(length: int, count: int) -> List[int]:
+        """Evenly spaced sample coordinates centred in their cells"""
+        count = max(1, min(count, length))
+        return [int((i + 0.5) * length / count) for i in range(count)]
+    
+    def _count_numpy(self, frame: Frame, xs: List[int], ys: List[int]):
+        """Count sample colors with NumPy; only the sampled pixels are copied"""
+        pixels = np.frombuffer(frame.data, dtype=np.uint8, count=frame.width * frame.height * 4)
+        pixels = pixels.reshape(frame.height, frame.width, 4)
+        sampled = pixels[np.ix_(ys, xs)][..., :3].reshape(-1, 3)
+        
+        black = int(np.count_nonzero((sampled == 0).all(axis=1)))
+        white = int(np.count_nonzero((sampled == 255).all(axis=1)))
+        
+        packed = sampled.astype(np.uint32)
+        packed = packed[:, 0] | (packed[:, 1] << 8) | (packed[:, 2] << 16)
+        _, counts = np.unique(packed, return_counts=True)
+        return len(sampled), black, white, int(counts.max())
+    
+    def _count_python(self, frame: Frame, xs: List[int], ys: List[int]):
+        """Count sample colors with strided reads over a memoryview"""
+        view = memoryview(frame.data)
+        stride = frame.stride
+        offsets = [x * 4 for x in xs]
+        colors = Counter()
+        for y in ys:
+            row = view[y * stride:(y + 1) * stride]
+            colors.update(bytes(row[offset:offset + 3]) for offset in offsets)
+            
+        samples = len(xs) * len(ys)
+        return samples, colors[bytes(BLACK)], colors[bytes(WHITE)], colors.most_common(1)[0][1]
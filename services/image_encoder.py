@@ -0,0 +1,147 @@
+"""
+Image Encoder - Encodes captured frames for upload (format, quality, downscale, size budget)
+"""
+
+import io
+import logging
+from typing import List, Optional, Tuple
+
+from PIL import Image, features
+
+from .frame import Frame
+
+# Config format name -> (PIL format, MIME type, file extension)
+FORMATS = {
+    "png": ("PNG", "image/png", "png"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "jpg": ("JPEG", "image/jpeg", "jpg"),
+    "webp": ("WEBP", "image/webp", "webp"),
+}
+
+class EncodedImage:
+    """Encoded upload payload with its content type"""
+    
+    def __init__(self, data: bytes, format: str, width: int, height: int, quality: Optional[int] = None):
+        self.data = data
+        self.format = format
+        self.width = width
+        self.height = height
+        self.quality = quality
+    
+    @property
+    def mime_type(self) -> str:
+        return FORMATS[self.format][1]
+    
+    @property
+    def filename(self) -> str:
+        return f"screenshot.{FORMATS[self.format][2]}"
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __repr__(self):
+        quality = f" q={self.quality}" if self.quality is not None else ""
+        return f"EncodedImage({self.format} {self.width}x{self.height}{quality}, {len(self.data)} bytes)"
+
+class ImageEncoder:
+    """Encodes frames with the configured format and falls back to cheaper encodings to meet a size budget"""
+    
+    def __init__(self, format: str = "png", quality: int = 95, max_edge: int = 0, png_compress_level: int = 6,
+                 max_upload_bytes: int = 0, min_quality: int = 50, min_edge: int = 640):
+        """
+        Args:
+            format: Preferred format: png, jpeg or webp
+            quality: JPEG/WebP quality (1-100)
+            max_edge: Downscale frames whose longer side exceeds this (0 - keep size)
+            png_compress_level: zlib level for PNG (0-9, lower is faster)
+            max_upload_bytes: Size budget for the encoded image (0 - no budget)
+            min_quality: Lowest quality tried to meet the budget
+            min_edge: Frames are not downscaled below this longer side to meet the budget
+        """
+        self.logger = logging.getLogger(__name__)
+        format = format.lower()
+        if format not in FORMATS:
+            self.logger.warning(f"Unknown screenshot format '{format}', using png")
+            format = "png"
+        if format == "jpg":
+            format = "jpeg"
+        if format == "webp" and not features.check("webp"):
+            self.logger.warning("Pillow was built without WebP support, using jpeg")
+            format = "jpeg"
+        self.format = format
+        self.quality = max(1, min(100, quality))
+        self.max_edge = max_edge
+        self.png_compress_level = max(0, min(9, png_compress_level))
+        self.max_upload_bytes = max_upload_bytes
+        self.min_quality = min(min_quality, self.quality)
+        self.min_edge = min_edge
+    
+    @classmethod
+    def from_config(cls, config) -> "ImageEncoder":
+        """Create encoder from the [screenshots] config section"""
+        return cls(
+            format=config.get("screenshots", "format", "png"),
+            quality=config.getint("screenshots", "quality", 95),
+            max_edge=config.getint("screenshots", "max_edge", 1920),
+            png_compress_level=config.getint("screenshots", "png_compress_level", 6),
+            max_upload_bytes=config.getint("screenshots", "max_upload_bytes", 1048576)
+        )
+    
+    def encode(self, frame: Frame) -> EncodedImage:
+        """Encode frame for upload, trying cheaper encodings until it fits the size budget"""
+        image = self._downscale(frame.to_image(), self.max_edge)
+        smallest = None
+        
+        while True:
+            for format, quality in self._candidates():
+                encoded = self._encode_image(image, format, quality)
+                if smallest is None or len(encoded) < len(smallest):
+                    smallest = encoded
+                if not self.max_upload_bytes or len(encoded) <= self.max_upload_bytes:
+                    self.logger.debug(f"Encoded {frame} as {encoded}")
+                    return encoded
+                if format != "png" and len(encoded) > 2 * self.max_upload_bytes and max(image.size) > self.min_edge:
+                    # Lower quality will not halve the size - downscaling is cheaper to try
+                    break
+                    
+            # Nothing fits at this size - shrink the image and try the lossy ladder again
+            longer_edge = max(image.size)
+            if longer_edge <= self.min_edge:
+                break
+            image = self._downscale(image, max(self.min_edge, int(longer_edge * 0.75)))
+            
+        self.logger.warning(f"No encoding fits {self.max_upload_bytes} bytes, sending smallest: {smallest}")
+        return smallest
+    
+    def _candidates(self) -> List[Tuple[str, Optional[int]]]:
+        """(format, quality) pairs from the highest fidelity to the smallest"""
+        lossy_format = self.format if self.format != "png" else ("webp" if features.check("webp") else "jpeg")
+        candidates = []
+        if self.format == "png":
+            candidates.append(("png", None))
+        qualities = [self.quality] + [q for q in (85, 75, 65) if self.min_quality < q < self.quality] + [self.min_quality]
+        for quality in dict.fromkeys(qualities):
+            candidates.append((lossy_format, quality))
+        return candidates
+    
+    def _encode_image(self, image: Image.Image, format: str, quality: Optional[int]) -> EncodedImage:
+        pil_format = FORMATS[format][0]
+        if format == "png":
+            params = {"compress_level": self.png_compress_level}
+        elif format == "webp":
+            params = {"quality": quality, "method": 4}
+        else:
+            params = {"quality": quality}
+            
+        buffer = io.BytesIO()
+        image.save(buffer, format=pil_format, **params)
+        return EncodedImage(buffer.getvalue(), format, image.width, image.height, quality)
+    
+    @staticmethod
+    def _downscale(image: Image.Image, max_edge: int) -> Image.Image:
+        """Resize so the longer side is at most max_edge (0 - unchanged)"""
+        if not max_edge or max(image.size) <= max_edge:
+            return image
+        scale = max_edge / max(image.size)
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        return image.resize(size, Image.BILINEAR, reducing_gap=2.0)
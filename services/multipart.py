@@ -0,0 +1,98 @@
+"""
+Multipart - Streaming multipart/form-data request body
+"""
+
+import io
+import os
+import uuid
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+class MultipartStream:
+    """File-like multipart/form-data body that reads file parts lazily instead of building the whole body"""
+    
+    CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, fields: Optional[Dict[str, str]] = None,
+                 files: Optional[Dict[str, Tuple[str, Union[bytes, BinaryIO], str]]] = None,
+                 boundary: Optional[str] = None):
+        """
+        Args:
+            fields: Form field name -> text value
+            files: Form field name -> (filename, bytes or binary file object, content type)
+            boundary: Multipart boundary (random by default)
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self._parts: List[Union[bytes, BinaryIO]] = []
+        self._length = 0
+        
+        for name, value in (fields or {}).items():
+            self._add(self._part_header(name) + b"\r\n" + str(value).encode("utf-8") + b"\r\n")
+            
+        for name, (filename, content, content_type) in (files or {}).items():
+            header = self._part_header(name, filename) + f"Content-Type: {content_type}\r\n".encode("utf-8") + b"\r\n"
+            self._add(header)
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                content = io.BytesIO(content)
+            self._parts.append(content)
+            self._length += self._remaining(content)
+            self._add(b"\r\n")
+            
+        self._add(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self._index = 0
+    
+    @property
+    def content_type(self) -> str:
+        """Value for the Content-Type request header"""
+        return f"multipart/form-data; boundary={self.boundary}"
+    
+    def __len__(self):
+        """Total body size, used by requests for the Content-Length header"""
+        return self._length
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the body (everything that is left if size < 0)"""
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(self.CHUNK_SIZE), b""))
+            
+        chunks = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                chunk = part[:size]
+                rest = part[size:]
+                if rest:
+                    self._parts[self._index] = rest
+                else:
+                    self._index += 1
+            else:
+                chunk = part.read(size)
+                if len(chunk) < size:
+                    self._index += 1
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+    
+    def __iter__(self):
+        return iter(lambda: self.read(self.CHUNK_SIZE), b"")
+    
+    def _add(self, data: bytes):
+        self._parts.append(data)
+        self._length += len(data)
+    
+    def _part_header(self, name: str, filename: Optional[str] = None) -> bytes:
+        disposition = f'form-data; name="{self._quote(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{self._quote(filename)}"'
+        return f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n".encode("utf-8")
+    
+    @staticmethod
+    def _quote(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\r", " ").replace("\n", " ")
+    
+    @staticmethod
+    def _remaining(fileobj: BinaryIO) -> int:
+        """Bytes left from the current position of a seekable file object"""
+        position = fileobj.tell()
+        end = fileobj.seek(0, os.SEEK_END)
+        fileobj.seek(position)
+        return end - position
@@ -0,0 +1,106 @@
+"""
+Request Log - Sampled one-line summaries of API requests and opt-in full debug capture
+"""
+
+import logging
+import random
+import time
+from typing import Optional
+
+# Logger for full request/response capture; gets its own rotating file in setup_logging()
+CAPTURE_LOGGER_NAME = "api.capture"
+
+class _Truncated:
+    """Body preview that is decoded and cut only if the log record is actually emitted"""
+    
+    __slots__ = ("data", "limit")
+    
+    def __init__(self, data, limit: int):
+        self.data = data
+        self.limit = limit
+    
+    def __str__(self):
+        data = self.data or b""
+        if isinstance(data, str):
+            text, size = data[:self.limit], len(data)
+        else:
+            text, size = data[:self.limit].decode("utf-8", errors="replace"), len(data)
+        text = text.replace("\n", "\\n")
+        if size > self.limit:
+            return f"{text}... [{size - self.limit} more]"
+        return text
+
+class RequestLog:
+    """Structured, sampled log of API requests
+    
+    Every finished request produces at most one line. Successful fast requests
+    are logged at INFO only for a sample of them (the rest at DEBUG); errors,
+    retried and slow requests are always logged at WARNING with a size-capped
+    body preview. Messages use lazy %-formatting, so nothing is formatted for
+    records that are filtered out.
+    """
+    
+    def __init__(self, config):
+        self.logger = logging.getLogger(__name__)
+        self.capture_logger = logging.getLogger(CAPTURE_LOGGER_NAME)
+        self.sample_rate = config.getfloat("logging", "request_sample_rate", 0.1)
+        self.body_limit = config.getint("logging", "request_body_limit", 300)
+        self.slow_seconds = config.getfloat("logging", "slow_request_seconds", 15.0)
+        self.capture_enabled = config.getboolean("logging", "api_debug_capture", False)
+        self.capture_body_limit = config.getint("logging", "api_debug_body_limit", 65536)
+    
+    def record(self, endpoint: str, method: str, url: str, response, started_at: float, attempts: int = 1):
+        """Log a finished request
+        
+        Args:
+            endpoint: Policy name (auth, register, verify, chat, analyze)
+            method: HTTP method
+            url: Request URL
+            response: requests or httpx response
+            started_at: time.monotonic() when the operation started
+            attempts: Number of attempts made
+        """
+        elapsed = time.monotonic() - started_at
+        status = response.status_code
+        
+        if status >= 400 or attempts > 1 or elapsed >= self.slow_seconds:
+            self.logger.warning(
+                "api %s %s %s status=%s elapsed=%.2fs attempts=%d body=%s",
+                endpoint, method, _path(url), status, elapsed, attempts,
+                _Truncated(_body(response), self.body_limit)
+            )
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            self.logger.info("api %s %s %s status=%s elapsed=%.2fs", endpoint, method, _path(url), status, elapsed)
+        else:
+            self.logger.debug("api %s %s %s status=%s elapsed=%.2fs", endpoint, method, _path(url), status, elapsed)
+            
+        if self.capture_enabled and self.capture_logger.isEnabledFor(logging.DEBUG):
+            self.capture_logger.debug(
+                "%s %s -> %s (%.2fs, %d attempts)\nheaders: %s\nbody: %s",
+                method, url, status, elapsed, attempts, dict(response.headers),
+                _Truncated(_body(response), self.capture_body_limit)
+            )
+    
+    def record_error(self, endpoint: str, method: str, url: str, error: Exception,
+                     started_at: float, attempts: int = 1):
+        """Log a request that failed without a response"""
+        self.logger.warning(
+            "api %s %s %s failed after %.2fs attempts=%d: %r",
+            endpoint, method, _path(url), time.monotonic() - started_at, attempts, error
+        )
+
+def _path(url) -> str:
+    """URL without scheme and host - the base URL is the same for every request"""
+    url = str(url)
+    start = url.find("/", url.find("//") + 2) if "//" in url else 0
+    return url[start:] if start >= 0 else url
+
+def _body(response) -> Optional[bytes]:
+    """Response body if it was already read (streamed bodies are not consumed for logging)"""
+    # requests marks a body that has not been read yet with _content = False
+    if getattr(response, "_content", None) is False:
+        return None
+    try:
+        return response.content
+    except Exception:
+        return None
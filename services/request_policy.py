@@ -0,0 +1,164 @@
+"""
+Request Policy - Per-endpoint timeouts, retries with jittered backoff and overall deadlines for API calls
+"""
+
+import email.utils
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+# Statuses that mean the server did not process the request - safe to retry any request
+SAFE_RETRY_STATUSES = {429, 503}
+
+# Gateway errors - the request may have been processed, retried only for idempotent endpoints
+IDEMPOTENT_RETRY_STATUSES = {502, 504}
+
+# Endpoint defaults; read_timeout None means [api] timeout
+ENDPOINT_DEFAULTS = {
+    "auth": {"read_timeout": None, "deadline": 30.0, "idempotent": True},
+    # Creates an account - repeating it after the server got it could register twice
+    "register": {"read_timeout": None, "deadline": 30.0, "idempotent": False},
+    "verify": {"read_timeout": None, "deadline": 20.0, "idempotent": True},
+    "chat": {"read_timeout": 60.0, "deadline": 120.0, "idempotent": False},
+    "analyze": {"read_timeout": 120.0, "deadline": 180.0, "idempotent": False},
+}
+
+class RequestDeadlineExceeded(TimeoutError):
+    """The whole operation (all attempts and waits) did not finish before its deadline"""
+
+class EndpointPolicy:
+    """Timeouts and retry rules for one kind of API request"""
+    
+    def __init__(self, name: str, connect_timeout: float, read_timeout: float, retry_attempts: int,
+                 deadline: float, idempotent: bool, backoff_base: float = 0.5, backoff_max: float = 8.0):
+        """
+        Args:
+            name: Endpoint name (auth, register, verify, chat, analyze)
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait for the server between received bytes
+            retry_attempts: Total attempts, including the first one
+            deadline: Seconds for the whole operation, including retries and waits
+            idempotent: Whether the request may be repeated if it possibly reached the server
+            backoff_base: First backoff ceiling in seconds (doubled on every retry)
+            backoff_max: Maximum backoff ceiling in seconds
+        """
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_attempts = max(1, retry_attempts)
+        self.deadline = deadline
+        self.idempotent = idempotent
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+    
+    def is_retryable_status(self, status: int) -> bool:
+        return status in SAFE_RETRY_STATUSES or (self.idempotent and status in IDEMPOTENT_RETRY_STATUSES)
+    
+    def is_retryable_error(self, error_kind: str) -> bool:
+        """error_kind: "connect" (request never reached the server) or "read" (it may have)"""
+        return error_kind == "connect" or self.idempotent
+    
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number attempt (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+    
+    def __repr__(self):
+        return (f"EndpointPolicy({self.name}, connect={self.connect_timeout}s, read={self.read_timeout}s, "
+                f"attempts={self.retry_attempts}, deadline={self.deadline}s, idempotent={self.idempotent})")
+
+class RetryState:
+    """Tracks attempts and the deadline of one operation"""
+    
+    def __init__(self, policy: EndpointPolicy):
+        self.policy = policy
+        self.attempt = 1
+        self.started_at = time.monotonic()
+        self.deadline_at = self.started_at + policy.deadline
+    
+    @property
+    def remaining(self) -> float:
+        return self.deadline_at - time.monotonic()
+    
+    def timeouts(self) -> Tuple[float, float]:
+        """(connect, read) timeouts for the next attempt, clipped to the time left"""
+        remaining = self.remaining
+        if remaining <= 0:
+            raise RequestDeadlineExceeded(
+                f"{self.policy.name} request did not finish in {self.policy.deadline}s ({self.attempt - 1} attempts)"
+            )
+        return min(self.policy.connect_timeout, remaining), min(self.policy.read_timeout, remaining)
+    
+    def next_delay(self, status: Optional[int] = None, error_kind: Optional[str] = None,
+                   retry_after: Optional[str] = None) -> Optional[float]:
+        """Seconds to wait before retrying the failed attempt, or None to give up
+        
+        Args:
+            status: HTTP status of the response (None if the request failed)
+            error_kind: "connect" or "read" for failed requests
+            retry_after: Retry-After header of the response
+        """
+        if status is not None:
+            if not self.policy.is_retryable_status(status):
+                return None
+        elif not error_kind or not self.policy.is_retryable_error(error_kind):
+            return None
+            
+        if self.attempt >= self.policy.retry_attempts:
+            return None
+            
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.policy.backoff(self.attempt)
+            
+        # Waiting past the deadline is pointless - give up now with the last result
+        if delay >= self.remaining:
+            return None
+            
+        self.attempt += 1
+        return delay
+
+class RequestPolicy:
+    """Endpoint policies built from the [api] config section"""
+    
+    def __init__(self, config):
+        self.default_read_timeout = config.getfloat("api", "timeout", 30.0)
+        self.connect_timeout = config.getfloat("api", "connect_timeout", 5.0)
+        self.retry_attempts = config.getint("api", "retry_attempts", 3)
+        self.backoff_base = config.getfloat("api", "backoff_base", 0.5)
+        self.backoff_max = config.getfloat("api", "backoff_max", 8.0)
+        self.endpoints: Dict[str, EndpointPolicy] = {}
+        
+        for name, defaults in ENDPOINT_DEFAULTS.items():
+            # Optional per-endpoint overrides, e.g. chat_read_timeout, analyze_deadline
+            read_timeout = config.getfloat("api", f"{name}_read_timeout", defaults["read_timeout"] or self.default_read_timeout)
+            self.endpoints[name] = EndpointPolicy(
+                name,
+                connect_timeout=self.connect_timeout,
+                read_timeout=read_timeout,
+                retry_attempts=config.getint("api", f"{name}_retry_attempts", self.retry_attempts),
+                deadline=config.getfloat("api", f"{name}_deadline", defaults["deadline"]),
+                idempotent=defaults["idempotent"],
+                backoff_base=self.backoff_base,
+                backoff_max=self.backoff_max
+            )
+    
+    def for_endpoint(self, name: str) -> EndpointPolicy:
+        return self.endpoints[name]
+    
+    def start(self, name: str) -> RetryState:
+        """Begin a new operation against the endpoint"""
+        return RetryState(self.endpoints[name])
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (seconds or HTTP date) as seconds from now"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
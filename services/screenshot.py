@@ -7,16 +7,20 @@ import psutil
 import win32gui
 import win32process
 import win32con
-from PIL import Image
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import time
 
+from .capture_backend import CAPTUREBLT, SRCCOPY, CaptureContext, CaptureContextPool, Win32CaptureBackend
+from .capture_strategy import SCREEN_CAPTURE_METHODS, CaptureMethod, CaptureStrategy, WindowHidingPolicy, method_label
+from .frame import Frame
+from .frame_validation import FrameValidator
+
 class ScreenshotService:
     """Service for capturing screenshots and managing applications"""
     
-    def __init__(self):
+    def __init__(self, capture_backend=None):
         self.logger = logging.getLogger(__name__)
         self.screenshots_dir = Path("screenshots")
         self.screenshots_dir.mkdir(exist_ok=True)
@@ -24,34 +28,130 @@ class ScreenshotService:
         # Initialize MSS for fast screenshots
         self.mss_instance = mss.mss()
     
+        # Samples the raw buffer instead of decoding every pixel
+        self.frame_validator = FrameValidator()
+        
+        # Window DCs and bitmaps are kept per window and reused between captures
+        self.capture_backend = capture_backend or Win32CaptureBackend()
+        self.capture_pool = CaptureContextPool(self.capture_backend)
+        
+        # Learns which capture method works for each kind of window
+        self.capture_strategy = CaptureStrategy()
+        
+        # Decides when windows have to be hidden (off-screen rendering usually makes it unnecessary)
+        self.hiding_policy = WindowHidingPolicy()
+        self._process_names: Dict[int, str] = {}
+    
+    def close(self):
+        """Release pooled capture resources"""
+        self.capture_pool.release_all()
+    
+    def save_frame(self, frame: Frame, prefix: str = "screenshot") -> Optional[str]:
+        """Persist a captured frame to the screenshots directory (optional disk sink)"""
+        try:
+            timestamp = int(frame.metadata.get("timestamp", time.time()))
+            pid = frame.metadata.get("pid")
+            filename = f"{prefix}_{pid}_{timestamp}.png" if pid else f"{prefix}_{timestamp}.png"
+            filepath = frame.save(self.screenshots_dir / filename)
+            self.logger.info(f"Screenshot saved: {filepath}")
+            return filepath
+        except Exception as e:
+            self.logger.error(f"Failed to save screenshot: {e}")
+            return None
+    
     def capture_full_screen(self) -> Optional[str]:
-        """Capture full screen screenshot"""
+        """Capture full screen screenshot and save it to disk"""
+        frame = self.capture_full_screen_frame()
+        if frame is None:
+            return None
+        return self.save_frame(frame, "screenshot")
+    
+    def capture_full_screen_frame(self) -> Optional[Frame]:
+        """Capture full screen screenshot into memory"""
         try:
             # Get primary monitor
             monitor = self.mss_instance.monitors[1]  # 0 is all monitors, 1 is primary
             
             # Capture screenshot
             screenshot = self.mss_instance.grab(monitor)
+            frame = self._mss_to_frame(screenshot, {
+                "method": "fullscreen",
+                "rect": (monitor["left"], monitor["top"], monitor["width"], monitor["height"])
+            })
+            self.logger.info(f"Full screen captured: {frame.width}x{frame.height}")
             
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
+            return frame
             
-            # Save to file
-            timestamp = int(time.time())
-            filename = f"screenshot_{timestamp}.png"
-            filepath = self.screenshots_dir / filename
-            
-            img.save(filepath)
-            self.logger.info(f"Full screen screenshot saved: {filepath}")
+        except Exception as e:
+            self.logger.error(f"Full screen capture failed: {e}")
+            return None
+    
+    def capture_regions(self, regions: Dict[str, Tuple[int, int, int, int]], mode: str = "composite"):
+        """Capture only the given screen rectangles (e.g. CoordinatesManager info elements)
+        
+        Args:
+            regions: Element id -> (x, y, width, height) in screen coordinates
+            mode: "crops" - dict of element id -> Frame,
+                  "union" - one Frame of the bounding box of all regions,
+                  "composite" - one Frame with the crops stacked vertically
+        """
+        if not regions:
+            self.logger.warning("No regions to capture")
+            return None
             
-            return str(filepath)
+        try:
+            left = min(x for x, y, w, h in regions.values())
+            top = min(y for x, y, w, h in regions.values())
+            right = max(x + w for x, y, w, h in regions.values())
+            bottom = max(y + h for x, y, w, h in regions.values())
+            union_area = (right - left) * (bottom - top)
+            regions_area = sum(w * h for x, y, w, h in regions.values())
+            
+            if mode == "union":
+                return self._grab_rect(left, top, right - left, bottom - top, {"method": "regions_union"})
+                
+            # One grab of the bounding box is cheaper than several grabs unless the
+            # regions are far apart; then grab every region on its own
+            if union_area <= 4 * regions_area:
+                union_frame = self._grab_rect(left, top, right - left, bottom - top, {"method": "regions"})
+                crops = {
+                    element_id: union_frame.crop(x - left, y - top, x - left + w, y - top + h)
+                    for element_id, (x, y, w, h) in regions.items()
+                }
+            else:
+                crops = {
+                    element_id: self._grab_rect(x, y, w, h, {"method": "regions"})
+                    for element_id, (x, y, w, h) in regions.items()
+                }
+            for element_id, crop in crops.items():
+                crop.metadata["region"] = element_id
+                
+            self.logger.info(f"Captured {len(crops)} regions ({regions_area} of {union_area} px in bounding box)")
+            if mode == "crops":
+                return crops
+                
+            return Frame.stack(list(crops.values()), metadata={"method": "regions_composite", "regions": list(crops)})
             
         except Exception as e:
-            self.logger.error(f"Full screen capture failed: {e}")
+            self.logger.error(f"Region capture failed: {e}")
             return None
     
+    def _grab_rect(self, x: int, y: int, width: int, height: int, metadata: Dict) -> Frame:
+        """Grab a screen rectangle with MSS"""
+        screenshot = self.mss_instance.grab({"left": x, "top": y, "width": width, "height": height})
+        metadata = dict(metadata)
+        metadata["rect"] = (x, y, width, height)
+        return self._mss_to_frame(screenshot, metadata)
+    
     def capture_application(self, pid: int, hwnd: Optional[int] = None) -> Optional[str]:
-        """Capture screenshot of specific application window"""
+        """Capture screenshot of specific application window and save it to disk"""
+        frame = self.capture_application_frame(pid, hwnd)
+        if frame is None:
+            return None
+        return self.save_frame(frame, "app_screenshot")
+    
+    def capture_application_frame(self, pid: int, hwnd: Optional[int] = None) -> Optional[Frame]:
+        """Capture specific application window into memory"""
         try:
             # Use provided handle or find window handle from PID
             if not hwnd:
@@ -60,6 +160,9 @@ class ScreenshotService:
                     self.logger.error(f"No window found for PID {pid}")
                     return None
             
+            # Drop pooled capture contexts of windows that were closed
+            self.capture_pool.prune()
+            
             # Check if window is minimized
             was_minimized = win32gui.IsIconic(hwnd)
             self.logger.info(f"Window for PID {pid} is {'minimized' if was_minimized else 'visible'}")
@@ -67,10 +170,15 @@ class ScreenshotService:
             # For minimized windows, we need to use PrintWindow API directly
             if was_minimized:
                 self.logger.info(f"Capturing minimized window for PID {pid} using PrintWindow API...")
-                screenshot_path = self._capture_minimized_window(hwnd, pid)
-                if screenshot_path and self._is_valid_image(screenshot_path):
-                    self.logger.info(f"Minimized window screenshot saved: {screenshot_path}")
-                    return screenshot_path
+                start_time = time.perf_counter()
+                frame = self._capture_minimized_window(hwnd, pid)
+                is_valid = frame is not None and self._is_valid_frame(frame)
+                self.capture_strategy.record(
+                    self._get_window_key(hwnd, pid), ("minimized_printwindow", 3), is_valid, time.perf_counter() - start_time
+                )
+                if is_valid:
+                    self.logger.info(f"Minimized window captured: {frame}")
+                    return frame
                 else:
                     self.logger.warning(f"Failed to capture minimized window, trying restore method...")
             
@@ -81,12 +189,15 @@ class ScreenshotService:
                 win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
                 # Bring to front
                 win32gui.SetForegroundWindow(hwnd)
-                # Wait a bit for window to restore
-                time.sleep(0.5)
+                # Wait until the window is actually restored instead of a fixed delay
+                self._wait_for_restore(hwnd)
             
-            # HIDE ALL OTHER WINDOWS FOR CLEAN SCREENSHOT
-            self.logger.info(f"Hiding all windows except target (PID {pid}) for clean screenshot...")
-            hidden_windows = self._hide_all_windows_except(hwnd)
+            # Window content is rendered off-screen, so other windows are only hidden
+            # when the policy asks for it (see _try_capture_method for screen-pixel grabs)
+            hidden_windows = []
+            if self.hiding_policy.hide_all_before_capture():
+                self.logger.info(f"Hiding all windows except target (PID {pid}) for clean screenshot...")
+                hidden_windows = self._hide_all_windows_except(hwnd)
             
             try:
                 # Get window rectangle
@@ -101,81 +212,22 @@ class ScreenshotService:
                     self.logger.error(f"Invalid window dimensions: {width}x{height}")
                     return None
                 
-                # Try multiple capture methods - PrintWindow is the most reliable for window content
-                screenshot_path = None
-                
-                # Method 1: Try PrintWindow API first (captures actual window content)
-                try:
-                    screenshot_path = self._capture_with_printwindow(hwnd, width, height, pid)
-                    if screenshot_path and self._is_valid_image(screenshot_path):
-                        self.logger.info(f"Application screenshot saved with PrintWindow: {screenshot_path}")
-                        return screenshot_path
-                    else:
-                        self.logger.warning(f"PrintWindow method failed or returned invalid image")
-                except Exception as e:
-                    self.logger.debug(f"PrintWindow method failed: {e}")
-                
-                # Method 1.5: Try BitBlt method (alternative window content capture)
-                try:
-                    screenshot_path = self._capture_with_bitblt(hwnd, width, height, pid)
-                    if screenshot_path and self._is_valid_image(screenshot_path):
-                        self.logger.info(f"Application screenshot saved with BitBlt: {screenshot_path}")
-                        return screenshot_path
-                    else:
-                        self.logger.warning(f"BitBlt method failed or returned invalid image")
-                except Exception as e:
-                    self.logger.debug(f"BitBlt method failed: {e}")
-                
-                # Method 1.6: Try GetDIBits method (advanced window content capture)
-                try:
-                    screenshot_path = self._capture_with_getdibits(hwnd, width, height, pid)
-                    if screenshot_path and self._is_valid_image(screenshot_path):
-                        self.logger.info(f"Application screenshot saved with GetDIBits: {screenshot_path}")
-                        return screenshot_path
-                    else:
-                        self.logger.warning(f"GetDIBits method failed or returned invalid image")
-                except Exception as e:
-                    self.logger.debug(f"GetDIBits method failed: {e}")
-                
-                # Method 2: Try alternative PrintWindow with different dimensions
-                try:
-                    # Try with client area dimensions
-                    client_rect = win32gui.GetClientRect(hwnd)
-                    client_width = client_rect[2] - client_rect[0]
-                    client_height = client_rect[3] - client_rect[1]
-                    if client_width > 0 and client_height > 0:
-                        screenshot_path = self._capture_with_printwindow(hwnd, client_width, client_height, pid)
-                        if screenshot_path and self._is_valid_image(screenshot_path):
-                            self.logger.info(f"Application screenshot saved with PrintWindow (client area): {screenshot_path}")
-                            return screenshot_path
-                except Exception as e:
-                    self.logger.debug(f"PrintWindow client area method failed: {e}")
-                
-                # Method 3: Try MSS with client area (only as fallback)
-                try:
-                    screenshot_path = self._capture_with_mss_client(hwnd, width, height, pid)
-                    if screenshot_path and self._is_valid_image(screenshot_path):
-                        self.logger.info(f"Application screenshot saved with MSS client: {screenshot_path}")
-                        return screenshot_path
-                except Exception as e:
-                    self.logger.debug(f"MSS client method failed: {e}")
-                
-                # Method 4: Try MSS with window coordinates (last resort - captures screen area)
-                try:
-                    screenshot_path = self._capture_with_mss_window(hwnd, x, y, width, height, pid)
-                    if screenshot_path and self._is_valid_image(screenshot_path):
-                        self.logger.warning(f"Application screenshot saved with MSS (screen area): {screenshot_path}")
-                        return screenshot_path
-                except Exception as e:
-                    self.logger.debug(f"MSS window method failed: {e}")
+                # Try capture methods, starting with the one that last worked for this kind of window
+                window_key = self._get_window_key(hwnd, pid)
+                for method in self.capture_strategy.order(window_key):
+                    frame = self._try_capture_method(window_key, method, hwnd, pid, x, y, width, height)
+                    if frame:
+                        self.logger.info(f"Application captured with {method_label(method)}: {frame}")
+                        return frame
                 
                 self.logger.error(f"All capture methods failed for PID {pid}")
                 return None
                 
             finally:
                 # ALWAYS RESTORE HIDDEN WINDOWS
-                self.logger.info(f"Restoring {len(hidden_windows)} hidden windows...")
-                self._restore_windows(hidden_windows)
+                if hidden_windows:
+                    self.logger.info(f"Restoring {len(hidden_windows)} hidden windows...")
+                    self._restore_windows(hidden_windows)
                 
                 # Restore minimized state if it was minimized
                 if was_minimized:
@@ -185,13 +237,84 @@ class ScreenshotService:
             self.logger.error(f"Application capture failed for PID {pid}: {e}")
             return None
     
-    def _capture_minimized_window(self, hwnd: int, pid: int) -> Optional[str]:
+    def get_capture_statistics(self) -> Dict:
+        """Attempts, success rate and latency of every capture method per window kind"""
+        return self.capture_strategy.get_statistics()
+    
+    def _get_window_key(self, hwnd: int, pid: int) -> Tuple[str, str]:
+        """Window kind used to remember capture methods: (process name, window class)"""
+        process_name = self._process_names.get(pid)
+        if process_name is None:
+            try:
+                process_name = psutil.Process(pid).name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                process_name = "Unknown"
+            self._process_names[pid] = process_name
+        
+        try:
+            window_class = win32gui.GetClassName(hwnd)
+        except Exception:
+            window_class = "Unknown"
+        
+        return (process_name, window_class)
+    
+    def _try_capture_method(self, window_key: Tuple[str, str], method: CaptureMethod, hwnd: int, pid: int,
+                            x: int, y: int, width: int, height: int) -> Optional[Frame]:
+        """Run one capture method, validate the frame and record the outcome"""
+        name, flag = method
+        start_time = time.perf_counter()
+        frame = None
+        hidden_windows = []
+        
+        try:
+            # Screen-pixel grabs (DC blits, MSS) see whatever covers the window - hide only those windows
+            if name in SCREEN_CAPTURE_METHODS:
+                occluding_windows = self._get_occluding_windows(hwnd)
+                if self.hiding_policy.requires_hiding(method, bool(occluding_windows)):
+                    hidden_windows = self._hide_windows(occluding_windows)
+                    time.sleep(self.hiding_policy.settle_delay)
+                    
+            if name == "printwindow":
+                frame = self._capture_with_printwindow(hwnd, width, height, pid, flags=[flag])
+            elif name == "printwindow_client":
+                # Try with client area dimensions
+                client_rect = win32gui.GetClientRect(hwnd)
+                client_width = client_rect[2] - client_rect[0]
+                client_height = client_rect[3] - client_rect[1]
+                if client_width > 0 and client_height > 0:
+                    frame = self._capture_with_printwindow(hwnd, client_width, client_height, pid, slot="client", flags=[flag])
+            elif name == "bitblt":
+                frame = self._capture_with_bitblt(hwnd, width, height, pid)
+            elif name == "getdibits":
+                frame = self._capture_with_getdibits(hwnd, width, height, pid)
+            elif name == "mss_client":
+                frame = self._capture_with_mss_client(hwnd, width, height, pid)
+            elif name == "mss_window":
+                frame = self._capture_with_mss_window(hwnd, x, y, width, height, pid)
+        except Exception as e:
+            self.logger.debug(f"{method_label(method)} method failed: {e}")
+        finally:
+            if hidden_windows:
+                self._restore_windows(hidden_windows)
+        
+        is_valid = frame is not None and self._is_valid_frame(frame)
+        self.capture_strategy.record(window_key, method, is_valid, time.perf_counter() - start_time)
+        
+        if frame is not None and not is_valid:
+            self.logger.debug(f"{method_label(method)} method returned invalid image")
+        return frame if is_valid else None
+    
+    def _mss_to_frame(self, screenshot, metadata: Dict) -> Frame:
+        """Wrap an MSS grab result as a frame without re-encoding"""
+        return Frame(screenshot.bgra, screenshot.size.width, screenshot.size.height, metadata)
+    
+    def _context_to_frame(self, context: CaptureContext, metadata: Dict) -> Frame:
+        """Read the pixels of a pooled capture context into a frame"""
+        return Frame(self.capture_backend.read_pixels(context), context.width, context.height, metadata)
+    
+    def _capture_minimized_window(self, hwnd: int, pid: int) -> Optional[Frame]:
         """Capture minimized window using PrintWindow API without restoring"""
         try:
-            import win32ui
-            import win32con
-            import win32api
-            
             # Get window dimensions from window placement
             placement = win32gui.GetWindowPlacement(hwnd)
             if placement[1] == win32con.SW_SHOWMINIMIZED:
@@ -211,40 +334,11 @@ class ScreenshotService:
             
             self.logger.info(f"Capturing minimized window with dimensions: {width}x{height}")
             
-            # Get device context
-            hwndDC = win32gui.GetWindowDC(hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-            
-            # Create bitmap
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
-            
-            # Print window to bitmap using win32api
-            PW_RENDERFULLCONTENT = 3
-            result = win32api.PrintWindow(hwnd, saveDC.GetSafeHdc(), PW_RENDERFULLCONTENT)
-        
-            if result:
-                # Save bitmap
-                timestamp = int(time.time())
-                filename = f"minimized_app_screenshot_{pid}_{timestamp}.png"
-                filepath = self.screenshots_dir / filename
-                saveBitMap.SaveBitmapFile(saveDC, str(filepath))
-                
-                # Cleanup
-                win32gui.DeleteObject(saveBitMap.GetHandle())
-                saveDC.DeleteDC()
-                mfcDC.DeleteDC()
-                win32gui.ReleaseDC(hwnd, hwndDC)
-                
-                return str(filepath)
-            
-            # Cleanup on failure
-            win32gui.DeleteObject(saveBitMap.GetHandle())
-            saveDC.DeleteDC()
-            mfcDC.DeleteDC()
-            win32gui.ReleaseDC(hwnd, hwndDC)
+            with self.capture_pool.lease(hwnd, width, height) as context:
+                # Print window to bitmap
+                PW_RENDERFULLCONTENT = 3
+                if self.capture_backend.print_window(context, PW_RENDERFULLCONTENT):
+                    return self._context_to_frame(context, {"method": "minimized_printwindow", "pid": pid, "hwnd": hwnd})
             
             return None
             
@@ -252,109 +346,32 @@ class ScreenshotService:
             self.logger.debug(f"Minimized window capture failed: {e}")
             return None
     
-    def _capture_with_getdibits(self, hwnd: int, width: int, height: int, pid: int) -> Optional[str]:
+    def _capture_with_getdibits(self, hwnd: int, width: int, height: int, pid: int) -> Optional[Frame]:
         """Capture window using GetDIBits API"""
         try:
-            import win32ui
-            import win32con
-            import win32api
-            import struct
-            
             self.logger.info(f"Attempting GetDIBits capture for PID {pid} with dimensions {width}x{height}")
             
-            # Get device context
-            hwndDC = win32gui.GetWindowDC(hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-            
-            # Create bitmap
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
-            
-            # Get bitmap info
-            bmpinfo = saveBitMap.GetInfo()
-            bmpstr = saveBitMap.GetBitmapBits(True)
-            
-            # Create PIL image from bitmap data
-            img = Image.frombuffer(
-                'RGB',
-                (bmpinfo['bmWidth'], bmpinfo['bmHeight']),
-                bmpstr, 'raw', 'BGRX', 0, 1
-            )
-            
-            # Save image
-            timestamp = int(time.time())
-            filename = f"getdibits_app_screenshot_{pid}_{timestamp}.png"
-            filepath = self.screenshots_dir / filename
-            img.save(filepath)
-            
-            # Cleanup
-            win32gui.DeleteObject(saveBitMap.GetHandle())
-            saveDC.DeleteDC()
-            mfcDC.DeleteDC()
-            win32gui.ReleaseDC(hwnd, hwndDC)
-            
-            # Verify the image is not empty/black
-            if self._is_valid_image(str(filepath)):
-                self.logger.info(f"GetDIBits capture successful: {filepath}")
-                return str(filepath)
-            else:
-                self.logger.warning(f"GetDIBits capture resulted in invalid/empty image: {filepath}")
-                return None
+            with self.capture_pool.lease(hwnd, width, height) as context:
+                # The pooled bitmap still holds the previous capture, so copy the window
+                # (including layered child windows) before reading the bits back
+                if self.capture_backend.bit_blt(context, SRCCOPY | CAPTUREBLT):
+                    return self._context_to_frame(context, {"method": "getdibits", "pid": pid, "hwnd": hwnd})
+            
+            return None
             
         except Exception as e:
             self.logger.debug(f"GetDIBits method failed: {e}")
             return None
     
-    def _capture_with_bitblt(self, hwnd: int, width: int, height: int, pid: int) -> Optional[str]:
+    def _capture_with_bitblt(self, hwnd: int, width: int, height: int, pid: int) -> Optional[Frame]:
         """Capture window using BitBlt API"""
         try:
-            import win32ui
-            import win32con
-            import win32api
-            
             self.logger.info(f"Attempting BitBlt capture for PID {pid} with dimensions {width}x{height}")
             
-            # Get device context
-            hwndDC = win32gui.GetWindowDC(hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-            
-            # Create bitmap
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
-            
-            # Use BitBlt to copy window content
-            result = saveDC.BitBlt((0, 0), (width, height), mfcDC, (0, 0), win32con.SRCCOPY)
-            
-            if result:
-                # Save bitmap
-                timestamp = int(time.time())
-                filename = f"bitblt_app_screenshot_{pid}_{timestamp}.png"
-                filepath = self.screenshots_dir / filename
-                saveBitMap.SaveBitmapFile(saveDC, str(filepath))
-                
-                # Cleanup
-                win32gui.DeleteObject(saveBitMap.GetHandle())
-                saveDC.DeleteDC()
-                mfcDC.DeleteDC()
-                win32gui.ReleaseDC(hwnd, hwndDC)
-                
-                # Verify the image is not empty/black
-                if self._is_valid_image(str(filepath)):
-                    self.logger.info(f"BitBlt capture successful: {filepath}")
-                    return str(filepath)
-                else:
-                    self.logger.warning(f"BitBlt capture resulted in invalid/empty image: {filepath}")
-                    return None
-            
-            # Cleanup on failure
-            win32gui.DeleteObject(saveBitMap.GetHandle())
-            saveDC.DeleteDC()
-            mfcDC.DeleteDC()
-            win32gui.ReleaseDC(hwnd, hwndDC)
+            with self.capture_pool.lease(hwnd, width, height) as context:
+                # Use BitBlt to copy window content
+                if self.capture_backend.bit_blt(context, SRCCOPY):
+                    return self._context_to_frame(context, {"method": "bitblt", "pid": pid, "hwnd": hwnd})
             
             return None
             
@@ -362,71 +379,33 @@ class ScreenshotService:
             self.logger.debug(f"BitBlt method failed: {e}")
             return None
     
-    def _capture_with_printwindow(self, hwnd: int, width: int, height: int, pid: int) -> Optional[str]:
+    def _capture_with_printwindow(self, hwnd: int, width: int, height: int, pid: int, slot: str = "window",
+                                  flags: Optional[List[int]] = None) -> Optional[Frame]:
         """Capture window using PrintWindow API"""
         try:
-            import win32ui
-            import win32con
-            import win32api
-            
             self.logger.info(f"Attempting PrintWindow capture for PID {pid} with dimensions {width}x{height}")
             
-            # Get device context
-            hwndDC = win32gui.GetWindowDC(hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-            
-            # Create bitmap
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
-            
-            # Print window to bitmap using win32api
-            # Try different PrintWindow flags for better compatibility
-            flags_to_try = [
-                3,  # PW_RENDERFULLCONTENT
-                2,  # PW_CLIENTONLY
-                1,  # PW_PRINTCLIENT
-                0   # Default
-            ]
-            
-            result = False
-            for flag in flags_to_try:
-                try:
-                    result = win32api.PrintWindow(hwnd, saveDC.GetSafeHdc(), flag)
-                    if result:
-                        self.logger.debug(f"PrintWindow succeeded with flag {flag}")
-                        break
-                except Exception as e:
-                    self.logger.debug(f"PrintWindow with flag {flag} failed: {e}")
-                    continue
-        
-            if result:
-                # Save bitmap
-                timestamp = int(time.time())
-                filename = f"app_screenshot_{pid}_{timestamp}.png"
-                filepath = self.screenshots_dir / filename
-                saveBitMap.SaveBitmapFile(saveDC, str(filepath))
-                
-                # Cleanup
-                win32gui.DeleteObject(saveBitMap.GetHandle())
-                saveDC.DeleteDC()
-                mfcDC.DeleteDC()
-                win32gui.ReleaseDC(hwnd, hwndDC)
+            with self.capture_pool.lease(hwnd, width, height, slot) as context:
+                # Print window to bitmap
+                # Try different PrintWindow flags for better compatibility
+                flags_to_try = flags or [
+                    3,  # PW_RENDERFULLCONTENT
+                    2,  # PW_CLIENTONLY
+                    1,  # PW_PRINTCLIENT
+                    0   # Default
+                ]
                 
-                # Verify the image is not empty/black
-                if self._is_valid_image(str(filepath)):
-                    self.logger.info(f"PrintWindow capture successful: {filepath}")
-                    return str(filepath)
-                else:
-                    self.logger.warning(f"PrintWindow capture resulted in invalid/empty image: {filepath}")
-                    return None
-            
-            # Cleanup on failure
-            win32gui.DeleteObject(saveBitMap.GetHandle())
-            saveDC.DeleteDC()
-            mfcDC.DeleteDC()
-            win32gui.ReleaseDC(hwnd, hwndDC)
+                for flag in flags_to_try:
+                    try:
+                        if self.capture_backend.print_window(context, flag):
+                            self.logger.debug(f"PrintWindow succeeded with flag {flag}")
+                            return self._context_to_frame(
+                                context,
+                                {"method": "printwindow", "flag": flag, "pid": pid, "hwnd": hwnd}
+                            )
+                    except Exception as e:
+                        self.logger.debug(f"PrintWindow with flag {flag} failed: {e}")
+                        continue
             
             return None
             
@@ -434,7 +413,7 @@ class ScreenshotService:
             self.logger.debug(f"PrintWindow method failed: {e}")
             return None
     
-    def _capture_with_mss_window(self, hwnd: int, x: int, y: int, width: int, height: int, pid: int) -> Optional[str]:
+    def _capture_with_mss_window(self, hwnd: int, x: int, y: int, width: int, height: int, pid: int) -> Optional[Frame]:
         """Capture window using MSS with window coordinates"""
         # Capture window area
         monitor = {
@@ -445,19 +424,9 @@ class ScreenshotService:
         }
         
         screenshot = self.mss_instance.grab(monitor)
-        
-        # Convert to PIL Image
-        img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-        
-        # Save to file
-        timestamp = int(time.time())
-        filename = f"app_screenshot_{pid}_{timestamp}.png"
-        filepath = self.screenshots_dir / filename
-        
-        img.save(filepath)
-        return str(filepath)
+        return self._mss_to_frame(screenshot, {"method": "mss_window", "pid": pid, "hwnd": hwnd})
     
-    def _capture_with_mss_client(self, hwnd: int, width: int, height: int, pid: int) -> Optional[str]:
+    def _capture_with_mss_client(self, hwnd: int, width: int, height: int, pid: int) -> Optional[Frame]:
         """Capture window using MSS with client area coordinates"""
         # Get client area coordinates
         client_rect = win32gui.GetClientRect(hwnd)
@@ -477,17 +446,46 @@ class ScreenshotService:
         }
         
         screenshot = self.mss_instance.grab(monitor)
-        
-        # Convert to PIL Image
-        img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-        
-        # Save to file
-        timestamp = int(time.time())
-        filename = f"app_screenshot_{pid}_{timestamp}.png"
-        filepath = self.screenshots_dir / filename
-        
-        img.save(filepath)
-        return str(filepath)
+        return self._mss_to_frame(screenshot, {"method": "mss_client", "pid": pid, "hwnd": hwnd})
+    
+    def _wait_for_restore(self, hwnd: int):
+        """Poll until a restored window is no longer minimized (bounded by the policy timeout)"""
+        deadline = time.perf_counter() + self.hiding_policy.restore_timeout
+        while time.perf_counter() < deadline:
+            if not win32gui.IsIconic(hwnd):
+                rect = win32gui.GetWindowRect(hwnd)
+                if rect[2] - rect[0] > 0 and rect[3] - rect[1] > 0:
+                    return
+            time.sleep(0.02)
+        self.logger.debug(f"Window {hwnd} did not finish restoring in {self.hiding_policy.restore_timeout}s")
+    
+    def _get_occluding_windows(self, target_hwnd: int) -> List[int]:
+        """Visible windows above the target in z-order that overlap it"""
+        occluding = []
+        try:
+            left, top, right, bottom = win32gui.GetWindowRect(target_hwnd)
+            hwnd = win32gui.GetWindow(target_hwnd, win32con.GW_HWNDPREV)
+            while hwnd:
+                if win32gui.IsWindowVisible(hwnd) and not win32gui.IsIconic(hwnd):
+                    other_left, other_top, other_right, other_bottom = win32gui.GetWindowRect(hwnd)
+                    if other_left < right and other_right > left and other_top < bottom and other_bottom > top:
+                        occluding.append(hwnd)
+                hwnd = win32gui.GetWindow(hwnd, win32con.GW_HWNDPREV)
+        except Exception as e:
+            self.logger.debug(f"Error checking windows above {target_hwnd}: {e}")
+        return occluding
+    
+    def _hide_windows(self, hwnds: List[int]) -> List[int]:
+        """Hide the given windows, returning the ones that were hidden"""
+        hidden_windows = []
+        for hwnd in hwnds:
+            try:
+                win32gui.ShowWindow(hwnd, win32con.SW_HIDE)
+                hidden_windows.append(hwnd)
+            except Exception as e:
+                self.logger.debug(f"Failed to hide window {hwnd}: {e}")
+        self.logger.info(f"Hidden {len(hidden_windows)} windows covering the capture area")
+        return hidden_windows
     
     def _hide_all_windows_except(self, target_hwnd: int) -> List[int]:
         """Hide all visible windows except the target window"""
@@ -538,48 +536,21 @@ class ScreenshotService:
             self.logger.error(f"Error restoring windows: {e}")
     
     def _is_valid_image(self, filepath: str) -> bool:
-        """Check if image is valid (not black/empty)"""
+        """Check if image file is valid (not black/empty)"""
         try:
-            img = Image.open(filepath)
-            width, height = img.size
-            
-            # Check if image has reasonable dimensions
-            if width < 10 or height < 10:
-                self.logger.debug(f"Image too small: {width}x{height}")
-                return False
-            
-            # Convert to RGB if needed
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Check if image is not completely black or white
-            pixels = list(img.getdata())
-            if len(pixels) == 0:
-                self.logger.debug("No pixels in image")
-                return False
-            
-            # Sample pixels from different areas of the image
-            sample_size = min(1000, len(pixels))
-            sample_pixels = pixels[::max(1, len(pixels) // sample_size)]
-            
-            # Count non-black and non-white pixels
-            non_black_pixels = sum(1 for pixel in sample_pixels if pixel != (0, 0, 0))
-            non_white_pixels = sum(1 for pixel in sample_pixels if pixel != (255, 255, 255))
-            
-            # Image should have at least 5% non-black and non-white pixels
-            min_content_pixels = max(10, len(sample_pixels) * 0.05)
-            
-            is_valid = non_black_pixels >= min_content_pixels and non_white_pixels >= min_content_pixels
-            
-            if not is_valid:
-                self.logger.debug(f"Image appears to be mostly black/white: {non_black_pixels}/{len(sample_pixels)} non-black, {non_white_pixels}/{len(sample_pixels)} non-white")
-            
-            return is_valid
-            
+            return self._is_valid_frame(Frame.from_file(filepath))
         except Exception as e:
             self.logger.debug(f"Error validating image {filepath}: {e}")
             return False
     
+    def _is_valid_frame(self, frame: Frame) -> bool:
+        """Check if captured frame is valid (not black/empty)"""
+        try:
+            return self.frame_validator.is_valid(frame)
+        except Exception as e:
+            self.logger.debug(f"Error validating frame {frame}: {e}")
+            return False
+    
     def get_running_applications(self) -> List[Dict]:
         """Get list of running applications with visible and minimized windows"""
         applications = []
@@ -2,17 +2,20 @@
 Screenshot Settings Service - Manages screenshot preferences
 """
 
-import json
 import logging
 import sys
 import os
 from pathlib import Path
 
+from utils import json_codec
+from utils.write_behind import get_writer
+
 class ScreenshotSettingsService:
     """Service for managing screenshot settings"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.writer = get_writer()
         
         # Handle PyInstaller bundle
         if getattr(sys, 'frozen', False):
@@ -31,7 +34,14 @@ class ScreenshotSettingsService:
             "prompt": "Проанализируй этот скриншот максимально подробно на русском языке. Опиши все элементы интерфейса, текст, изображения, цвета, расположение элементов, функциональные кнопки, меню, статусы, ошибки, предупреждения, и любые другие детали. Если это веб-страница - укажи URL, заголовок, содержимое. Если это приложение - опиши его функциональность и текущее состояние. Будь максимально детальным и точным в описании.",
             "selected_app": None,
             "ai_automation_enabled": False,  # Включение автоматизации по ответам ИИ
-            "auto_screenshots_interval": 5  # Интервал автоматических скриншотов в секундах
+            "auto_screenshots_interval": 5,  # Интервал автоматических скриншотов в секундах
+            "save_screenshots": False,  # Сохранять скриншоты на диск (для анализа не требуется)
+            "window_hiding": "auto",  # Скрытие окон при захвате: auto (только перекрывающие), always, never
+            "region_mode": "composite",  # Режим захвата областей: composite (склейка), union (общая рамка)
+            "region_elements": None,  # Информационные элементы для захвата (None - все)
+            "skip_unchanged_frames": True,  # Не отправлять автоскриншот, если экран не изменился
+            "change_threshold": 0.01,  # Доля изменившихся блоков кадра, начиная с которой кадр анализируется
+            "change_detection_regions": False  # Сравнивать только информационные области
         }
         
         self.load_settings()
@@ -39,9 +49,9 @@ class ScreenshotSettingsService:
     def load_settings(self):
         """Load settings from file"""
         try:
-            if self.settings_file.exists():
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    self.settings = json.load(f)
+            text = self.writer.read_text(self.settings_file)
+            if text is not None:
+                self.settings = json_codec.loads(text)
                 
                 # Migrate settings - add missing default values
                 settings_updated = False
@@ -65,10 +75,9 @@ class ScreenshotSettingsService:
             self.settings = self.default_settings.copy()
     
     def save_settings(self):
-        """Save settings to file"""
+        """Save settings to file (written in the background, so the Tk thread and capture loop never wait for the disk)"""
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, ensure_ascii=False, indent=2)
+            self.writer.schedule(self.settings_file, json_codec.dumps(self.settings))
             self.logger.info("Screenshot settings saved successfully")
         except Exception as e:
             self.logger.error(f"Error saving screenshot settings: {e}")
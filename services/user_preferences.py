@@ -2,16 +2,19 @@
 User Preferences Service - Handles saving and loading user preferences
 """
 
-import json
 import logging
 from pathlib import Path
 from typing import Dict, Optional
 
+from utils import json_codec
+from utils.write_behind import get_writer
+
 class UserPreferencesService:
     """Service for managing user preferences and saved data"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.writer = get_writer()
         self.preferences_file = Path("data") / "user_preferences.json"
         self.preferences_file.parent.mkdir(exist_ok=True)
     
@@ -74,9 +77,10 @@ class UserPreferencesService:
     def load_preferences(self) -> Dict:
         """Load all preferences from file"""
         try:
-            if self.preferences_file.exists():
-                with open(self.preferences_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            # Includes preferences saved but not written yet
+            text = self.writer.read_text(self.preferences_file)
+            if text is not None:
+                return json_codec.loads(text)
             else:
                 return {}
         except Exception as e:
@@ -84,10 +88,9 @@ class UserPreferencesService:
             return {}
     
     def save_preferences(self, preferences: Dict):
-        """Save all preferences to file"""
+        """Save all preferences to file (written in the background)"""
         try:
-            with open(self.preferences_file, 'w', encoding='utf-8') as f:
-                json.dump(preferences, f, ensure_ascii=False, indent=2)
+            self.writer.schedule(self.preferences_file, json_codec.dumps(preferences))
         except Exception as e:
             self.logger.error(f"Error saving preferences: {e}")
     
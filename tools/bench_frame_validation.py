@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blank-frame detection on synthetic 4K frames
+
+Compares the old PIL getdata() based check with FrameValidator (NumPy and
+pure-Python memoryview sampling).
+
+Usage: python tools/bench_frame_validation.py [--width 3840] [--height 2160] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.frame import Frame
+from services.frame_validation import FrameValidator
+
+def legacy_is_valid_image(img) -> bool:
+    """Previous ScreenshotService._is_valid_image algorithm (full getdata() list)"""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    pixels = list(img.getdata())
+    sample_size = min(1000, len(pixels))
+    sample_pixels = pixels[::max(1, len(pixels) // sample_size)]
+    non_black_pixels = sum(1 for pixel in sample_pixels if pixel != (0, 0, 0))
+    non_white_pixels = sum(1 for pixel in sample_pixels if pixel != (255, 255, 255))
+    min_content_pixels = max(10, len(sample_pixels) * 0.05)
+    return non_black_pixels >= min_content_pixels and non_white_pixels >= min_content_pixels
+
+def make_frames(width: int, height: int):
+    """Synthetic BGRA frames: black, white, flat gray and noisy content"""
+    size = width * height * 4
+    return {
+        "black": Frame(bytes(size), width, height),
+        "white": Frame(b"\xff" * size, width, height),
+        "gray": Frame(b"\x80\x80\x80\xff" * (width * height), width, height),
+        "content": Frame(os.urandom(size), width, height),
+    }
+
+def timed(func, repeat: int):
+    """Best wall time of several runs, in milliseconds"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    frames = make_frames(args.width, args.height)
+    numpy_validator = FrameValidator()
+    python_validator = FrameValidator(use_numpy=False)
+    
+    print(f"Frame size: {args.width}x{args.height}, best of {args.repeat}")
+    print(f"{'frame':<10}{'legacy ms':>12}{'numpy ms':>12}{'python ms':>12}  results (legacy/numpy/python)")
+    for name, frame in frames.items():
+        legacy_ms, legacy_ok = timed(lambda: legacy_is_valid_image(frame.to_image()), max(1, args.repeat // 2))
+        if numpy_validator.use_numpy:
+            numpy_ms, numpy_ok = timed(lambda: numpy_validator.is_valid(frame), args.repeat)
+            numpy_col = f"{numpy_ms:>12.2f}"
+        else:
+            numpy_ok, numpy_col = None, f"{'n/a':>12}"
+        python_ms, python_ok = timed(lambda: python_validator.is_valid(frame), args.repeat)
+        print(f"{name:<10}{legacy_ms:>12.2f}{numpy_col}{python_ms:>12.2f}  {legacy_ok}/{numpy_ok}/{python_ok}")
+
+if __name__ == "__main__":
+    main()
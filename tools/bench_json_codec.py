@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON codecs on a generated multi-megabyte chat store
+
+Compares the old encoding of chats.json (json, indent=2, ensure_ascii=False)
+with every available codec of utils.json_codec (compact output), and times
+loading the same chats from per-chat journals (JournalChatStorage) with each
+codec.
+
+Usage: python tools/bench_json_codec.py [--chats 40] [--messages 200] [--repeat 3]
+"""
+
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.chat_storage import JournalChatStorage
+from utils import json_codec
+
+WORDS = (
+    "скриншот окно кнопка баланс игрока карты стол банк ставка уравнять повысить пропустить "
+    "интерфейс элемент меню статус ошибка предупреждение приложение состояние анализ ответ "
+    "действие рекомендую текущая позиция соперник вероятность выигрыша диапазон рук"
+).split()
+
+def make_chats(chats: int, messages: int, seed: int = 1) -> dict:
+    """Chats shaped like the real ones: long Cyrillic analysis texts from the assistant, short user messages"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    store = {}
+    for c in range(chats):
+        chat_id = f"chat-{c:04d}"
+        created = start + timedelta(hours=c)
+        chat_messages = []
+        for m in range(messages):
+            sender = "user" if m % 2 == 0 else "assistant"
+            length = rng.randint(5, 20) if sender == "user" else rng.randint(150, 400)
+            chat_messages.append({
+                "content": " ".join(rng.choice(WORDS) for _ in range(length)),
+                "sender": sender,
+                "timestamp": (created + timedelta(seconds=m * 7)).isoformat(),
+                "id": f"msg_{m}"
+            })
+        store[chat_id] = {
+            "id": chat_id,
+            "name": f"Чат {c + 1}",
+            "created_at": created.isoformat(),
+            "updated_at": (created + timedelta(seconds=messages * 7)).isoformat(),
+            "messages": chat_messages
+        }
+    return store
+
+def timed(func, repeat: int):
+    """Best wall time of several runs, in milliseconds"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=40)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    store = make_chats(args.chats, args.messages)
+    legacy = json.dumps(store, ensure_ascii=False, indent=2).encode("utf-8")
+    print(f"Chat store: {args.chats} chats x {args.messages} messages, "
+          f"{len(legacy) / 1024 / 1024:.1f} MB as legacy chats.json, best of {args.repeat}")
+    print(f"{'codec':<22}{'encode ms':>12}{'decode ms':>12}{'size MB':>10}{'journals load ms':>18}")
+    
+    encode_ms, _ = timed(lambda: json.dumps(store, ensure_ascii=False, indent=2).encode("utf-8"), args.repeat)
+    decode_ms, _ = timed(lambda: json.loads(legacy), args.repeat)
+    print(f"{'json indent=2 (old)':<22}{encode_ms:>12.1f}{decode_ms:>12.1f}{len(legacy) / 1024 / 1024:>10.2f}{'-':>18}")
+    
+    journals_dir = Path(tempfile.mkdtemp(prefix="bench-json-codec-"))
+    try:
+        for name in json_codec.available_codecs():
+            codec = json_codec.set_codec(name)
+            encode_ms, data = timed(lambda: codec.dumpb(store), args.repeat)
+            decode_ms, decoded = timed(lambda: codec.loads(data), args.repeat)
+            assert decoded == store, f"{name} round trip changed the data"
+            
+            # Journals written and replayed with this codec
+            shutil.rmtree(journals_dir)
+            JournalChatStorage(journals_dir).import_chats(store)
+            load_ms, storage = timed(lambda: JournalChatStorage(journals_dir), args.repeat)
+            assert storage.count_messages() == args.chats * args.messages
+            print(f"{name:<22}{encode_ms:>12.1f}{decode_ms:>12.1f}{len(data) / 1024 / 1024:>10.2f}{load_ms:>18.1f}")
+    finally:
+        shutil.rmtree(journals_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
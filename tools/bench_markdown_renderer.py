@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: markdown rendering of a long generated conversation
+
+Renders every assistant message of a generated conversation the way a chat
+reload does, twice (the second pass hits the parse cache), with:
+
+- plain: the raw text in one insert, as the chat showed it before;
+- per-span: the old approach - an insert per span and a tag_configure with
+  theme lookups for every styled span;
+- MarkdownRenderer: cached span lists, tags configured once per theme, one
+  insert per message;
+- Tk side only: what ModernChatWidget does on the Tk thread - the spans are
+  parsed on its markdown thread, so only the insert is timed.
+
+Uses a real tk.Text when a display is available, otherwise a stand-in widget
+that only counts calls (then the times are the Python side alone).
+
+Usage: python tools/bench_markdown_renderer.py [--messages 2000] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from gui.themes import ThemeManager
+from utils.markdown_renderer import MarkdownRenderer, parse_markdown
+
+WORDS = (
+    "скриншот окно кнопка баланс игрока карты стол банк ставка уравнять повысить пропустить "
+    "интерфейс элемент меню статус ошибка предупреждение приложение состояние анализ ответ "
+    "действие рекомендую текущая позиция соперник вероятность выигрыша диапазон рук"
+).split()
+
+class CountingText:
+    """Stands in for tk.Text without a display: counts the calls a renderer makes"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.chars = 0
+    
+    def insert(self, index, *args):
+        self.calls += 1
+        self.chars += sum(len(arg) for arg in args[::2])
+    
+    def tag_configure(self, tag, **options):
+        self.calls += 1
+    
+    def delete(self, start, end=None):
+        self.calls += 1
+
+def make_conversation(messages: int, seed: int = 1) -> list:
+    """Assistant answers shaped like screenshot analyses: headers, bullet and numbered lists, bold and italic words"""
+    rng = random.Random(seed)
+    
+    def sentence(length):
+        words = [rng.choice(WORDS) for _ in range(length)]
+        for _ in range(rng.randint(0, 2)):
+            i = rng.randrange(len(words))
+            words[i] = rng.choice(("**{}**", "*{}*", "`{}`")).format(words[i])
+        return " ".join(words).capitalize() + "."
+        
+    conversation = []
+    for m in range(messages):
+        lines = [f"## {sentence(3)}", "", sentence(rng.randint(15, 40)), ""]
+        lines += [f"- {sentence(rng.randint(4, 10))}" for _ in range(rng.randint(2, 6))]
+        lines += [""] + [f"{i}. {sentence(rng.randint(4, 10))}" for i in range(1, rng.randint(2, 5))]
+        lines += ["", f"**Рекомендация:** {sentence(rng.randint(5, 12))}"]
+        conversation.append((f"msg_{m}", "\n".join(lines)))
+    return conversation
+
+def render_per_span(widget, theme_manager, text: str):
+    """The old approach: spans inserted one by one, styled tags configured again for every span"""
+    for chunk, tag in parse_markdown(text):
+        widget.insert("end", chunk, ("assistant", tag) if tag else ("assistant",))
+        if tag in ("bold", "italic", "bullet", "number", "header_2"):
+            theme = theme_manager.get_theme()
+            widget.tag_configure(tag, font=(theme.fonts['primary'][0], theme.fonts['primary'][1], 'bold'),
+                                 foreground=theme.colors['text_primary'])
+
+def make_widget():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return tk.Text(root), True
+    except Exception:
+        return CountingText(), False
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    conversation = make_conversation(args.messages)
+    size = sum(len(text) for _, text in conversation)
+    theme_manager = ThemeManager()
+    widget, real = make_widget()
+    print(f"Conversation: {args.messages} assistant messages, {size / 1024:.0f} KB of markdown, "
+          f"{'tk.Text' if real else 'call-counting stand-in (no display)'}, best of {args.repeat}")
+    print(f"{'renderer':<28}{'first pass ms':>15}{'reload ms':>12}{'calls/message':>15}")
+    
+    def run(make_render):
+        best = [None, None]
+        calls = 0
+        for _ in range(args.repeat):
+            render = make_render()
+            for pass_no in range(2):
+                widget.delete("1.0", "end")
+                before = getattr(widget, "calls", 0)
+                start = time.perf_counter()
+                for key, text in conversation:
+                    render(key, text)
+                elapsed = (time.perf_counter() - start) * 1000
+                best[pass_no] = elapsed if best[pass_no] is None else min(best[pass_no], elapsed)
+                calls = getattr(widget, "calls", 0) - before
+        return best, calls
+        
+    (first, reload), calls = run(lambda: lambda key, text: widget.insert("end", f"{text}\n\n", ("assistant",)))
+    per_message = f"{calls / args.messages:.1f}" if not real else "-"
+    print(f"{'plain (no markdown)':<28}{first:>15.1f}{reload:>12.1f}{per_message:>15}")
+    
+    (first, reload), calls = run(lambda: lambda key, text: render_per_span(widget, theme_manager, text))
+    per_message = f"{calls / args.messages:.1f}" if not real else "-"
+    print(f"{'per-span (old)':<28}{first:>15.1f}{reload:>12.1f}{per_message:>15}")
+    
+    def cached():
+        # Room for the whole conversation, so the reload pass measures cache hits
+        renderer = MarkdownRenderer(widget, cache_size=len(conversation))
+        renderer.set_theme_manager(theme_manager)
+        return lambda key, text: renderer.render_markdown(text, "end", ("assistant",), key=("chat", key))
+        
+    (first, reload), calls = run(cached)
+    per_message = f"{calls / args.messages:.1f}" if not real else "-"
+    print(f"{'MarkdownRenderer (cached)':<28}{first:>15.1f}{reload:>12.1f}{per_message:>15}")
+
+    parsed = {key: parse_markdown(text) + (("\n", None),) for key, text in conversation}
+    
+    def pre_parsed():
+        renderer = MarkdownRenderer(widget)
+        renderer.set_theme_manager(theme_manager)
+        return lambda key, text: renderer.insert_spans(parsed[key], "end", ("assistant",))
+        
+    (first, reload), calls = run(pre_parsed)
+    per_message = f"{calls / args.messages:.1f}" if not real else "-"
+    print(f"{'Tk side only (pre-parsed)':<28}{first:>15.1f}{reload:>12.1f}{per_message:>15}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Check APIClient behaviour against the local stub API server
+
+Checks:
+  upload_reuse - consecutive image analyses stream their multipart body over
+                 one pooled keep-alive connection
+  async_client - AsyncAPIClient runs concurrent analyses and chat calls on
+                 one background event loop over pooled connections
+  retries      - injected 429/503 (Retry-After), delays and dropped
+                 connections are retried or fail fast per endpoint policy,
+                 within the operation deadline (sync and async clients)
+  streaming    - streamed chat answers arrive piece by piece: time to first
+                 token is a fraction of the full-answer latency, the pieces
+                 add up to the final message and the connection is reused
+
+Usage: python tools/check_api_client.py [--check upload_reuse] [--uploads 5]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+import concurrent.futures
+
+from services.api_client import APIClient
+from services.async_api_client import AsyncAPIClient
+from services.frame import Frame
+from tools.stub_api_server import StubAPIServer
+from utils.config import Config
+from utils.write_behind import get_writer
+
+def make_client(server: StubAPIServer, config_dir: str, **api_options) -> APIClient:
+    """Logged-in APIClient pointed at the stub server"""
+    config = Config(str(Path(config_dir) / "config.ini"))
+    config.set("api", "base_url", server.url)
+    for key, value in api_options.items():
+        config.set("api", key, value)
+    client = APIClient(config)
+    if not client.login("stub", "stub"):
+        raise RuntimeError("Login against stub server failed")
+    return client
+
+def check_upload_reuse(client: APIClient, server: StubAPIServer, args) -> bool:
+    """Several uploads over the session must share one connection and arrive complete"""
+    width, height = 800, 600
+    connections_before = server.state.to_dict()["connections"]
+    for i in range(args.uploads):
+        frame = Frame(os.urandom(width * height * 4), width, height, {"method": "synthetic"})
+        result = client.analyze_image(frame, f"upload {i}")
+        if not result.get("success"):
+            print(f"  upload {i} failed: {result}")
+            return False
+            
+    stats = server.state.to_dict()
+    new_connections = stats["connections"] - connections_before
+    uploads = stats["uploads"][-args.uploads:]
+    complete = all(upload["files"].get("file", {}).get("size", 0) > 0 for upload in uploads)
+    print(f"  uploads: {len(uploads)}, new connections: {new_connections}, "
+          f"body sizes: {[upload['bytes'] for upload in uploads]}")
+    return new_connections <= 1 and complete and len(uploads) == args.uploads
+
+def check_async_client(client: APIClient, server: StubAPIServer, args) -> bool:
+    """Concurrent analyses and chat calls through AsyncAPIClient succeed over pooled connections"""
+    async_client = AsyncAPIClient(client.config, auth_client=client)
+    width, height = 640, 480
+    connections_before = server.state.to_dict()["connections"]
+    try:
+        futures = []
+        for i in range(args.uploads):
+            frame = Frame(os.urandom(width * height * 4), width, height, {"method": "synthetic"})
+            futures.append(async_client.submit(async_client.analyze_image(frame, f"upload {i}")))
+            futures.append(async_client.submit(async_client.send_message(f"message {i}")))
+        results = [future.result(timeout=30) for future in concurrent.futures.as_completed(futures)]
+    finally:
+        async_client.close()
+        
+    new_connections = server.state.to_dict()["connections"] - connections_before
+    ok = all(result.get("success") for result in results)
+    print(f"  requests: {len(results)}, all succeeded: {ok}, new connections: {new_connections}")
+    return ok and new_connections <= len(futures)
+
+# (description, api options, faults (path, fault kwargs), call, expect success, max seconds, requests)
+RETRY_SCENARIOS = [
+    ("503 with Retry-After is retried", {},
+     [("/chat/send", {"status": 503, "retry_after": "0.3"})], ("send_message", "hi"), True, 2.0, 2),
+    ("429 twice is retried until success", {},
+     [("/openrouter/image/analyze", {"status": 429, "retry_after": "0", "times": 2})], ("analyze_image",), True, 3.0, 3),
+    ("idempotent read timeout is retried", {"verify_read_timeout": "0.5"},
+     [("/auth/verify", {"delay": 1.5})], ("verify_token",), True, 2.0, 2),
+    ("non-idempotent read timeout fails fast", {"chat_read_timeout": "0.5"},
+     [("/chat/send", {"delay": 3})], ("send_message", "hi"), False, 1.5, 1),
+    ("dropped connection on login is retried", {},
+     [("/auth/login", {"close": True})], ("login", "stub", "stub"), True, 2.0, 2),
+    ("dropped connection on register is not retried", {},
+     [("/auth/register", {"close": True})], ("register", "stub", "stub"), False, 1.5, 1),
+    ("502 on register is not retried", {},
+     [("/auth/register", {"status": 502})], ("register", "stub", "stub"), False, 1.5, 1),
+    ("deadline stops retries", {"verify_retry_attempts": "20", "verify_deadline": "1", "backoff_base": "0.2"},
+     [("/auth/verify", {"status": 503, "times": 20})], ("verify_token",), False, 1.5, None),
+]
+
+def check_retries(client: APIClient, server: StubAPIServer, args) -> bool:
+    """Run every retry scenario with the sync and the async client"""
+    ok = True
+    frame = Frame(os.urandom(320 * 240 * 4), 320, 240, {"method": "synthetic"})
+    for index, (description, options, faults, call, expect_success, max_seconds, expected_requests) in enumerate(RETRY_SCENARIOS):
+        for kind in ("sync", "async"):
+            if kind == "async" and not hasattr(AsyncAPIClient, call[0]):
+                continue  # Registration is only done by the sync client
+            # Config.set() saves - keep each scenario's overrides in its own config file
+            scenario_dir = tempfile.mkdtemp(prefix=f"retries-{index}-{kind}-", dir=os.getcwd())
+            scenario_client = make_client(server, scenario_dir, **options)
+            async_client = AsyncAPIClient(scenario_client.config, auth_client=scenario_client) if kind == "async" else None
+            for path, fault in faults:
+                server.state.add_fault(path, **fault)
+            requests_before = server.state.to_dict()["requests"]
+            
+            method, *call_args = call
+            if method == "analyze_image":
+                call_args = [frame, "retry check"]
+            start = time.perf_counter()
+            try:
+                if async_client:
+                    result = async_client.submit(getattr(async_client, method)(*call_args)).result(timeout=30)
+                else:
+                    result = getattr(scenario_client, method)(*call_args)
+            finally:
+                if async_client:
+                    async_client.close()
+            elapsed = time.perf_counter() - start
+            
+            succeeded = result if isinstance(result, bool) else bool(result.get("success"))
+            requests_made = server.state.to_dict()["requests"] - requests_before
+            passed = (succeeded == expect_success and elapsed <= max_seconds
+                      and (expected_requests is None or requests_made == expected_requests))
+            print(f"  [{'ok' if passed else 'FAIL'}] {kind:<5} {description}: success={succeeded}, "
+                  f"requests={requests_made}, {elapsed:.2f}s")
+            ok = ok and passed
+            # Drop faults left over by a failed scenario
+            server.state.faults.clear()
+    return ok
+
+def check_streaming(client: APIClient, server: StubAPIServer, args) -> bool:
+    """Compare time to first token of streamed answers with the latency of whole answers"""
+    message = " ".join(f"слово{i}" for i in range(40))
+    
+    start = time.perf_counter()
+    full = client.send_message(message)
+    full_latency = time.perf_counter() - start
+    print(f"  send_message: {full_latency:.2f}s until anything is shown")
+    
+    ok = bool(full.get("success"))
+    async_client = AsyncAPIClient(client.config, auth_client=client)
+    try:
+        for kind in ("sync", "async"):
+            deltas = []
+            connections_before = server.state.to_dict()["connections"]
+            start = time.perf_counter()
+            if kind == "sync":
+                result = client.stream_message(message, on_delta=deltas.append)
+            else:
+                result = async_client.submit(async_client.stream_message(message, on_delta=deltas.append)).result(timeout=30)
+            total = time.perf_counter() - start
+            
+            ttft = result.get("time_to_first_token") or total
+            new_connections = server.state.to_dict()["connections"] - connections_before
+            passed = (result.get("success") and result.get("complete") and "".join(deltas) == result.get("message")
+                      and result.get("message") == full.get("message") and ttft < total / 4
+                      and (kind == "async" or new_connections == 0))
+            print(f"  [{'ok' if passed else 'FAIL'}] {kind:<5} stream_message: first token {ttft:.3f}s, "
+                  f"complete {total:.2f}s, pieces {len(deltas)}, new connections {new_connections}")
+            ok = ok and passed
+            
+        # A stream cut off before the done event is a failure that keeps the text received so far
+        server.state.stream_done = False
+        for kind in ("sync", "async"):
+            deltas = []
+            if kind == "sync":
+                result = client.stream_message(message, on_delta=deltas.append)
+            else:
+                result = async_client.submit(async_client.stream_message(message, on_delta=deltas.append)).result(timeout=30)
+            passed = not result.get("success") and deltas and result.get("partial_message") == "".join(deltas)
+            print(f"  [{'ok' if passed else 'FAIL'}] {kind:<5} stream cut off before done: success={result.get('success')}, "
+                  f"partial {len(result.get('partial_message') or '')} chars")
+            ok = ok and passed
+    finally:
+        server.state.stream_done = True
+        async_client.close()
+    return ok
+
+CHECKS = {
+    "upload_reuse": check_upload_reuse,
+    "async_client": check_async_client,
+    "retries": check_retries,
+    "streaming": check_streaming,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", choices=sorted(CHECKS), action="append", help="Run only these checks")
+    parser.add_argument("--uploads", type=int, default=5)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    server = StubAPIServer().start()
+    failed = []
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            # APIClient keeps its token in ./config - do not touch the real one
+            os.chdir(config_dir)
+            for name in args.check or list(CHECKS):
+                client = make_client(server, config_dir)
+                print(f"{name}:")
+                ok = CHECKS[name](client, server, args)
+                print(f"  {'OK' if ok else 'FAILED'}")
+                if not ok:
+                    failed.append(name)
+            # Config writes are deferred - finish them before the directory is removed
+            get_writer().flush()
+    finally:
+        server.stop()
+        
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
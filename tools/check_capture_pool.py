@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Check: capture context pooling and learned capture method order, without Win32
+
+Drives services.capture_backend.CaptureContextPool through FakeCaptureBackend
+- reuse, recreation on resize, LRU eviction, pruning of closed windows and
+dropping a context whose capture raised - and services.capture_strategy.
+CaptureStrategy the way ScreenshotService tries methods for a window, with
+methods failing per fake backend settings.
+
+Usage: python tools/check_capture_pool.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.capture_backend import CaptureContextPool, FakeCaptureBackend
+from services.capture_strategy import CaptureStrategy, method_label
+
+# PrintWindow and BitBlt methods only - the fake backend has no screen to grab
+METHODS = [
+    ("printwindow", 3),
+    ("printwindow", 2),
+    ("printwindow", 1),
+    ("printwindow", 0),
+    ("bitblt", None),
+]
+
+WINDOW_KEY = ("game.exe", "GameWindow")
+
+def capture(pool: CaptureContextPool, strategy: CaptureStrategy, hwnd: int, width: int, height: int):
+    """Try methods in the learned order until one works, like ScreenshotService.capture_application_frame"""
+    backend = pool.backend
+    for method in strategy.order(WINDOW_KEY):
+        name, flag = method
+        start = time.perf_counter()
+        with pool.lease(hwnd, width, height) as context:
+            if name == "printwindow":
+                ok = backend.print_window(context, flag)
+            else:
+                ok = backend.bit_blt(context)
+            pixels = backend.read_pixels(context) if ok else None
+        strategy.record(WINDOW_KEY, method, ok, time.perf_counter() - start)
+        if ok:
+            return method, pixels
+    return None, None
+
+def check_pool():
+    backend = FakeCaptureBackend()
+    pool = CaptureContextPool(backend, max_contexts=2)
+    backend.add_window(1, 40, 30)
+    
+    # Same size: one context, reused
+    first = pool.acquire(1, 40, 30)
+    assert pool.acquire(1, 40, 30) is first and first.uses == 2, "context was not reused"
+    assert pool.stats["created"] == 1 and pool.stats["reused"] == 1, pool.stats
+    assert backend.created == 1 and backend.released == 0
+    
+    # Resize: the old context is released and a new one created
+    backend.add_window(1, 50, 30)
+    resized = pool.acquire(1, 50, 30)
+    assert resized is not first and (resized.width, resized.height) == (50, 30), "context was not recreated"
+    assert pool.stats["recreated"] == 1 and backend.created == 2 and backend.released == 1, pool.stats
+    
+    # Slots of one window are separate contexts
+    pool.acquire(1, 45, 25, slot="client")
+    assert len(pool) == 2 and pool.get(1, "client") is not None
+    
+    # Over max_contexts: the least recently used one goes
+    backend.add_window(2, 20, 20)
+    pool.acquire(1, 50, 30)
+    pool.acquire(2, 20, 20)
+    assert len(pool) == 2 and pool.get(1, "client") is None, "the least recently used context was kept"
+    assert pool.get(1) is resized and pool.stats["evicted"] == 1, pool.stats
+    assert backend.released == 2
+    
+    # Closed windows are pruned
+    backend.remove_window(2)
+    pool.prune()
+    assert pool.get(2) is None and len(pool) == 1 and pool.stats["invalidated"] == 1, pool.stats
+    assert backend.released == 3
+    
+    # A capture that raises drops its context, the next lease creates a fresh one
+    try:
+        with pool.lease(1, 50, 30):
+            raise RuntimeError("capture failed")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("lease swallowed the exception")
+    assert pool.get(1) is None and backend.released == 4, "context of a failed capture was kept"
+    created = backend.created
+    with pool.lease(1, 50, 30) as context:
+        assert context is not resized and backend.created == created + 1
+        
+    pool.release_all()
+    assert len(pool) == 0 and backend.released == backend.created, "contexts leaked"
+    print(f"Pool: {pool.stats}, {backend.created} contexts created and released")
+
+def check_strategy():
+    # Only PrintWindow flag 1 and BitBlt work for this window
+    backend = FakeCaptureBackend(print_window_flags=(1,), bit_blt_ok=True)
+    backend.add_window(1, 40, 30)
+    pool = CaptureContextPool(backend)
+    strategy = CaptureStrategy(METHODS)
+    
+    assert strategy.order(WINDOW_KEY) == METHODS, "unknown window kinds must use the default order"
+    method, pixels = capture(pool, strategy, 1, 40, 30)
+    assert method == ("printwindow", 1) and pixels[:4] == b"\x40\x80\xc0\xff", "wrong method or frame"
+    
+    # The working method moves first, untried ones keep the default order, the ones that never worked go last
+    order = strategy.order(WINDOW_KEY)
+    assert order == [("printwindow", 1), ("printwindow", 0), ("bitblt", None), ("printwindow", 3), ("printwindow", 2)], \
+        [method_label(m) for m in order]
+    calls = len(backend.calls)
+    assert capture(pool, strategy, 1, 40, 30)[0] == ("printwindow", 1)
+    assert len(backend.calls) == calls + 1, "the preferred method was not tried first"
+    
+    # The preferred method stops working: the next capture falls back and learns BitBlt
+    backend.print_window_flags.clear()
+    assert capture(pool, strategy, 1, 40, 30)[0] == ("bitblt", None)
+    assert strategy.order(WINDOW_KEY)[0] == ("bitblt", None), "the method that worked last is not preferred"
+    
+    # One context for all of it: every method reused the window's context
+    assert backend.created == 1 and pool.stats["reused"] == len(backend.calls) - 1, pool.stats
+    
+    stats = strategy.get_statistics()[" | ".join(WINDOW_KEY)]
+    assert stats["preferred"] == "bitblt", stats
+    methods = stats["methods"]
+    assert methods["printwindow:1"]["attempts"] == 3 and methods["printwindow:1"]["successes"] == 2, methods
+    assert methods["printwindow:1"]["success_rate"] == round(2 / 3, 3)
+    assert methods["printwindow:3"]["attempts"] == 1 and methods["printwindow:3"]["successes"] == 0
+    assert methods["printwindow:3"]["last_success_at"] is None
+    assert methods["bitblt"] == {**methods["bitblt"], "attempts": 1, "successes": 1}
+    assert methods["bitblt"]["last_success_at"] is not None
+    assert all(m["avg_latency_ms"] >= 0 for m in methods.values())
+    
+    # Latency is averaged over all attempts, failed ones included
+    other = ("viewer.exe", "Viewer")
+    for success, latency in ((True, 0.010), (False, 0.030)):
+        strategy.record(other, ("bitblt", None), success, latency)
+    bitblt = strategy.get_statistics()[" | ".join(other)]["methods"]["bitblt"]
+    assert bitblt["avg_latency_ms"] == 20.0 and bitblt["success_rate"] == 0.5, bitblt
+    
+    strategy.reset(WINDOW_KEY)
+    assert strategy.order(WINDOW_KEY) == METHODS, "reset kept what was learned"
+    assert list(strategy.get_statistics()) == [" | ".join(other)], "reset dropped another window kind"
+    results = ", ".join(f"{label} {m['successes']}/{m['attempts']}" for label, m in methods.items())
+    print(f"Strategy: {results}")
+
+def main():
+    check_pool()
+    check_strategy()
+    print("All capture pool checks passed")
+
+if __name__ == "__main__":
+    main()
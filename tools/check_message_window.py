@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Check: window and eviction logic of gui.message_window.MessageWindow, without Tk
+
+Drives the window the way ModernChatWidget does - last page on opening a
+chat, pages on scrolling both ways, live and streamed messages - over a list
+standing in for the Text widget, against a real ChatManager, and checks after
+every step that the view is bounded and shows consecutive stored messages in
+chat order.
+
+Usage: python tools/check_message_window.py [--messages 1000] [--capacity 200] [--page 50]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from gui.message_window import MessageWindow
+from services.chat_manager import ChatManager
+from utils.write_behind import get_writer
+
+class FakeView:
+    """Rendered entries as (key, content) in view order, like the Text widget with its marks"""
+    
+    def __init__(self, manager: ChatManager, chat_id: str, window: MessageWindow):
+        self.manager = manager
+        self.chat_id = chat_id
+        self.window = window
+        self.rows = []
+    
+    def open(self):
+        total = self.manager.get_message_count(self.chat_id)
+        messages = self.manager.get_messages(self.chat_id, before=total, limit=self.window.page_size)
+        self.window.reset(total)
+        self.rows = list(zip(self.window.prepend(len(messages)), (m["content"] for m in messages)))
+    
+    def scroll_up(self) -> bool:
+        page = self.window.older_page()
+        if page is None:
+            return False
+        messages = self.manager.get_messages(self.chat_id, before=page[0], limit=page[1])
+        self.rows[:0] = zip(self.window.prepend(len(messages)), (m["content"] for m in messages))
+        self._drop(self.window.evict_bottom())
+        return True
+    
+    def scroll_down(self) -> bool:
+        page = self.window.newer_page()
+        if page is None:
+            return False
+        messages = self.manager.get_messages(self.chat_id, before=page[0], limit=page[1])
+        self.rows.extend(zip(self.window.extend(len(messages)), (m["content"] for m in messages)))
+        self._drop(self.window.evict_top())
+        return True
+    
+    def add(self, content: str):
+        if self.window.has_newer:
+            self.open()
+        self.manager.add_message(self.chat_id, {"content": content, "sender": "user", "timestamp": "2024-01-01T00:00:00"})
+        self.rows.append((self.window.append(), content))
+        self._drop(self.window.evict_top())
+    
+    def start_stream(self) -> int:
+        if self.window.has_newer:
+            self.open()
+        key = self.window.append(stored=False, pinned=True)
+        self.rows.append((key, None))
+        self._drop(self.window.evict_top())
+        return key
+    
+    def finish_stream(self, key: int, content: str):
+        self.manager.add_message(self.chat_id, {"content": content, "sender": "assistant", "timestamp": "2024-01-01T00:00:00"})
+        self.rows = [(k, content if k == key else c) for k, c in self.rows]
+        self.window.stored(key)
+    
+    def _drop(self, keys):
+        dropped = set(keys)
+        self.rows = [row for row in self.rows if row[0] not in dropped]
+    
+    def check(self, step: str, ordered: bool = True):
+        """ordered=False: a stream saved after messages added below it is shown above them"""
+        window = self.window
+        assert [key for key, _ in self.rows] == window.keys, f"{step}: view and window disagree"
+        assert len(self.rows) <= window.capacity or any(c is None for _, c in self.rows), f"{step}: over capacity"
+        total = self.manager.get_message_count(self.chat_id)
+        assert window.total == total, f"{step}: window counts {window.total} messages, chat has {total}"
+        stored = self.manager.get_messages(self.chat_id, before=window.end, limit=window.end - window.start)
+        shown = [c for _, c in self.rows if c is not None]
+        stored = [m["content"] for m in stored]
+        if not ordered:
+            shown, stored = sorted(shown), sorted(stored)
+        assert shown == stored, f"{step}: view is not messages {window.start}..{window.end}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--capacity", type=int, default=200)
+    parser.add_argument("--page", type=int, default=50)
+    args = parser.parse_args()
+    
+    data_dir = Path(tempfile.mkdtemp(prefix="check-message-window-"))
+    try:
+        manager = ChatManager(str(data_dir), backend="sqlite")
+        manager.create_chat("chat", "Проверка")
+        for i in range(args.messages):
+            manager.add_message("chat", {"content": f"message {i}", "sender": "user", "timestamp": "2024-01-01T00:00:00"})
+            
+        view = FakeView(manager, "chat", MessageWindow(args.capacity, args.page))
+        view.open()
+        view.check("open")
+        
+        steps = 0
+        while view.scroll_up():
+            steps += 1
+            view.check(f"scroll up {steps}")
+        assert view.window.start == 0 and view.rows[0][1] == "message 0", "did not reach the first message"
+        assert view.window.has_newer or args.messages <= view.window.capacity, "nothing was evicted at the bottom"
+        print(f"Scrolled to the top in {steps} pages, {len(view.rows)} messages rendered")
+        
+        steps = 0
+        while view.scroll_down():
+            steps += 1
+            view.check(f"scroll down {steps}")
+        assert view.rows[-1][1] == f"message {args.messages - 1}", "did not reach the last message"
+        print(f"Scrolled back to the bottom in {steps} pages, {len(view.rows)} messages rendered")
+        
+        # Live message while scrolled into history jumps back to the latest messages
+        while view.scroll_up():
+            pass
+        view.add("live while scrolled up")
+        view.check("live message")
+        assert view.rows[-1][1] == "live while scrolled up"
+        
+        # A stream finished after messages added below it stays above them
+        key = view.start_stream()
+        for i in range(3):
+            view.add(f"during stream {i}")
+            view.check(f"message during stream {i}", ordered=False)
+        view.finish_stream(key, "streamed answer")
+        view.check("finished stream", ordered=False)
+        for i in range(view.window.capacity):
+            view.add(f"after stream {i}")
+        view.check("after stream")
+        assert key not in view.window.keys, "the finished stream was not evicted"
+        print(f"Live and streamed messages: {len(view.rows)} rendered of {view.window.total}")
+        
+        # An open stream is never evicted, and blocks eviction at the bottom
+        window = MessageWindow(4, 2)
+        first = window.append()
+        key = window.append(stored=False, pinned=True)
+        for _ in range(10):
+            window.append()
+        assert window.evict_top() == [first] and window.keys[0] == key, "the open stream was evicted"
+        assert window.evict_bottom() == [], "evicted at the bottom while a stream is open"
+        window.stored(key)
+        assert window.evict_top()[0] == key and len(window) == window.capacity, "the finished stream was kept"
+        
+        manager.close()
+        print("All message window checks passed")
+    finally:
+        get_writer().flush()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
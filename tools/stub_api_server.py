@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the YourSmartScreen API
+
+Implements the endpoints used by APIClient (/auth/login, /auth/verify,
+/chat/send, /openrouter/image/analyze) with canned answers and counts TCP
+connections and requests, so client behaviour (connection reuse, upload
+size, retries, timeouts) can be checked without the real server. GET /stats
+returns the counters. Faults (delays, error statuses, dropped connections)
+are injected per path with server.state.add_fault().
+
+/chat/send simulates generation time (stream_delay per word). Requests with
+"Accept: text/event-stream" get the answer word by word as server-sent
+events over a chunked response, others the whole JSON at the end.
+
+Usage: python tools/stub_api_server.py [--port 8765] [--stream-delay 0.05]
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubState:
+    """Counters shared by all handler threads"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.uploads = []
+        self.faults = {}
+        self.stream_delay = 0.02
+        self.stream_done = True  # False: streams end without the done event, like a cut-off answer
+    
+    def add_fault(self, path: str, status: int = None, delay: float = 0.0, retry_after: str = None,
+                  close: bool = False, times: int = 1):
+        """Make the next `times` requests to path misbehave
+        
+        Args:
+            path: Request path, e.g. /chat/send
+            status: Respond with this error status instead of the normal answer
+            delay: Sleep before answering (to trigger client read timeouts)
+            retry_after: Retry-After header sent with the error status
+            close: Drop the connection without any response
+            times: Number of requests affected
+        """
+        fault = {"status": status, "delay": delay, "retry_after": retry_after, "close": close}
+        with self.lock:
+            self.faults.setdefault(path, []).extend([fault] * times)
+    
+    def take_fault(self, path: str):
+        with self.lock:
+            faults = self.faults.get(path)
+            return faults.pop(0) if faults else None
+    
+    def to_dict(self):
+        with self.lock:
+            return {"connections": self.connections, "requests": self.requests, "uploads": list(self.uploads)}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive HTTP/1.1 handler with canned API responses"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def do_GET(self):
+        self._count_request()
+        if self._apply_fault():
+            return
+        if self.path == "/stats":
+            self._send_json(self.server.state.to_dict())
+        elif self.path == "/auth/verify":
+            self._send_json({"valid": True, "user_id": 1})
+        else:
+            self._send_json({"detail": "Not found"}, 404)
+    
+    def do_POST(self):
+        self._count_request()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self._apply_fault():
+            return
+            
+        if self.path == "/auth/login":
+            self._send_json({"access_token": "stub-token", "token_type": "bearer"})
+        elif self.path == "/auth/register":
+            self._send_json({"message": "Пользователь успешно зарегистрирован"})
+        elif self.path == "/chat/send":
+            data = json.loads(body or b"{}")
+            answer = f"Получено: {data.get('message', '')[:2000]}"
+            meta = {"response_id": f"resp-{int(time.time() * 1000)}", "tokens_used": 10, "model": "stub"}
+            if "text/event-stream" in self.headers.get("Accept", ""):
+                self._stream_answer(answer, meta)
+            else:
+                time.sleep(self.server.state.stream_delay * len(self._words(answer)))
+                self._send_json(dict(meta, response=answer))
+        elif self.path == "/openrouter/image/analyze":
+            fields, files = self._parse_multipart(body)
+            with self.server.state.lock:
+                self.server.state.uploads.append({
+                    "bytes": len(body),
+                    "files": {name: {"filename": filename, "content_type": content_type, "size": len(content)}
+                              for name, (filename, content_type, content) in files.items()}
+                })
+            self._send_json({
+                "analysis": f"Стол пуст. Промпт: {fields.get('prompt', '')[:100]}",
+                "model": fields.get("model"),
+                "tokens_used": 100,
+                "processing_time": 0.01
+            })
+        else:
+            self._send_json({"detail": "Not found"}, 404)
+    
+    def _apply_fault(self) -> bool:
+        """Apply the next injected fault for this path; True if the request was answered by it"""
+        fault = self.server.state.take_fault(self.path)
+        if not fault:
+            return False
+        if fault["delay"]:
+            time.sleep(fault["delay"])
+        if fault["close"]:
+            self.close_connection = True
+            self.connection.close()
+            return True
+        if fault["status"]:
+            payload = json.dumps({"detail": f"Injected HTTP {fault['status']}"}).encode("utf-8")
+            self.send_response(fault["status"])
+            if fault["retry_after"] is not None:
+                self.send_header("Retry-After", str(fault["retry_after"]))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return True
+        return False
+    
+    @staticmethod
+    def _words(text: str):
+        return re.findall(r"\S+\s*", text)
+    
+    def _stream_answer(self, answer: str, meta: dict):
+        """Send the answer word by word as SSE events in a chunked response"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in self._words(answer):
+            time.sleep(self.server.state.stream_delay)
+            self._write_chunk(f"data: {json.dumps({'delta': word}, ensure_ascii=False)}\n\n")
+        if self.server.state.stream_done:
+            self._write_chunk(f"event: done\ndata: {json.dumps(meta)}\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+    
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+    
+    def _count_request(self):
+        with self.server.state.lock:
+            self.server.state.requests += 1
+    
+    def _send_json(self, data, status: int = 200):
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _parse_multipart(self, body: bytes):
+        """Minimal multipart/form-data parser: returns (fields, files)"""
+        match = re.search(r"boundary=([^;]+)", self.headers.get("Content-Type", ""))
+        fields, files = {}, {}
+        if not match:
+            return fields, files
+        delimiter = b"--" + match.group(1).strip('"').encode("utf-8")
+        for part in body.split(delimiter)[1:]:
+            if part.startswith(b"--"):
+                break
+            head, _, content = part[2:].partition(b"\r\n\r\n")
+            content = content[:-2]  # trailing CRLF before the next delimiter
+            head = head.decode("utf-8")
+            name = re.search(r'name="([^"]*)"', head)
+            filename = re.search(r'filename="([^"]*)"', head)
+            content_type = re.search(r"Content-Type: (.+)", head)
+            if not name:
+                continue
+            if filename:
+                files[name.group(1)] = (filename.group(1), content_type.group(1).strip() if content_type else None, content)
+            else:
+                fields[name.group(1)] = content.decode("utf-8")
+        return fields, files
+
+class StubAPIServer(ThreadingHTTPServer):
+    """Threaded stub server; use start() to run it in the background"""
+    
+    daemon_threads = True
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, verbose: bool = False):
+        super().__init__((host, port), StubHandler)
+        self.state = StubState()
+        self.verbose = verbose
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "StubAPIServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+    
+    def handle_error(self, request, client_address):
+        # Clients giving up on delayed answers (read timeouts) are expected here
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stream-delay", type=float, default=0.05, help="Seconds per streamed word")
+    args = parser.parse_args()
+    
+    server = StubAPIServer(args.host, args.port, verbose=True)
+    server.state.stream_delay = args.stream_delay
+    print(f"Stub API server on {server.url} (set [api] base_url to it), Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
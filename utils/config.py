@@ -3,6 +3,7 @@ Configuration management for the AI Chat Messenger
 """
 
 import configparser
+import io
 import json
 import logging
 import sys
@@ -10,11 +11,14 @@ import os
 from pathlib import Path
 from typing import Any, Optional
 
+from .write_behind import get_writer
+
 class Config:
     """Configuration manager"""
     
     def __init__(self, config_file: str = "config.ini"):
         self.logger = logging.getLogger(__name__)
+        self.writer = get_writer()
         
         # Handle PyInstaller bundle
         if getattr(sys, 'frozen', False):
@@ -32,25 +36,50 @@ class Config:
             'api': {
                 'base_url': 'http://147.45.227.57',
                 'timeout': '30',
-                'retry_attempts': '3'
+                'retry_attempts': '3',
+                'connect_timeout': '5',
+                'backoff_base': '0.5',  # First retry waits up to this many seconds, doubled on every retry
+                'backoff_max': '8',
+                'stream_chat': 'true'  # Ask /chat/send for a streamed answer (plain JSON answers still work)
             },
             'gui': {
                 'theme': 'default',
                 'font_size': '10',
                 'window_width': '1000',
                 'window_height': '700',
-                'sidebar_visible': 'true'
+                'sidebar_visible': 'true',
+                'stream_flush_ms': '40',  # Streamed text is inserted in batches at this interval
+                'message_page_size': '50',  # Messages shown on opening a chat and loaded per scroll to the top
+                'max_rendered_messages': '200',  # Messages kept in the chat view, evicted ones load again on scrolling
+                'markdown_cache_size': '1000',  # Parsed assistant messages kept for re-rendering
+                'status_notice_ms': '4000'  # How long short notices stay in the status line
             },
             'screenshots': {
                 'save_directory': 'screenshots',
                 'max_age_hours': '24',
                 'format': 'png',
-                'quality': '95'
+                'quality': '95',
+                'max_edge': '1920',  # Uploads are downscaled to this longer side (0 - keep size)
+                'png_compress_level': '6',
+                'max_upload_bytes': '1048576'  # 1MB, cheaper encodings are tried above it
             },
             'logging': {
                 'level': 'INFO',
                 'max_file_size': '10485760',  # 10MB
-                'backup_count': '5'
+                'backup_count': '5',
+                'request_sample_rate': '0.1',  # Share of successful API requests logged at INFO
+                'request_body_limit': '300',
+                'slow_request_seconds': '15',
+                'api_debug_capture': 'false',  # Full request/response capture to api_debug_file
+                'api_debug_file': 'api_debug.log',
+                'api_debug_body_limit': '65536'  # Characters of each body kept in the debug capture
+            },
+            'storage': {
+                'backend': 'journal',  # journal (data/chats/*.jsonl) or sqlite (data/chats.db)
+                'json_codec': 'auto',  # auto (orjson, then msgspec, then json), orjson, msgspec or json
+                'retention_max_messages': '2000',  # Older messages of a chat go to data/archive (0 - no limit)
+                'retention_max_age_hours': '0',
+                'retention_max_bytes': '0'
             }
         }
         
@@ -59,8 +88,10 @@ class Config:
     def load_config(self):
         """Load configuration from file or create default"""
         try:
-            if self.config_file.exists():
-                self.config.read(self.config_file, encoding='utf-8')
+            # Includes a save still waiting in the write-behind queue
+            text = self.writer.read_text(self.config_file)
+            if text is not None:
+                self.config.read_string(text, source=str(self.config_file))
                 self.logger.info(f"Configuration loaded from {self.config_file}")
             else:
                 self.create_default_config()
@@ -82,8 +113,7 @@ class Config:
                     self.config.set(section, key, value)
             
             # Save to file
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                self.config.write(f)
+            self.writer.schedule(self.config_file, self._render())
                 
         except Exception as e:
             self.logger.error(f"Error creating default configuration: {e}")
@@ -129,14 +159,19 @@ class Config:
             self.logger.error(f"Error setting configuration {section}.{key}: {e}")
     
     def save_config(self):
-        """Save configuration to file"""
+        """Save configuration to file (written in the background)"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                self.config.write(f)
+            self.writer.schedule(self.config_file, self._render())
             self.logger.info(f"Configuration saved to {self.config_file}")
         except Exception as e:
             self.logger.error(f"Error saving configuration: {e}")
     
+    def _render(self) -> str:
+        """Configuration as INI text"""
+        buffer = io.StringIO()
+        self.config.write(buffer)
+        return buffer.getvalue()
+    
     def get_section(self, section: str) -> dict:
         """Get entire configuration section as dictionary"""
         try:
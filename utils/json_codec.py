@@ -0,0 +1,107 @@
+"""
+JSON Codec - JSON encoding for persisted state: orjson, then msgspec, then the standard library
+"""
+
+import json
+import logging
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, msgspec or the standard library is used instead
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional
+    msgspec = None
+
+class JsonCodec:
+    """Encodes to UTF-8 bytes and decodes str or bytes; output is compact unless pretty is set
+    
+    Non-ASCII text (Cyrillic chat messages) is written as is, never as \\u escapes.
+    Decoding errors are raised as ValueError by every codec.
+    """
+    
+    name = "json"
+    
+    def dumpb(self, obj: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    def dumps(self, obj: Any, pretty: bool = False) -> str:
+        return self.dumpb(obj, pretty).decode("utf-8")
+    
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+class OrjsonCodec(JsonCodec):
+    """orjson; values it cannot encode (e.g. integers over 64 bits) go through the standard library"""
+    
+    name = "orjson"
+    
+    def dumpb(self, obj: Any, pretty: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            return super().dumpb(obj, pretty)
+    
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+class MsgspecCodec(JsonCodec):
+    """msgspec.json; values it cannot encode go through the standard library"""
+    
+    name = "msgspec"
+    
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+    
+    def dumpb(self, obj: Any, pretty: bool = False) -> bytes:
+        try:
+            data = self._encoder.encode(obj)
+        except (TypeError, msgspec.EncodeError):
+            return super().dumpb(obj, pretty)
+        return msgspec.json.format(data, indent=2) if pretty else data
+    
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._decoder.decode(data)
+
+def available_codecs() -> Dict[str, JsonCodec]:
+    """Codecs that can be used here, fastest first"""
+    codecs = {}
+    if orjson is not None:
+        codecs["orjson"] = OrjsonCodec()
+    if msgspec is not None:
+        codecs["msgspec"] = MsgspecCodec()
+    codecs["json"] = JsonCodec()
+    return codecs
+
+_codec: JsonCodec = next(iter(available_codecs().values()))
+
+def set_codec(name: str = "auto") -> JsonCodec:
+    """Select the codec by name ("auto" - the fastest available); falls back to auto if it is not installed"""
+    global _codec
+    codecs = available_codecs()
+    if name not in ("auto", "", None) and name not in codecs:
+        logging.getLogger(__name__).warning(f"JSON codec '{name}' is not available, using {next(iter(codecs))}")
+    _codec = codecs.get(name) or next(iter(codecs.values()))
+    return _codec
+
+def get_codec() -> JsonCodec:
+    return _codec
+
+def dumpb(obj: Any, pretty: bool = False) -> bytes:
+    """Encode to UTF-8 JSON bytes with the selected codec"""
+    return _codec.dumpb(obj, pretty)
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Encode to a JSON string with the selected codec"""
+    return _codec.dumps(obj, pretty)
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON from str or bytes with the selected codec"""
+    return _codec.loads(data)
@@ -4,162 +4,161 @@ Markdown Renderer - Simple Markdown to tkinter Text widget renderer
 
 import re
 import tkinter as tk
-from typing import Dict, List, Tuple
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
 
-class MarkdownRenderer:
-    """Simple Markdown renderer for tkinter Text widget"""
+# Bold, italic and inline code inside a line
+INLINE = re.compile(r'(\*\*.*?\*\*|\*.*?\*|`.*?`)')
+NUMBERED = re.compile(r'^(\d+\.) \s*(.*)')
+HEADERS = (('# ', 'header_1'), ('## ', 'header_2'), ('### ', 'header_3'))
+
+# (text, tag or None)
+Span = Tuple[str, Optional[str]]
+
+def parse_markdown(text: str) -> Tuple[Span, ...]:
+    """Parse markdown into spans of text with their tag; adjacent spans with the same tag are merged
     
-    def __init__(self, text_widget: tk.Text):
-        self.text_widget = text_widget
-        self.theme_manager = None  # Will be set later
-        
-    def set_theme_manager(self, theme_manager):
-        """Set theme manager for styling"""
-        self.theme_manager = theme_manager
-        
-    def render_markdown(self, markdown_text: str, start_index: str = tk.END) -> None:
-        """Render markdown text to tkinter Text widget"""
-        if not markdown_text:
+    Every line of the source ends with a newline in the output.
+    """
+    spans: List[list] = []  # [tag, [chunks]]
+    
+    def add(chunk: str, tag: Optional[str] = None):
+        if not chunk:
             return
-            
-        # Debug: print(f"DEBUG: Rendering markdown text: {markdown_text[:200]}...")
-        
-        # Parse markdown and apply formatting
-        self._parse_and_insert(markdown_text, start_index)
+        if spans and spans[-1][0] == tag:
+            spans[-1][1].append(chunk)
+        else:
+            spans.append([tag, [chunk]])
     
-    def _parse_and_insert(self, text: str, start_index: str) -> None:
-        """Parse markdown text and insert with formatting"""
-        lines = text.split('\n')
-        current_index = start_index
-        
-        for line in lines:
-            if not line.strip():
-                # Empty line
-                self.text_widget.insert(current_index, '\n')
-                current_index = tk.END
+    def add_inline(line: str):
+        for part in INLINE.split(line):
+            if not part:
                 continue
-                
-            # Check for different markdown elements
-            if line.startswith('# '):
-                # H1 header
-                self._insert_header(line[2:], 1, current_index)
-            elif line.startswith('## '):
-                # H2 header
-                self._insert_header(line[3:], 2, current_index)
-            elif line.startswith('### '):
-                # H3 header
-                self._insert_header(line[4:], 3, current_index)
-            elif line.startswith('- ') or line.startswith('* '):
-                # Bullet list
-                self._insert_bullet(line[2:], current_index)
-            elif line.startswith('1. ') or re.match(r'^\d+\. ', line):
-                # Numbered list
-                self._insert_numbered(line, current_index)
-            elif line.startswith('```'):
-                # Code block start/end - skip for now
-                self.text_widget.insert(current_index, line + '\n', 'code_block')
-            elif line.startswith('`') and line.endswith('`') and len(line) > 2:
-                # Inline code
-                self._insert_inline_code(line, current_index)
+            if part.startswith('**') and part.endswith('**'):
+                add(part[2:-2], 'bold')
+            elif part.startswith('*') and part.endswith('*') and len(part) > 2:
+                add(part[1:-1], 'italic')
+            elif part.startswith('`') and part.endswith('`') and len(part) > 2:
+                add(part[1:-1], 'inline_code')
             else:
-                # Regular text - check for inline formatting
-                self._insert_formatted_text(line, current_index)
+                add(part)
+        add('\n')
+        
+    for line in text.split('\n'):
+        if not line.strip():
+            add('\n')
+            continue
+            
+        header = next(((prefix, tag) for prefix, tag in HEADERS if line.startswith(prefix)), None)
+        numbered = NUMBERED.match(line)
+        if header:
+            add(line[len(header[0]):] + '\n', header[1])
+        elif line.startswith('- ') or line.startswith('* '):
+            add('• ', 'bullet')
+            add_inline(line[2:])
+        elif numbered:
+            number, content = numbered.groups()
+            add(number + ' ', 'number')
+            add_inline(content)
+        elif line.startswith('```'):
+            # Code fences are shown as they are
+            add(line + '\n', 'code_block')
+        elif line.startswith('`') and line.endswith('`') and len(line) > 2:
+            add(line[1:-1], 'inline_code')
+            add('\n')
+        else:
+            add_inline(line)
             
-            current_index = tk.END
+    return tuple((''.join(chunks), tag) for tag, chunks in spans)
+
+class MarkdownRenderer:
+    """Simple Markdown renderer for tkinter Text widget
     
-    def _insert_header(self, text: str, level: int, start_index: str) -> None:
-        """Insert header with appropriate formatting"""
-        tag_name = f'header_{level}'
-        self.text_widget.insert(start_index, text + '\n', tag_name)
-        
-        # Configure header tag if theme manager is available
-        if self.theme_manager:
-            theme = self.theme_manager.get_theme()
-            font_size = 14 - level  # H1=13, H2=12, H3=11
-            self.text_widget.tag_configure(tag_name, 
-                                         font=(theme.fonts['primary'][0], font_size, 'bold'),
-                                         foreground=theme.colors.get('header_color', theme.colors['text_primary']))
+    A message is parsed once into a span list, cached by message key (or by
+    its text), and inserted with a single Text.insert call carrying every
+    span with its tags. Tags are configured once per theme, not per span.
+    """
     
-    def _insert_bullet(self, text: str, start_index: str) -> None:
-        """Insert bullet point"""
-        self.text_widget.insert(start_index, '• ', 'bullet')
-        self._insert_formatted_text(text, tk.END)
-        self.text_widget.insert(tk.END, '\n')
-        
-        # Configure bullet tag
-        if self.theme_manager:
-            theme = self.theme_manager.get_theme()
-            self.text_widget.tag_configure('bullet', 
-                                         font=(theme.fonts['primary'][0], theme.fonts['primary'][1], 'bold'),
-                                         foreground=theme.colors.get('bullet_color', theme.colors['text_primary']))
+    def __init__(self, text_widget: tk.Text, cache_size: int = 1000):
+        """
+        Args:
+            text_widget: Text widget to render into
+            cache_size: Parsed messages kept
+        """
+        self.text_widget = text_widget
+        self.theme_manager = None  # Will be set later
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Hashable, Tuple[str, Tuple[Span, ...]]]" = OrderedDict()
+        self._configured_theme = None
+    
+    def set_theme_manager(self, theme_manager):
+        """Set theme manager for styling; tags are configured again for its current theme"""
+        self.theme_manager = theme_manager
+        self._configured_theme = None
+    
+    def configure_tags(self, theme) -> None:
+        """Configure the markdown tags for a theme"""
+        family, size = theme.fonts['primary'][0], theme.fonts['primary'][1]
+        text_color = theme.colors['text_primary']
+        for level in (1, 2, 3):
+            self.text_widget.tag_configure(f'header_{level}',
+                                           font=(family, 14 - level, 'bold'),  # H1=13, H2=12, H3=11
+                                           foreground=theme.colors.get('header_color', text_color))
+        self.text_widget.tag_configure('bullet', font=(family, size, 'bold'),
+                                       foreground=theme.colors.get('bullet_color', text_color))
+        self.text_widget.tag_configure('number', font=(family, size, 'bold'),
+                                       foreground=theme.colors.get('number_color', text_color))
+        self.text_widget.tag_configure('inline_code', font=(family, size, 'normal'),
+                                       background=theme.colors.get('code_bg', '#f0f0f0'),
+                                       foreground=theme.colors.get('code_text', '#d63384'),
+                                       relief='flat', borderwidth=1)
+        self.text_widget.tag_configure('bold', font=(family, size, 'bold'), foreground=text_color)
+        self.text_widget.tag_configure('italic', font=(family, size, 'italic'), foreground=text_color)
+        self._configured_theme = theme
     
-    def _insert_numbered(self, text: str, start_index: str) -> None:
-        """Insert numbered list item"""
-        # Extract number and text
-        match = re.match(r'^(\d+\.)\s*(.*)', text)
-        if match:
-            number, content = match.groups()
-            self.text_widget.insert(start_index, number + ' ', 'number')
-            self._insert_formatted_text(content, tk.END)
-            self.text_widget.insert(tk.END, '\n')
+    def parse(self, markdown_text: str, key: Optional[Hashable] = None) -> Tuple[Span, ...]:
+        """Spans of a message, from the cache when the same message was parsed before
+        
+        Args:
+            markdown_text: Message text
+            key: Message identity, e.g. (chat_id, message_id); the text itself by default
+        """
+        key = markdown_text if key is None else key
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == markdown_text:
+            self._cache.move_to_end(key)
+            return cached[1]
             
-            # Configure number tag
-            if self.theme_manager:
-                theme = self.theme_manager.get_theme()
-                self.text_widget.tag_configure('number', 
-                                             font=(theme.fonts['primary'][0], theme.fonts['primary'][1], 'bold'),
-                                             foreground=theme.colors.get('number_color', theme.colors['text_primary']))
+        spans = parse_markdown(markdown_text)
+        self._cache[key] = (markdown_text, spans)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return spans
     
-    def _insert_inline_code(self, text: str, start_index: str) -> None:
-        """Insert inline code"""
-        # Remove backticks
-        code_text = text[1:-1]
-        self.text_widget.insert(start_index, code_text, 'inline_code')
+    def render_markdown(self, markdown_text: str, start_index: str = tk.END, tags: Tuple[str, ...] = (),
+                        key: Optional[Hashable] = None) -> None:
+        """Render markdown text to tkinter Text widget
         
-        # Configure inline code tag
+        Args:
+            markdown_text: Message text
+            start_index: Where to insert it
+            tags: Tags applied to the whole message (e.g. the sender tag)
+            key: Cache key of the message, see parse()
+        """
+        if not markdown_text:
+            return
+        self.insert_spans(self.parse(markdown_text, key), start_index, tags)
+    
+    def insert_spans(self, spans: Tuple[Span, ...], start_index: str = tk.END, tags: Tuple[str, ...] = ()) -> None:
+        """Insert parsed spans in one Text.insert call"""
         if self.theme_manager:
             theme = self.theme_manager.get_theme()
-            self.text_widget.tag_configure('inline_code', 
-                                         font=(theme.fonts['primary'][0], theme.fonts['primary'][1], 'normal'),
-                                         background=theme.colors.get('code_bg', '#f0f0f0'),
-                                         foreground=theme.colors.get('code_text', '#d63384'),
-                                         relief='flat',
-                                         borderwidth=1)
-    
-    def _insert_formatted_text(self, text: str, start_index: str) -> None:
-        """Insert text with inline formatting (bold, italic, links)"""
-        # Split text by formatting markers
-        parts = re.split(r'(\*\*.*?\*\*|\*.*?\*|`.*?`)', text)
-        
-        for part in parts:
-            if not part:
-                continue
+            if theme is not self._configured_theme:
+                self.configure_tags(theme)
                 
-            if part.startswith('**') and part.endswith('**'):
-                # Bold text
-                bold_text = part[2:-2]
-                self.text_widget.insert(start_index, bold_text, 'bold')
-                if self.theme_manager:
-                    theme = self.theme_manager.get_theme()
-                    self.text_widget.tag_configure('bold', 
-                                                 font=(theme.fonts['primary'][0], theme.fonts['primary'][1], 'bold'),
-                                                 foreground=theme.colors['text_primary'])
-            elif part.startswith('*') and part.endswith('*') and len(part) > 2:
-                # Italic text
-                italic_text = part[1:-1]
-                self.text_widget.insert(start_index, italic_text, 'italic')
-                if self.theme_manager:
-                    theme = self.theme_manager.get_theme()
-                    self.text_widget.tag_configure('italic', 
-                                                 font=(theme.fonts['primary'][0], theme.fonts['primary'][1], 'italic'),
-                                                 foreground=theme.colors['text_primary'])
-            elif part.startswith('`') and part.endswith('`') and len(part) > 2:
-                # Inline code (already handled above, but just in case)
-                code_text = part[1:-1]
-                self.text_widget.insert(start_index, code_text, 'inline_code')
-            else:
-                # Regular text
-                self.text_widget.insert(start_index, part)
-        
-        # Add newline at the end
-        self.text_widget.insert(tk.END, '\n')
+        args = []
+        for text, tag in spans:
+            args.append(text)
+            args.append(tags + (tag,) if tag else tags)
+        if args:
+            self.text_widget.insert(start_index, *args)
@@ -0,0 +1,164 @@
+"""
+Write Behind - Deferred, coalesced and atomic file writes on a background thread
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# Debounce window: mutations within it end up in one write
+DEFAULT_DELAY = 0.5
+
+# Writes of the same content tried before it is dropped (e.g. the file stays locked)
+MAX_ATTEMPTS = 3
+
+class WriteBehindWriter:
+    """Writes files on a background thread, at most once per debounce window
+    
+    schedule() only records the new content of a file. The first call for a
+    file opens the window and later calls within it replace the content, so a
+    burst of mutations costs a single write. Files are written to a temporary
+    file next to the target and swapped in with os.replace, so a crash leaves
+    either the old or the new content, never a mix. read_text() sees content
+    that has not reached the disk yet, and flush() writes everything at once
+    (called on shutdown).
+    """
+    
+    def __init__(self, delay: float = DEFAULT_DELAY, fsync: bool = True):
+        """
+        Args:
+            delay: Debounce window in seconds
+            fsync: Force written files to disk before replacing the old ones
+        """
+        self.logger = logging.getLogger(__name__)
+        self.delay = delay
+        self.fsync = fsync
+        self._pending: Dict[Path, str] = {}
+        self._due: Dict[Path, float] = {}
+        self._writing: Dict[Path, str] = {}
+        self._attempts: Dict[Path, int] = {}
+        self._condition = threading.Condition()
+        # One batch of writes at a time - the worker's or flush()'s
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+    
+    def schedule(self, path, text: str):
+        """Write text to path after the debounce window; returns immediately"""
+        path = Path(path)
+        with self._condition:
+            self._pending[path] = text
+            self._due.setdefault(path, time.monotonic() + self.delay)
+            self._attempts.pop(path, None)
+            closed = self._closed
+            if not closed:
+                self._start()
+                self._condition.notify()
+        if closed:
+            # Late saves during shutdown are written right away
+            self._write_paths([path])
+    
+    def read_text(self, path, encoding: str = "utf-8") -> Optional[str]:
+        """Latest content of a file, including content still waiting to be written; None if there is none"""
+        path = Path(path)
+        with self._condition:
+            if path in self._pending:
+                return self._pending[path]
+            if path in self._writing:
+                return self._writing[path]
+        try:
+            return path.read_text(encoding=encoding)
+        except FileNotFoundError:
+            return None
+    
+    def flush(self):
+        """Write all pending files now, on the calling thread"""
+        with self._condition:
+            paths = list(self._pending)
+        self._write_paths(paths)
+    
+    def close(self, timeout: float = 5.0):
+        """Flush and stop the background thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self.flush()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    due = [path for path, due_at in self._due.items() if due_at <= now]
+                    if due:
+                        break
+                    timeout = min(self._due.values()) - now if self._due else None
+                    self._condition.wait(timeout)
+            self._write_paths(due)
+    
+    def _write_paths(self, paths):
+        with self._write_lock:
+            with self._condition:
+                batch = {path: self._pending.pop(path) for path in paths if path in self._pending}
+                for path in batch:
+                    self._due.pop(path, None)
+                self._writing.update(batch)
+                
+            for path, text in batch.items():
+                try:
+                    self._write_file(path, text)
+                    failed = False
+                except OSError as e:
+                    self.logger.error(f"Error writing {path}: {e}")
+                    failed = True
+                    
+                with self._condition:
+                    self._writing.pop(path, None)
+                    if not failed:
+                        self._attempts.pop(path, None)
+                    elif path not in self._pending:
+                        # Retry the same content unless newer content is already scheduled
+                        attempts = self._attempts.get(path, 0) + 1
+                        if attempts < MAX_ATTEMPTS:
+                            self._attempts[path] = attempts
+                            self._pending[path] = text
+                            self._due[path] = time.monotonic() + self.delay
+                            self._condition.notify()
+                        else:
+                            self._attempts.pop(path, None)
+                            self.logger.error(f"Giving up writing {path} after {attempts} attempts")
+    
+    def _write_file(self, path: Path, text: str):
+        temp = path.with_name(path.name + ".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(text)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp, path)
+        self.logger.debug(f"Wrote {path}")
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+def get_writer() -> WriteBehindWriter:
+    """Writer shared by all persistence services; flushed when the interpreter exits"""
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = WriteBehindWriter()
+            atexit.register(_default_writer.close)
+        return _default_writer